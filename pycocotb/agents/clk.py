@@ -2,7 +2,7 @@ from pycocotb.agents.base import AgentBase
 from pycocotb.constants import CLK_PERIOD
 from pycocotb.hdlSimulator import HdlSimulator
 from pycocotb.process_utils import CallbackLoop
-from pycocotb.triggers import Timer, WaitWriteOnly, WaitCombRead
+from pycocotb.triggers import Timer, WaitWriteOnly, SimCallback
 
 
 class ClockAgent(AgentBase):
@@ -16,6 +16,8 @@ class ClockAgent(AgentBase):
 
     :ivar ~.period: period of signal to generate
     :ivar ~.initWait: time to wait before starting oscillation
+    :ivar ~.nativeDriver: if True and RTL simulator supports it the clock
+        is generated directly by RTL simulator (without python process)
     """
 
     def __init__(self, sim: HdlSimulator, intf: "RtlSignal", period: int=CLK_PERIOD):
@@ -23,12 +25,20 @@ class ClockAgent(AgentBase):
         assert isinstance(period, int)
         self.period = period
         self.initWait = 0
-        self.monitor = CallbackLoop(sim, self.intf, self.monitor, self.getEnable)
+        self.nativeDriver = True
+        # the monitor only reads the signal, it is called directly by the simulator
+        self.monitor = CallbackLoop(sim, self.intf, self.monitor, self.getEnable,
+                                    phase=SimCallback.COMB_READ)
 
     def driver(self):
         assert isinstance(self.period, int)
         assert isinstance(self.initWait, int)
         sig = self.intf
+        sim = self.sim
+        if self.nativeDriver and hasattr(sim.rtl_simulator, "add_clock"):
+            sim.add_clock(sig, self.period, 0, sim.now + self.initWait)
+            return
+
         yield WaitWriteOnly()
         sig.write(0)
         yield Timer(self.initWait)
@@ -50,9 +60,11 @@ class ClockAgent(AgentBase):
         return super(ClockAgent, self).getMonitors()
 
     def monitor(self):
+        """
+        Record the value of the signal (called in comb_read phase after each change)
+        """
         assert isinstance(self.period, int)
         assert isinstance(self.initWait, int)
-        yield WaitCombRead()
         v = self.intf.read()
         try:
             v = int(v)
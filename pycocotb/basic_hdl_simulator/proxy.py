@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pyMathBitPrecise.array3t import Array3t
 from pyMathBitPrecise.bits3t import Bits3t
 from pycocotb.basic_hdl_simulator.sim_utils import valueHasChanged
@@ -8,6 +10,17 @@ class BasicRtlSimProxy():
     Signal proxy which manages the access to a memory in simulation
 
     :ivar ~.callbacks: list of sim processes which will be waken up if signal value is updated
+    :ivar ~.rising_callbacks: list of sim processes which will be waken up
+        if signal value is updated to a valid value with bit 0 set
+    :ivar ~.falling_callbacks: list of sim processes which will be waken up
+        if signal value is updated to a valid value with bit 0 cleared
+    :ivar ~.value_callbacks: list of tuples (value, mask, sim process),
+        the process will be waken up if signal value is updated to a value
+        where (signal & mask) == (value & mask) and the masked bits are valid
+    :ivar ~.subscribers: same as callbacks but the items are not removed
+        when triggered (persistent subscriptions, :meth:`~.subscribe`)
+    :ivar ~.rising_subscribers: same as rising_callbacks but persistent
+    :ivar ~.falling_subscribers: same as falling_callbacks but persistent
     :ivar ~.sim: main simulator
     :ivar ~.name: name of property which is this proxy stored in on parent
     :ivar ~._name: signal name which was used in HDL
@@ -19,7 +32,9 @@ class BasicRtlSimProxy():
     :ivar ~.val: actual value of signal
     :ivar ~.val_next: place for metainformations about next update
     """
-    __slots__ = ["callbacks", "sim", "name", "_name", "parent",
+    __slots__ = ["callbacks", "rising_callbacks", "falling_callbacks", "value_callbacks",
+                 "subscribers", "rising_subscribers", "falling_subscribers",
+                 "sim", "name", "_name", "parent",
                  "_dtype", "_origin", "_ag",
                  "def_val", "val", "val_next",
                  "simRisingSensProcs", "simFallingSensProcs", "simSensProcs"]
@@ -27,6 +42,12 @@ class BasicRtlSimProxy():
 
     def __init__(self, sim: "BasicRtlSimulator", parent, name, dtype, def_val):
         self.callbacks = []
+        self.rising_callbacks = []
+        self.falling_callbacks = []
+        self.value_callbacks = []
+        self.subscribers = []
+        self.rising_subscribers = []
+        self.falling_subscribers = []
         self.sim = sim
         self.parent = parent
         self.def_val = def_val
@@ -69,6 +90,43 @@ class BasicRtlSimProxy():
         self.callbacks.append(cb)
         self.sim.signals_checked_for_change.add(cb)
 
+    def wait_rising(self, cb):
+        self.rising_callbacks.append(cb)
+        self.sim.signals_checked_for_change.add(cb)
+
+    def wait_falling(self, cb):
+        self.falling_callbacks.append(cb)
+        self.sim.signals_checked_for_change.add(cb)
+
+    def _get_subscribers(self, edge: Optional[int]):
+        if edge is None:
+            return self.subscribers
+        elif edge == 1:
+            return self.rising_subscribers
+        elif edge == 0:
+            return self.falling_subscribers
+        else:
+            raise ValueError("edge has to be None, 0 (falling) or 1 (rising)", edge)
+
+    def subscribe(self, cb, edge: Optional[int]=None):
+        """
+        Call cb on each change of this signal (only on the rising edge if edge=1,
+        only on the falling edge if edge=0) until :meth:`~.unsubscribe`
+
+        :param cb: function(sim) which returns a simulation process
+            or :class:`pycocotb.triggers.SimCallback`
+        """
+        self._get_subscribers(edge).append(cb)
+
+    def unsubscribe(self, cb, edge: Optional[int]=None):
+        self._get_subscribers(edge).remove(cb)
+
+    def wait_value(self, cb, value: int, mask: Optional[int]=None):
+        if mask is None:
+            mask = self._dtype.all_mask()
+        self.value_callbacks.append((value & mask, mask, cb))
+        self.sim.signals_checked_for_change.add(cb)
+
     def _apply_update(self, valUpdater):
         """
         Method called by simulator to update new value for this object
@@ -97,8 +155,33 @@ class BasicRtlSimProxy():
 
         # run write callbacks we have to create new list to allow
         # registering of new call backs in callbacks
+        if self.subscribers:
+            self.sim.pending_event_list.extend(self.subscribers)
         self.sim.pending_event_list.extend(self.callbacks)
         self.callbacks.clear()
+        if v.vld_mask & 1:
+            if v.val & 1:
+                edge_subscribers = self.rising_subscribers
+                edge_callbacks = self.rising_callbacks
+            else:
+                edge_subscribers = self.falling_subscribers
+                edge_callbacks = self.falling_callbacks
+            if edge_subscribers:
+                self.sim.pending_event_list.extend(edge_subscribers)
+            if edge_callbacks:
+                self.sim.pending_event_list.extend(edge_callbacks)
+                edge_callbacks.clear()
+
+        if self.value_callbacks:
+            to_wait = []
+            pending_event_list = self.sim.pending_event_list
+            for item in self.value_callbacks:
+                value, mask, cb = item
+                if v.vld_mask & mask == mask and v.val & mask == value:
+                    pending_event_list.append(cb)
+                else:
+                    to_wait.append(item)
+            self.value_callbacks = to_wait
 
         if self.simRisingSensProcs:
             if v.val or not v.vld_mask:
@@ -202,6 +202,20 @@ class BasicRtlSimulator():
         else:
             raise AssertionError("Invalid state", self.state)
 
+    def eval_to(self, phase: int) -> int:
+        """
+        Run simulation steps until the specified type of the pause
+        (or the end of the time slot) is reached
+
+        :note: the evaluation stops in the first pause where some process
+            was woken by an event on signal
+        :return: the type of the last pause
+        """
+        while True:
+            ret = self.eval()
+            if self.pending_event_list or ret == phase or ret == self.END_OF_STEP:
+                return ret
+
     def reset_eval(self):
         """
         reset evaluation in COMB_UPDATE_DONE state
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the memory allocated by :class:`pycocotb.hdlSimulator.HdlSimulator`
+in the simulation of the counter from verilatorCntr_test
+
+(python clock driver, reset driver, enable driver and synchronous monitor
+of the value of the counter)
+
+:note: requires Verilator
+"""
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import tracemalloc
+
+from pycocotb.constants import CLK_PERIOD
+from pycocotb.hdlSimulator import HdlSimulator
+from pycocotb.tests.example_agents import get_clk_driver, get_rst_driver, \
+    get_pull_up_driver, get_sync_sig_monitor
+from pycocotb.tests.verilatorCntr_test import VerilatorCntrTC
+from pycocotb.verilator.simulator_gen import get_build_profile
+
+
+def run_workload(rtl_sim, clk_cycles: int):
+    """
+    :return: tuple (peak of the traced memory in bytes,
+                    number of the memory blocks allocated during the simulation
+                    and not released, wall time in seconds)
+    """
+    io = rtl_sim.io
+    sim = HdlSimulator(rtl_sim)
+    data = []
+    procs = [
+        get_clk_driver(sim, io.clk, CLK_PERIOD),
+        get_rst_driver(sim, io.rst, CLK_PERIOD),
+        get_pull_up_driver(sim, io.en, CLK_PERIOD),
+        get_sync_sig_monitor(sim, io.val, io.clk, io.rst, data)
+    ]
+    tracemalloc.start()
+    start_mem, _ = tracemalloc.get_traced_memory()
+    start_snapshot = tracemalloc.take_snapshot()
+    start = perf_counter()
+    sim.run(CLK_PERIOD * clk_cycles, extraProcesses=procs)
+    t = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    end_snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    blocks = sum(s.count_diff for s in end_snapshot.compare_to(start_snapshot, "lineno")
+                 if s.count_diff > 0)
+    return peak - start_mem, blocks, t
+
+
+def main():
+    clk_cycles = 10000
+    tc = VerilatorCntrTC("test_sim_cntr2")
+    print(f"build profile: {get_build_profile().name:s}")
+    print(f"{'cycles':>8s} {'peak B/cycle':>14s} {'leaked blocks':>14s} {'cycles/s':>12s}")
+    with TemporaryDirectory() as build_dir:
+        rtl_sim = tc.cntr_build(build_dir)
+        peak, blocks, t = run_workload(rtl_sim, clk_cycles)
+        print(f"{clk_cycles:8d} {peak / clk_cycles:14.2f} {blocks:14d} {clk_cycles / t:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
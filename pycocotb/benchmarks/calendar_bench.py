@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the calendar queues used by :class:`pycocotb.hdlSimulator.HdlSimulator`
+
+The workload mimics the scheduler: time slots are popped in order and the processes
+in them are rescheduled using lookup of an existing time slot (_schedule_proc).
+Most of the processes are clock drivers which wait for a half-period,
+the rest waits for a random (potentially long) time.
+"""
+from random import Random
+from time import perf_counter
+
+from pycocotb.constants import CLK_PERIOD
+from pycocotb.simCalendar import SimCalendar, SimCalendarTimingWheel, \
+    SimTimeSlot
+
+
+def run_workload(calendar_cls, time_slots: int, clk_cnt: int,
+                 other_proc_cnt: int, seed=0):
+    """
+    :return: tuple (number of processed time slots, wall time in seconds)
+    """
+    rand = Random(seed)
+    cal = calendar_cls()
+    half_period = CLK_PERIOD // 2
+    procs = [half_period for _ in range(clk_cnt)]
+    procs.extend(None for _ in range(other_proc_cnt))
+
+    def schedule(time, proc):
+        ts = cal.get(time, None)
+        if ts is None:
+            ts = SimTimeSlot()
+            cal.push(time, ts)
+        if ts.write_only is None:
+            ts.write_only = []
+        ts.write_only.append(proc)
+
+    for p in procs:
+        schedule(0, p)
+
+    start = perf_counter()
+    for _ in range(time_slots):
+        now, ts = cal.pop()
+        for p in ts.write_only:
+            if p is None:
+                delay = rand.choice((1, half_period, CLK_PERIOD,
+                                     rand.randint(1, 1000 * CLK_PERIOD)))
+            else:
+                delay = p
+            schedule(now + delay, p)
+    return time_slots, perf_counter() - start
+
+
+def main():
+    workloads = [
+        # (name, clk_cnt, other_proc_cnt)
+        ("1 clk", 1, 0),
+        ("1 clk + 4 procs", 1, 4),
+        ("4 clk + 64 procs", 4, 64),
+    ]
+    time_slots = 100000
+    print(f"{'workload':20s} {'calendar':24s} {'slots/s':>12s}")
+    for name, clk_cnt, other_proc_cnt in workloads:
+        for cal_cls in (SimCalendar, SimCalendarTimingWheel):
+            n, t = run_workload(cal_cls, time_slots, clk_cnt, other_proc_cnt)
+            print(f"{name:20s} {cal_cls.__name__:24s} {n / t:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
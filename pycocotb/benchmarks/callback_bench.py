@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the per-event overhead of the monitors subscribed on a signal
+(the clk/o wire from basicRtlSimulator_test, n monitors on o which record the value
+in comb_read phase after each change)
+
+* generator: CallbackLoop with a generator function which yields WaitCombRead
+  and records the value (a generator is created and resumed for each event)
+* SimCallback: CallbackLoop with a normal function and phase=comb_read
+  (the function is called directly by the simulator)
+
+The time of the simulation without monitors is subtracted.
+"""
+from time import perf_counter
+
+from pycocotb.constants import CLK_PERIOD
+from pycocotb.process_utils import CallbackLoop
+from pycocotb.tests.basicRtlSimulator_test import BasicRtlSimulatorTC
+from pycocotb.tests.example_agents import get_clk_driver
+from pycocotb.triggers import WaitCombRead, SimCallback
+
+
+def run(clk_cycles: int, monitors: int, phase) -> float:
+    """
+    :param phase: None for generator monitors, SimCallback phase for the plain function monitors
+    :return: time of the simulation in seconds
+    """
+    rtl_sim, sim = BasicRtlSimulatorTC("test_edge").build_sim()
+    o = rtl_sim.io.o
+    data = []
+
+    if phase is None:
+        def monitor():
+            yield WaitCombRead()
+            data.append(o.read())
+    else:
+        def monitor():
+            data.append(o.read())
+
+    procs = [get_clk_driver(sim, rtl_sim.io.clk, CLK_PERIOD)]
+    for _ in range(monitors):
+        procs.append(CallbackLoop(sim, o, monitor, lambda: True, phase=phase)())
+
+    start = perf_counter()
+    sim.run(CLK_PERIOD * clk_cycles, extraProcesses=procs)
+    t = perf_counter() - start
+    assert len(data) == monitors * clk_cycles * 2, len(data)
+    return t
+
+
+def main():
+    clk_cycles = 10000
+    monitors = 16
+    base = run(clk_cycles, 0, None)
+    events = clk_cycles * 2 * monitors
+    print(f"{'monitor':>12s} {'us/event':>10s}")
+    for name, phase in [("generator", None), ("SimCallback", SimCallback.COMB_READ)]:
+        t = run(clk_cycles, monitors, phase)
+        print(f"{name:>12s} {(t - base) / events * 1e6:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the read/write calls of the signal proxies
+(the wire2/wire64/wire128 designs from wire_test, the 2 and 64 bit signals
+use the fast path for the values which fit to a machine word, 128 bit signals
+use the generic path with _PyLong_FromByteArray/_PyLong_AsByteArray
+and they are also accessed as raw bytes by read_bytes/write_bytes)
+
+:note: requires Verilator
+"""
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from pycocotb.tests.wire_test import VerilatorWireTC
+from pycocotb.verilator.simulator_gen import get_build_profile
+
+
+def measure(fn, n: int) -> float:
+    """
+    :return: number of calls of fn per second
+    """
+    start = perf_counter()
+    for _ in range(n // 10):
+        fn(); fn(); fn(); fn(); fn(); fn(); fn(); fn(); fn(); fn()
+    return n / (perf_counter() - start)
+
+
+def main():
+    n = 1000000
+    tc = VerilatorWireTC("test_wire2")
+    print(f"build profile: {get_build_profile().name:s}")
+    print(f"{'design':>8s} {'reads/s':>12s} {'writes/s':>12s}")
+    for DW in (2, 64, 128):
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = tc.build_sim(build_dir, DW, f"wire{DW:d}")
+        io = rtl_sim.io
+        v = (1 << DW) - 1
+        write = io.inp.write
+
+        rtl_sim.read_only_not_write_only = False
+        writes = measure(lambda: write(v), n)
+
+        rtl_sim.read_only_not_write_only = True
+        reads = measure(io.outp.read, n)
+        print(f"{f'wire{DW:d}':>8s} {reads:12.0f} {writes:12.0f}")
+        if DW > 64:
+            # raw bytes without the conversion to int
+            v = v.to_bytes(DW // 8, "little")
+            write_bytes = io.inp.write_bytes
+            rtl_sim.read_only_not_write_only = False
+            writes = measure(lambda: write_bytes(v), n)
+            rtl_sim.read_only_not_write_only = True
+            reads = measure(io.outp.read_bytes, n)
+            print(f"{'(bytes)':>8s} {reads:12.0f} {writes:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the build time and of the instantiation time of the simulator
+with a large number of accessible signals (generated design with output registers
+r0 ... rN-1, each of them accessible from python)
+
+:note: requires Verilator
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from pycocotb.tests.common import format_accessible_signals
+from pycocotb.verilator.simulator_gen import verilatorCompile, \
+    generatePythonModuleWrapper, loadPythonCExtensionFromFile, get_build_profile
+
+
+def generate_design(file_name: str, top_name: str, signal_cnt: int):
+    with open(file_name, "w") as f:
+        ports = "".join(f",\n    output reg [7:0] r{i:d}" for i in range(signal_cnt))
+        f.write(f"module {top_name:s}(input clk, input [7:0] din{ports:s});\n")
+        for i in range(signal_cnt):
+            f.write(f"    always @(posedge clk) r{i:d} <= din + {i % 256:d};\n")
+        f.write("endmodule\n")
+
+
+def main():
+    signal_cnt = 5000
+    top_name = "SignalTableBench"
+    accessible_signals = [("clk", 0, 0, 1), ("din", 0, 0, 8)] + [
+        (f"r{i:d}", 1, 0, 8) for i in range(signal_cnt)
+    ]
+    accessible_signals = format_accessible_signals(accessible_signals, top_name)
+    with TemporaryDirectory() as build_dir:
+        verilog_file = join(build_dir, top_name + ".v")
+        generate_design(verilog_file, top_name, signal_cnt)
+        verilatorCompile([verilog_file], build_dir)
+        start = perf_counter()
+        module_file_name = generatePythonModuleWrapper(
+            top_name, top_name, build_dir, accessible_signals)
+        build_time = perf_counter() - start
+
+        sim_cls = getattr(loadPythonCExtensionFromFile(module_file_name, top_name), top_name)
+        start = perf_counter()
+        sim_cls()
+        new_time = perf_counter() - start
+
+    print(f"build profile: {get_build_profile().name:s}")
+    print(f"signals: {signal_cnt:d}, build of the simulator module: {build_time:f}s,"
+          f" instantiation: {new_time * 1e3:f}ms")
+
+
+if __name__ == "__main__":
+    main()
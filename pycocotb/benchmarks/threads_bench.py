@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the simulation speed of the Verilator model build with 1/2/4/8 threads
+(generated design with many independent lanes, each of them is a chain
+of multiply-accumulate registers, the clock is driven by the simulator itself
+and the cycles are evaluated by run_cycles)
+
+:note: requires Verilator
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from pycocotb.constants import CLK_PERIOD
+from pycocotb.tests.common import format_accessible_signals
+from pycocotb.verilator.simulator_gen import verilatorCompile, \
+    generatePythonModuleWrapper, loadPythonCExtensionFromFile, get_build_profile
+
+
+def generate_design(file_name: str, top_name: str, lanes: int, depth: int):
+    with open(file_name, "w") as f:
+        ports = "".join(f",\n    output [31:0] dout{i:d}" for i in range(lanes))
+        f.write(f"module {top_name:s}(input clk, input [31:0] din{ports:s});\n")
+        for i in range(lanes):
+            for d in range(depth):
+                f.write(f"    reg [31:0] l{i:d}_{d:d};\n")
+                src = "din" if d == 0 else f"l{i:d}_{d - 1:d}"
+                f.write(f"    always @(posedge clk) l{i:d}_{d:d} <="
+                        f" l{i:d}_{d:d} * 32'd{2 * (i + d) + 3:d} + ({src:s} ^ 32'd{i:d});\n")
+            f.write(f"    assign dout{i:d} = l{i:d}_{depth - 1:d};\n")
+        f.write("endmodule\n")
+
+
+def main():
+    lanes = 64
+    depth = 64
+    clk_cycles = 20000
+    top_name = "ThreadsBench"
+    accessible_signals = format_accessible_signals(
+        [("clk", 0, 0, 1), ("din", 0, 0, 32)], top_name)
+    print(f"build profile: {get_build_profile().name:s}")
+    print(f"{'threads':>8s} {'us/cycle':>10s} {'speedup':>8s}")
+    t1 = None
+    for threads in (1, 2, 4, 8):
+        profile = get_build_profile(threads=threads)
+        unique_name = f"{top_name:s}_t{threads:d}"
+        with TemporaryDirectory() as build_dir:
+            verilog_file = join(build_dir, top_name + ".v")
+            generate_design(verilog_file, top_name, lanes, depth)
+            verilatorCompile([verilog_file], build_dir, profile)
+            module_file_name = generatePythonModuleWrapper(
+                top_name, unique_name, build_dir, accessible_signals, profile=profile)
+            sim_cls = getattr(loadPythonCExtensionFromFile(module_file_name, unique_name),
+                              unique_name)
+            rtl_sim = sim_cls()
+            io = rtl_sim.io
+            rtl_sim.add_clock(io.clk, CLK_PERIOD)
+            io.din.write(1)
+            start = perf_counter()
+            rtl_sim.run_cycles(io.clk, clk_cycles)
+            t = (perf_counter() - start) / clk_cycles
+            rtl_sim.finalize()
+
+        if t1 is None:
+            t1 = t
+        print(f"{threads:8d} {t * 1e6:10.3f} {t1 / t:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the build time of the simulator modules for a suite of small designs
+
+Each design is a counter from verilatorCntr_test with a different module name,
+the Verilator output is the same for all of them (and its objects are reused from the
+object cache), the generated wrapper is different and it has to be compiled for each design.
+With the object cache the wrapper uses the precompiled pycocotb_sim.h.
+
+:note: requires Verilator
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from pycocotb.tests.common import VERILOG_SRCS, format_accessible_signals
+from pycocotb.verilator.parallel_compile import ObjectCache
+from pycocotb.verilator.simulator_gen import verilatorCompile, \
+    generatePythonModuleWrapper, get_build_profile
+
+
+def build_suite(designs: int, obj_cache) -> float:
+    """
+    :return: average build time of the simulator module (without Verilator) in seconds
+    """
+    accessible_signals = format_accessible_signals([
+        ("clk", 0, 0, 1),
+        ("en", 0, 0, 1),
+        ("rst", 0, 0, 1),
+        ("val", 1, 0, 2),
+    ], "Cntr")
+    t = 0.0
+    for i in range(designs):
+        with TemporaryDirectory() as build_dir:
+            verilatorCompile([join(VERILOG_SRCS, "Cntr.v")], build_dir)
+            start = perf_counter()
+            generatePythonModuleWrapper("Cntr", f"Cntr_bench{i:d}", build_dir,
+                                        accessible_signals, obj_cache=obj_cache)
+            t += perf_counter() - start
+    return t / designs
+
+
+def main():
+    designs = 8
+    print(f"build profile: {get_build_profile().name:s}")
+    print(f"{'configuration':>24s} {'s/design':>10s}")
+    t = build_suite(designs, None)
+    print(f"{'without object cache':>24s} {t:10.3f}")
+    with TemporaryDirectory() as cache_dir:
+        obj_cache = ObjectCache(cache_dir)
+        # the first build creates the precompiled header and the objects of Verilator output
+        build_suite(1, obj_cache)
+        t = build_suite(designs, obj_cache)
+        print(f"{'with object cache + pch':>24s} {t:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
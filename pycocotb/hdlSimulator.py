@@ -72,11 +72,14 @@ Pitfalls of delta-step based HDL simulators
 """
 
 from inspect import isgenerator
-from typing import List
+from time import perf_counter
+from typing import List, Optional
 
-from pycocotb.simCalendar import SimTimeSlot, SimCalendar, DONE
+from pycocotb.simCalendar import SimTimeSlot, DONE, SimCalendarTimingWheel
+from pycocotb.simCheckpoint import HdlSimulatorSnapshot, SimCheckpointStats, \
+    save_checkpoint
 from pycocotb.triggers import Event, raise_StopSimulation, \
-    StopSimumulation, Action
+    StopSimumulation, Action, SimCallback
 
 
 # similar to https://github.com/potentialventures/cocotb/blob/master/cocotb/scheduler.py
@@ -87,16 +90,53 @@ class HdlSimulator():
     Simulation processes are usually provided by simulation agents or user.
 
     :ivar ~.now: actual simulation time
-    :ivar ~._events: heap of simulation events and processes
+    :ivar ~._events: calendar queue of simulation events and processes
     :ivar ~.rtl_simulator: circuit simulator used for simulation of circuit itself
+    :ivar ~._next_clock_edge: time of the next edge of clock generated
+        by RTL simulator (None if there is not any)
+    :ivar ~._clocks: list of clock signals generated by RTL simulator
+    :ivar ~._free_time_slots: list of SimTimeSlot instances which were
+        already evaluated and can be reused
+    :ivar ~.native_fast_forward: if True the time slots with just an edge
+        of clock generated by RTL simulator are evaluated by RTL simulator
+        without returning to python (if RTL simulator supports it)
+    :ivar ~.checkpoint_stats: cost of the checkpoints written by :meth:`~.run`
+    :ivar ~._next_checkpoint: time of the next checkpoint (None if checkpoints are disabled)
+    :ivar ~.idle_fast_forward: if True and the state of the circuit does not change
+        during the whole clock cycle while only the clock generated by RTL
+        simulator is running, the time is moved directly to the next time slot
+        with some simulation process (opt-in, ignored for the circuits which call
+        anything else than known pure functions, e.g. $random, $time, file/console IO,
+        DPI imports or a call in $c code, see IDLE_SKIP_SUPPORTED
+        of the Verilator simulator module); the $c code which modifies the state
+        outside of the circuit without any call is not detected, a circuit
+        which depends on it may be skipped incorrectly
     """
 
-    def __init__(self, rtl_simulator):
+    # the limit of cycles evaluated by RTL simulator in single call
+    MAX_CYCLES = (1 << 64) - 1
+    # total simulation time simulated by all instances in this process
+    # (statistic for regression runner)
+    sim_time_total = 0
+
+    def __init__(self, rtl_simulator, calendar_cls=SimCalendarTimingWheel):
+        """
+        :param calendar_cls: class of the calendar queue for time slots
+            (:class:`pycocotb.simCalendar.SimCalendarTimingWheel`
+            or :class:`pycocotb.simCalendar.SimCalendar`)
+        """
         self.rtl_simulator = rtl_simulator
         self.now = 0
-        self._events = SimCalendar()
+        self._events = calendar_cls()
         self._current_time_slot = None  # type: SimTimeSlot
         self._current_event_list = None  # type: List
+        self._next_clock_edge = None  # type: Optional[int]
+        self._clocks = []
+        self._free_time_slots = []  # type: List[SimTimeSlot]
+        self.native_fast_forward = True
+        self.idle_fast_forward = False
+        self.checkpoint_stats = SimCheckpointStats()
+        self._next_checkpoint = None  # type: Optional[int]
 
         schedule = self._events.push
 
@@ -107,6 +147,94 @@ class HdlSimulator():
         #
         self.schedule = schedule
 
+    def add_clock(self, sig, period: int, phase: int=0, init_wait: int=0):
+        """
+        Add clock generator which toggles the signal directly in RTL simulator
+        (without the waking of any simulation process on clock edge)
+
+        :param sig: clock signal
+        :param period: period of the clock
+        :param phase: time shift of the clock edges to earlier time
+        :param init_wait: absolute time until the clock signal is held in 0
+        :note: the clock signal is 0 until init_wait + period // 2 - phase
+            then it toggles each period // 2
+        """
+        assert isinstance(period, int) and period >= 2, period
+        assert isinstance(phase, int) and phase >= 0, phase
+        assert isinstance(init_wait, int) and init_wait >= 0, init_wait
+        self.rtl_simulator.add_clock(sig, period, phase, init_wait)
+        self._clocks.append(sig)
+        self._schedule_next_clock_edge()
+
+    def _schedule_next_clock_edge(self):
+        """
+        Plan the time slot for the next edge of clock generated by RTL simulator
+        (the value itself is updated by RTL simulator in write only phase)
+        """
+        t = self.rtl_simulator.next_clock_edge()
+        self._next_clock_edge = t
+        if self._events.get(t, None) is None:
+            self.schedule(t, self._new_time_slot())
+
+    def _new_time_slot(self) -> SimTimeSlot:
+        """
+        Get an empty SimTimeSlot (reuse the already evaluated one if possible)
+        """
+        free = self._free_time_slots
+        if free:
+            return free.pop()
+        else:
+            return SimTimeSlot()
+
+    def _release_time_slot(self, time_slot: SimTimeSlot):
+        """
+        Put the evaluated time slot to the list of free time slots
+        """
+        time_slot.timeslot_begin = None
+        time_slot.write_only = None
+        time_slot.comb_read = None
+        time_slot.comb_stable = None
+        time_slot.mem_stable = None
+        time_slot.timeslot_end = None
+        self._free_time_slots.append(time_slot)
+
+    def _run_native_cycles(self) -> Optional[int]:
+        """
+        If the next time slot contains only the edge of clock generated
+        by RTL simulator let RTL simulator to evaluate all time slots
+        until the next time slot with some simulation process
+
+        :return: None if the evaluation stopped on the end of a time slot
+            else the type of the pause of RTL simulator in the middle of the time slot
+            (some process was woken by an event on signal and the time slot
+            has to be finished)
+        """
+        rtl_sim = self.rtl_simulator
+        events = self._events
+        t, time_slot = events.peek()
+        next_checkpoint = self._next_checkpoint
+        if t == 0 or t != self._next_clock_edge or not time_slot.is_empty()\
+                or not hasattr(rtl_sim, "run_cycles")\
+                or (next_checkpoint is not None and next_checkpoint <= t):
+            return None
+
+        # the time slot of clock edge will be evaluated by RTL simulator
+        events.pop()
+        self._release_time_slot(time_slot)
+        if len(events):
+            until, _ = events.peek()
+        else:
+            until = None
+        if next_checkpoint is not None and (until is None or next_checkpoint < until):
+            # stop before the time slot where the checkpoint is written
+            until = next_checkpoint
+        rtl_sim.time = t - 1
+        _, ev = rtl_sim.run_cycles(self._clocks[0], self.MAX_CYCLES, until=until,
+                                   skip_idle=self.idle_fast_forward)
+        self.now = rtl_sim.time
+        self._schedule_next_clock_edge()
+        return ev
+
     def _run_process(self, process):
         """
         Execute process and process it's requests
@@ -138,12 +266,30 @@ class HdlSimulator():
             # calendar with urgent priority  but we evaluate
             # it directly because of performance
             for _process in rtl_pending_event_list:
-                if not isgenerator(_process):
+                if isinstance(_process, SimCallback):
+                    self._schedule_callback(_process)
+                    continue
+                elif not isgenerator(_process):
                     _process = _process(self)
 
                 self._run_process(_process)
             rtl_pending_event_list.clear()
 
+    def _schedule_callback(self, cb: SimCallback):
+        """
+        Put the callback to the list of its phase in actual time slot
+        (or to the actual list if the phase is already done)
+        """
+        t = self._current_time_slot
+        phase = cb.phase
+        ev_list = getattr(t, phase)
+        if ev_list is None:
+            ev_list = []
+            setattr(t, phase, ev_list)
+        elif ev_list is DONE:
+            ev_list = self._current_event_list
+        ev_list.append(cb)
+
     def _run_event_list(self, events):
         """
         Run block of events or processes
@@ -151,28 +297,58 @@ class HdlSimulator():
         if events is not None:
             self._current_event_list = events
             for ev in events:
-                # process is Python generator or Event
+                # process is Python generator, Event or SimCallback
                 if isinstance(ev, Event):
                     for p in ev:
                         self._run_process(p)
+                elif isinstance(ev, SimCallback):
+                    # plain function, no generator to resume
+                    ev.fn(self)
                 else:
                     self._run_process(ev)
 
         self._current_event_list = None
 
-    def run(self, until: int, extraProcesses=[]) -> None:
+    def _save_checkpoint(self, checkpoint_dir: str):
+        """
+        Write the state of the RTL simulator and actual time to checkpoint_dir
+        """
+        stats = self.checkpoint_stats
+        start = perf_counter()
+        snapshot = HdlSimulatorSnapshot(self.now, self.rtl_simulator.snapshot())
+        stats.time += perf_counter() - start
+        save_checkpoint(checkpoint_dir, snapshot, stats)
+
+    def run(self, until: int, extraProcesses=[],
+            checkpoint_every: Optional[int]=None,
+            checkpoint_dir: Optional[str]=None) -> None:
         """
         Run simulation for a specified time
 
+        :param checkpoint_every: if specified the checkpoint of the simulation is written
+            to checkpoint_dir at the end of the first time slot after each checkpoint_every
+            of simulation time (:mod:`pycocotb.simCheckpoint`)
+        :param checkpoint_dir: directory for checkpoints
         :note: Can be used to run simulation again after it ends from time when it ends.
         :note: Simulator restart is performed by new instantiation of the simulator.
+        :note: The cost of the checkpoints is accumulated in :attr:`~.checkpoint_stats`.
+        :raise NotImplementedError: if checkpoint_every is specified and the RTL simulator
+            does not support snapshots (e.g. :class:`pycocotb.basic_hdl_simulator.rtlSimulator.BasicRtlSimulator`)
         """
+        if checkpoint_every is not None:
+            assert checkpoint_every > 0, checkpoint_every
+            assert checkpoint_dir is not None
 
         assert until >= self.now, (until, self.now)
         if until == self.now:
             return
+        if checkpoint_every is not None and not hasattr(self.rtl_simulator, "snapshot"):
+            # fail before any work is done, not on the first checkpoint
+            raise NotImplementedError(
+                "Checkpoints require the RTL simulator with snapshot()/restore()",
+                self.rtl_simulator)
 
-        now = self.now
+        now = start = self.now
         time_slot = SimTimeSlot()
         time_slot.write_only = []
         for proc in extraProcesses:
@@ -190,25 +366,53 @@ class HdlSimulator():
         _run_event_list = self._run_event_list
         END = rtl_sim.END_OF_STEP
         try:
+            # reset in finally, the next run does not inherit the checkpoints of this one
+            if checkpoint_every is not None:
+                self._next_checkpoint = self.now + checkpoint_every
             # for all events
             while True:
-                now, time_slot = next_time_slot()
-                self._current_time_slot = time_slot
-                assert now >= self.now, (now, time_slot)
-                rtl_sim.time = self.now = now
-
-                # run preinitialization of sim. environment
-                _run_event_list(time_slot.timeslot_begin)
-                time_slot.timeslot_begin = DONE
+                if self._next_clock_edge is not None and self.native_fast_forward:
+                    s = self._run_native_cycles()
+                else:
+                    s = None
+
+                if s is None:
+                    now, time_slot = next_time_slot()
+                    self._current_time_slot = time_slot
+                    assert now >= self.now, (now, time_slot)
+                    rtl_sim.time = self.now = now
+                    if now == self._next_clock_edge:
+                        self._schedule_next_clock_edge()
+
+                    # run preinitialization of sim. environment
+                    _run_event_list(time_slot.timeslot_begin)
+                    time_slot.timeslot_begin = DONE
+                else:
+                    # RTL simulator stopped in the middle of the time slot
+                    # because some process was woken, finish this time slot
+                    time_slot = self._new_time_slot()
+                    time_slot.timeslot_begin = DONE
+                    self._current_time_slot = time_slot
 
                 # run resolution of combinational lopps
-                first_run = True
+                first_run = s is None or s == rtl_sim.COMB_UPDATE_DONE
                 while first_run or time_slot.write_only:
                     _run_event_list(time_slot.write_only)
                     time_slot.write_only = None
-                    s = rtl_sim.eval()
+                    if s is None:
+                        if time_slot.comb_read is None and time_slot.comb_stable is None:
+                            # nothing waits on the phases before the end of the time slot,
+                            # evaluate them all at once
+                            s = rtl_sim.eval_to(END)
+                            if s != rtl_sim.COMB_UPDATE_DONE:
+                                # RTL simulator got past the comb. phase,
+                                # continue in the mem_stable phase
+                                break
+                        else:
+                            s = rtl_sim.eval()
 
                     assert s == rtl_sim.COMB_UPDATE_DONE, (self.now, s)
+                    s = None
                     if time_slot.comb_read is None:
                         self._current_event_list = time_slot.comb_read = []
                     else:
@@ -241,7 +445,12 @@ class HdlSimulator():
                 time_slot.comb_stable = DONE
 
                 while True:
-                    ret = rtl_sim.eval()
+                    if s is None:
+                        ret = rtl_sim.eval_to(END)
+                    else:
+                        # the pause where RTL simulator stopped
+                        ret = s
+                        s = None
                     if rtl_sim.pending_event_list:
                         if time_slot.mem_stable is None:
                             self._current_event_list = time_slot.mem_stable = []
@@ -256,14 +465,60 @@ class HdlSimulator():
                 _run_event_list(time_slot.timeslot_end)
                 time_slot.timeslot_end = DONE
                 rtl_sim.set_write_only()
+                self._current_time_slot = None
+                self._release_time_slot(time_slot)
+
+                if checkpoint_every is not None and self.now >= self._next_checkpoint:
+                    self._save_checkpoint(checkpoint_dir)
+                    self._next_checkpoint = self.now + checkpoint_every
 
         except StopSimumulation:
             pass
         finally:
+            self._next_checkpoint = None
+            HdlSimulator.sim_time_total += self.now - start
             rtl_sim.finalize()
         # to allow tesbenches to peek in to DUT after sim ended
         rtl_sim.read_only_not_write_only = True
 
+    def snapshot(self) -> HdlSimulatorSnapshot:
+        """
+        Save the state of the simulation (actual time and state of RTL simulator)
+        so the simulation can be rewound to this state later by :meth:`~.restore`
+
+        :note: The python simulation processes can not be copied, because of this
+            the snapshot can be taken only between calls of :meth:`~.run`
+            when there is not any simulation process planned
+            (clocks added by :meth:`~.add_clock` are allowed).
+        """
+        events = self._events
+        planned = len(events)
+        if planned == 1:
+            t, time_slot = events.peek()
+            if t == self._next_clock_edge and time_slot.is_empty():
+                planned = 0
+        if planned:
+            raise AssertionError(
+                "Snapshot can not be taken while some simulation process is planned")
+        return HdlSimulatorSnapshot(self.now, self.rtl_simulator.snapshot())
+
+    def restore(self, snapshot: HdlSimulatorSnapshot):
+        """
+        Rewind the simulation to the state saved by :meth:`~.snapshot`
+
+        :note: all planned simulation processes and the processes waiting
+            on events are dropped
+        """
+        events = self._events
+        while len(events):
+            _, time_slot = events.pop()
+            self._release_time_slot(time_slot)
+        self.rtl_simulator.restore(snapshot.rtl_state)
+        self.now = snapshot.now
+        self._next_clock_edge = None
+        if self._clocks:
+            self._schedule_next_clock_edge()
+
     def _schedule_proc_now(self, ev):
         assert isinstance(ev, (Action, Event)) or isgenerator(ev), ev
         self._current_event_list.append(ev)
@@ -275,7 +530,7 @@ class HdlSimulator():
         else:
             ts = self._events.get(time, None)
             if ts is None:
-                ts = SimTimeSlot()
+                ts = self._new_time_slot()
                 self.schedule(time, ts)
             if ts.write_only is None:
                 ts.write_only = []
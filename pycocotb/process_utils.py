@@ -1,18 +1,26 @@
 from inspect import isgeneratorfunction
+from typing import Optional
 
 from pycocotb.hdlSimulator import HdlSimulator
-from pycocotb.triggers import Edge, WaitCombRead
+from pycocotb.triggers import WaitCombRead, SimCallback
 
 
 class CallbackLoop(object):
     """
     Simple utility: process which only register other process/function
     as on change callback for specified signal as soon as it is executed.
+
+    :cvar EDGE: None for any change, 1 for rising edge, 0 for falling edge
     """
+    EDGE = None
 
-    def __init__(self, sim: HdlSimulator, sig: "RtlSignal", fn, shouldBeEnabledFn):
+    def __init__(self, sim: HdlSimulator, sig: "RtlSignal", fn, shouldBeEnabledFn,
+                 phase: Optional[str]=None):
         """
         :param sig: signal on which write callback should be used
+        :param phase: if specified and fn is a normal function the fn is called
+            directly by the simulator in this phase of the time slot
+            (:class:`pycocotb.triggers.SimCallback`, no process is created for the event)
         :attention: if condFn is None callback function is always executed
 
         :ivra fn: function/generator which is callback which should be executed
@@ -22,6 +30,8 @@ class CallbackLoop(object):
             callback loop should be enabled
         :ivar ~.pre_init: if True the 'fn' is executed once imidiately for an intialization
             before any callback is triggered
+        :ivar ~._running: flag which tells that the 'fn' is being executed
+            (the loop waits for the next event only after the fn ends)
         """
         assert not isinstance(fn, CallbackLoop)
         self.sim = sim
@@ -32,6 +42,8 @@ class CallbackLoop(object):
         self._enable = True
         self.sig = sig
         self.pre_init = False
+        self._running = False
+        self.phase = phase
 
     def setEnable(self, en):
         self._enable = en
@@ -39,57 +51,66 @@ class CallbackLoop(object):
     def __call__(self):
         """
         Process for injecting of this callback loop into simulator
+
+        :note: the callback is registered as a persistent subscription on the signal
+            (it is not registered again on each event)
         """
         if self.pre_init:
-            yield from self.fn()
+            if self.isGenerator:
+                yield from self.fn()
+            else:
+                self.fn()
+
+        if self.phase is None or self.isGenerator:
+            cb = self._on_event
+        else:
+            cb = SimCallback(self._call_fn, self.phase)
+        self.sig.subscribe(cb, self.EDGE)
+        return
+        yield
+
+    def _call_fn(self, sim: HdlSimulator):
+        """
+        Callback called directly by the simulator for each event on the signal
+        (if the phase is specified and the fn is a normal function)
+        """
+        if self._enable and self.shouldBeEnabledFn():
+            self.fn()
 
-        while True:
-            yield Edge(self.sig)
-            if self._enable and self.shouldBeEnabledFn():
-                if self.isGenerator:
-                    yield from self.fn()
-                else:
-                    self.fn()
+    def _on_event(self, sim: HdlSimulator):
+        """
+        Process created by the RTL simulator for each event on the signal
+        """
+        if self._running or not (self._enable and self.shouldBeEnabledFn()):
+            # the events during the execution of the previous call are ignored
+            return
+        self._running = True
+        try:
+            if self.EDGE is not None:
+                yield WaitCombRead()
+            if self.isGenerator:
+                yield from self.fn()
+            else:
+                self.fn()
+        finally:
+            self._running = False
 
 
 class OnRisingCallbackLoop(CallbackLoop):
     """
     Simple utility: process which only register other process/function
     as on rising callback for specified signal as soon as it is executed.
-    """
-
-    def __call__(self):
-        if self.pre_init:
-            yield from self.fn()
 
-        while True:
-            yield Edge(self.sig)
-            if self._enable and self.shouldBeEnabledFn():
-                yield WaitCombRead()
-                if int(self.sig.read()) == 1:
-                    if self.isGenerator:
-                        yield from self.fn()
-                    else:
-                        self.fn()
+    :note: the edge is resolved by RTL simulator, the process is woken only on rising edge
+    """
+    EDGE = 1
 
 
 class OnFallingCallbackLoop(CallbackLoop):
     """
     Simple utility: process which only register other process/function
     as on falling callback for specified signal as soon as it is executed.
-    """
-
-    def __call__(self):
-        if self.pre_init:
-            yield from self.fn()
-
-        while True:
-            yield Edge(self.sig)
-            if self._enable and self.shouldBeEnabledFn():
-                yield WaitCombRead()
-                if int(self.sig.read()) == 0:
-                    if self.isGenerator:
-                        yield from self.fn()
-                    else:
-                        self.fn()
 
+    :note: the edge is resolved by RTL simulator, the process is woken only on falling edge
+    """
+    EDGE = 0
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel runner of unittest test cases (simulations)
+
+Test cases are distributed between the processes of :class:`multiprocessing.Pool`
+one by one, the longest test cases (according to timing history from previous runs)
+are executed first. The worker process is reused for many test cases,
+which allows to reuse the simulator modules loaded in the worker
+(:func:`pycocotb.verilator.sim_module_reuse.enable_sim_module_reuse`).
+
+Usage: python -m pycocotb.regressionRunner -j 8 --history timing.json [test names]
+"""
+from argparse import ArgumentParser
+import json
+from multiprocessing import Pool
+import os
+import sys
+from time import perf_counter
+import traceback
+from typing import List, Dict, Optional, Callable
+from unittest import TestLoader, TestResult, TestSuite
+
+from pycocotb.hdlSimulator import HdlSimulator
+from pycocotb.verilator.sim_module_reuse import enable_sim_module_reuse
+
+
+class RegressionTestResult():
+    """
+    Result of single test case
+
+    :ivar ~.test_id: name of the test case (module.class.method)
+    :ivar ~.status: "ok", "fail", "error" or "skip"
+    :ivar ~.wall_time: time spent by the test (in seconds)
+    :ivar ~.sim_time: simulation time simulated by the test
+    :ivar ~.msg: traceback of the failure or reason of the skip
+    """
+    __slots__ = ["test_id", "status", "wall_time", "sim_time", "msg"]
+
+    def __init__(self, test_id: str, status: str, wall_time: float,
+                 sim_time: int, msg: Optional[str]):
+        self.test_id = test_id
+        self.status = status
+        self.wall_time = wall_time
+        self.sim_time = sim_time
+        self.msg = msg
+
+    def sim_to_wall_time_ratio(self) -> float:
+        if self.wall_time == 0:
+            return 0.0
+        return self.sim_time / self.wall_time
+
+    def __repr__(self):
+        return (f"<{self.__class__.__name__:s} {self.test_id:s} {self.status:s}"
+                f" {self.wall_time:f}s sim_time:{self.sim_time:d}>")
+
+
+def collect_test_ids(suite: TestSuite) -> List[str]:
+    """
+    :return: list of names of all test cases in (potentially nested) test suite
+    """
+    ids = []
+    for t in suite:
+        if isinstance(t, TestSuite):
+            ids.extend(collect_test_ids(t))
+        else:
+            ids.append(t.id())
+    return ids
+
+
+def load_timing_history(file_name: Optional[str]) -> Dict[str, float]:
+    """
+    :return: dictionary test_id: wall time of the test from previous run
+    """
+    if file_name is None or not os.path.isfile(file_name):
+        return {}
+    with open(file_name) as f:
+        return json.load(f)
+
+
+def save_timing_history(file_name: str, results: List[RegressionTestResult]):
+    """
+    Update the timing history with the wall times of the tests from results
+    """
+    history = load_timing_history(file_name)
+    for r in results:
+        history[r.test_id] = r.wall_time
+
+    tmp_file_name = file_name + ".tmp"
+    with open(tmp_file_name, "w") as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+    os.replace(tmp_file_name, file_name)
+
+
+def sort_longest_first(test_ids: List[str], history: Dict[str, float]) -> List[str]:
+    """
+    Sort tests by the wall time from history (the longest first),
+    the tests without history are executed first as they may be the longest
+    """
+    inf = float("inf")
+    return sorted(test_ids, key=lambda t: history.get(t, inf), reverse=True)
+
+
+def _worker_init(worker_init: Optional[Callable[[], None]]):
+    if worker_init is not None:
+        worker_init()
+
+
+def run_test(test_id: str) -> RegressionTestResult:
+    """
+    Run single test case in this process
+    """
+    try:
+        test = TestLoader().loadTestsFromName(test_id)
+    except Exception:
+        return RegressionTestResult(test_id, "error", 0.0, 0, traceback.format_exc())
+
+    result = TestResult()
+    sim_time = HdlSimulator.sim_time_total
+    start = perf_counter()
+    test.run(result)
+    wall_time = perf_counter() - start
+    sim_time = HdlSimulator.sim_time_total - sim_time
+
+    if result.errors:
+        status = "error"
+        msg = result.errors[0][1]
+    elif result.failures:
+        status = "fail"
+        msg = result.failures[0][1]
+    elif result.skipped:
+        status = "skip"
+        msg = result.skipped[0][1]
+    else:
+        status = "ok"
+        msg = None
+
+    return RegressionTestResult(test_id, status, wall_time, sim_time, msg)
+
+
+def run_regression(test_ids: List[str], jobs: Optional[int]=None,
+                   history_file: Optional[str]=None,
+                   worker_init: Optional[Callable[[], None]]=None,
+                   on_result: Optional[Callable[[RegressionTestResult], None]]=None
+                   ) -> List[RegressionTestResult]:
+    """
+    Run test cases in parallel
+
+    :param test_ids: names of the test cases (module.class.method)
+    :param jobs: number of worker processes (default number of CPUs)
+    :param history_file: json file with wall times of the tests from previous runs
+        (used for scheduling, updated after the run)
+    :param worker_init: function which is called once in each worker
+        (has to be picklable)
+    :param on_result: function called for each result as soon as test finishes
+    :return: list of results in order of the finish of the tests
+    """
+    history = load_timing_history(history_file)
+    test_ids = sort_longest_first(test_ids, history)
+
+    results = []
+    with Pool(jobs, initializer=_worker_init, initargs=(worker_init,)) as pool:
+        # chunksize=1 so the longest tests are really executed first
+        for r in pool.imap_unordered(run_test, test_ids, chunksize=1):
+            results.append(r)
+            if on_result is not None:
+                on_result(r)
+
+    if history_file is not None:
+        save_timing_history(history_file, results)
+
+    return results
+
+
+def print_result(r: RegressionTestResult, file=sys.stdout):
+    print(f"{r.status:5s} {r.wall_time:9.3f}s {r.sim_to_wall_time_ratio():14.1f} {r.test_id:s}",
+          file=file)
+    if r.status in ("fail", "error"):
+        print(r.msg, file=file)
+
+
+def main():
+    parser = ArgumentParser(description="Parallel runner of unittest test cases")
+    parser.add_argument("tests", nargs="*", default=["pycocotb.tests.all.suite"],
+                        help="names of test suites, test classes or test cases")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of worker processes")
+    parser.add_argument("--history", default=None,
+                        help="json file with the timing of the tests from previous runs")
+    args = parser.parse_args()
+
+    loader = TestLoader()
+    test_ids = []
+    for name in args.tests:
+        test_ids.extend(collect_test_ids(loader.loadTestsFromName(name)))
+
+    print(f"{'':5s} {'wall time':>10s} {'sim/wall time':>14s} test")
+    start = perf_counter()
+    results = run_regression(test_ids, args.jobs, args.history,
+                             worker_init=enable_sim_module_reuse,
+                             on_result=print_result)
+    wall_time = perf_counter() - start
+
+    failed = [r for r in results if r.status in ("fail", "error")]
+    test_time = sum(r.wall_time for r in results)
+    print(f"Ran {len(results):d} tests in {wall_time:f}s"
+          f" (sum of test times {test_time:f}s), failed: {len(failed):d}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
+from bisect import insort
+from heapq import heappush, heappop
 from sortedcontainers.sorteddict import SortedDict
 from typing import Tuple
 
+from pycocotb.constants import CLK_PERIOD
+
 
 class DONE:
     pass
@@ -31,6 +35,14 @@ class SimTimeSlot():
         self.mem_stable = None
         self.timeslot_end = None
 
+    def is_empty(self):
+        """
+        :return: True if there is not any process planned in this time slot
+        """
+        return self.timeslot_begin is None and self.write_only is None\
+            and self.comb_read is None and self.comb_stable is None\
+            and self.mem_stable is None and self.timeslot_end is None
+
     def get_state_name(self):
         if self.timeslot_begin is not DONE:
             return "timeslot_begin"
@@ -62,3 +74,137 @@ class SimCalendar(SortedDict):
 
     def pop(self) -> Tuple[int, object]:
         return super(SimCalendar, self).popitem(0)
+
+    def peek(self) -> Tuple[int, object]:
+        return super(SimCalendar, self).peekitem(0)
+
+
+class SimCalendarTimingWheel():
+    """
+    Priority queue where key is time and priority,
+    specialized for the access pattern of the simulator
+    (most of the time slots are a clock half-period ahead of the actual time)
+
+    * time slots in near future are stored in a timing wheel
+      (circular buffer of buckets, each bucket covers bucket_width of time)
+    * time slots behind the horizon of the wheel are stored in a heap
+      and moved to the wheel once the wheel reaches them
+    * existing time slot can be found by time in O(1) (dict)
+
+    :ivar ~._slots: dictionary time -> time slot
+    :ivar ~._bucket_width: time covered by a single bucket
+    :ivar ~._bucket_cnt: number of buckets in the wheel
+    :ivar ~._wheel: list of buckets, bucket is a sorted list of times
+    :ivar ~._cursor: index of the bucket which starts at _cursor_time
+    :ivar ~._cursor_time: time where the bucket on _cursor index starts
+    :ivar ~._near_cnt: number of times stored in the wheel
+    :ivar ~._far: heap of times which are behind the horizon of the wheel
+    """
+    __slots__ = ["_slots", "_bucket_width", "_bucket_cnt", "_wheel",
+                 "_cursor", "_cursor_time", "_near_cnt", "_far"]
+
+    def __init__(self, bucket_width: int=CLK_PERIOD // 2, bucket_cnt: int=256):
+        assert bucket_width > 0, bucket_width
+        assert bucket_cnt > 0, bucket_cnt
+        self._slots = {}
+        self._bucket_width = bucket_width
+        self._bucket_cnt = bucket_cnt
+        self._wheel = [[] for _ in range(bucket_cnt)]
+        self._cursor = 0
+        self._cursor_time = 0
+        self._near_cnt = 0
+        self._far = []
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, time: int):
+        return time in self._slots
+
+    def get(self, time: int, default=None) -> SimTimeSlot:
+        return self._slots.get(time, default)
+
+    def _set_cursor(self, time: int):
+        """
+        Move the begin of the (empty) wheel to the bucket with specified time
+        """
+        assert self._near_cnt == 0
+        self._cursor_time = time - time % self._bucket_width
+
+    def _insert(self, time: int):
+        d = (time - self._cursor_time) // self._bucket_width
+        assert d >= 0, ("Can not schedule to the past", time, self._cursor_time)
+        if d < self._bucket_cnt:
+            b = self._wheel[(self._cursor + d) % self._bucket_cnt]
+            if not b or b[-1] < time:
+                b.append(time)
+            else:
+                insort(b, time)
+            self._near_cnt += 1
+        else:
+            heappush(self._far, time)
+
+    def _move_far_to_wheel(self):
+        """
+        Move the times which are before the horizon of the wheel from the heap
+        """
+        far = self._far
+        horizon = self._cursor_time + self._bucket_width * self._bucket_cnt
+        while far and far[0] < horizon:
+            self._insert(heappop(far))
+
+    def push(self, time: int, value: SimTimeSlot):
+        assert isinstance(time, int)
+        slots = self._slots
+        if time in slots:
+            slots[time] = value
+            return
+
+        slots[time] = value
+        if time < self._cursor_time and not self._near_cnt and not self._far:
+            # the calendar is empty and the simulation was rewound to the past
+            # (HdlSimulator.restore), move the wheel back
+            self._set_cursor(time)
+        self._insert(time)
+
+    def pop(self) -> Tuple[int, object]:
+        if not self._near_cnt:
+            if not self._far:
+                raise KeyError("pop from an empty calendar")
+            self._set_cursor(self._far[0])
+            self._move_far_to_wheel()
+
+        wheel = self._wheel
+        i = self._cursor
+        b = wheel[i]
+        while not b:
+            # move to next bucket, the bucket behind the cursor
+            # is now the last bucket of the wheel
+            i = (i + 1) % self._bucket_cnt
+            self._cursor = i
+            self._cursor_time += self._bucket_width
+            if self._far:
+                self._move_far_to_wheel()
+            b = wheel[i]
+
+        time = b.pop(0)
+        self._near_cnt -= 1
+        return time, self._slots.pop(time)
+
+    def peek(self) -> Tuple[int, object]:
+        """
+        :return: first item without removing it
+        :note: the cursor is not moved as the time slots before the peeked one
+            can still be scheduled
+        """
+        if self._near_cnt:
+            wheel = self._wheel
+            i = self._cursor
+            while not wheel[i]:
+                i = (i + 1) % self._bucket_cnt
+            time = wheel[i][0]
+        elif self._far:
+            time = self._far[0]
+        else:
+            raise KeyError("peek into an empty calendar")
+        return time, self._slots[time]
@@ -0,0 +1,152 @@
+"""
+Checkpoints of the simulation stored on disk
+
+Checkpoint contains the simulation time and the state of the RTL simulator
+(Verilator model serialized by :meth:`snapshot` of the simulator).
+The python simulation processes are not part of the checkpoint (the python generators
+can not be saved), the testbench has to create them again after the simulation
+is resumed from the checkpoint.
+
+Resume of the simulation:
+
+.. code-block:: python
+
+    rtl_sim = sim_cls()  # freshly loaded module from loadPythonCExtensionFromFile
+    sim = HdlSimulator(rtl_sim)
+    sim.add_clock(rtl_sim.io.clk, CLK_PERIOD)
+    checkpoint = find_last_checkpoint(checkpoint_dir)
+    if checkpoint is not None:
+        sim.restore(load_checkpoint(checkpoint))
+    sim.run(until - sim.now, extraProcesses=...)
+"""
+import os
+import pickle
+from time import perf_counter
+from typing import Optional, List
+
+CHECKPOINT_FORMAT_VERSION = 1
+CHECKPOINT_FILE_PREFIX = "checkpoint_"
+CHECKPOINT_FILE_SUFFIX = ".pkl"
+# number of the newest checkpoints which are kept in checkpoint_dir
+CHECKPOINT_KEEP = 2
+
+
+class HdlSimulatorSnapshot():
+    """
+    Saved state of :class:`pycocotb.hdlSimulator.HdlSimulator` (created by :meth:`HdlSimulator.snapshot`)
+
+    :ivar ~.now: simulation time of the snapshot
+    :ivar ~.rtl_state: state of the RTL simulator
+    """
+    __slots__ = ["now", "rtl_state"]
+
+    def __init__(self, now: int, rtl_state):
+        self.now = now
+        self.rtl_state = rtl_state
+
+
+class SimCheckpointStats():
+    """
+    Cost of the checkpoints of the simulation
+
+    :ivar ~.cnt: number of written checkpoints
+    :ivar ~.time: total time spent by writing of the checkpoints (in seconds)
+    :ivar ~.bytes: total size of the written checkpoints
+    """
+    __slots__ = ["cnt", "time", "bytes"]
+
+    def __init__(self):
+        self.cnt = 0
+        self.time = 0.0
+        self.bytes = 0
+
+    def __repr__(self):
+        if self.cnt:
+            avg_time = self.time / self.cnt
+            avg_bytes = self.bytes // self.cnt
+        else:
+            avg_time = 0.0
+            avg_bytes = 0
+        return (f"<{self.__class__.__name__:s} cnt:{self.cnt:d}"
+                f" time:{self.time:f}s (avg {avg_time:f}s)"
+                f" bytes:{self.bytes:d} (avg {avg_bytes:d})>")
+
+
+def get_checkpoint_file_name(checkpoint_dir: str, now: int) -> str:
+    return os.path.join(
+        checkpoint_dir,
+        f"{CHECKPOINT_FILE_PREFIX:s}{now:020d}{CHECKPOINT_FILE_SUFFIX:s}")
+
+
+def list_checkpoints(checkpoint_dir: str) -> List[str]:
+    """
+    :return: list of checkpoint files in checkpoint_dir sorted by simulation time
+    """
+    if not os.path.isdir(checkpoint_dir):
+        return []
+    files = [f for f in os.listdir(checkpoint_dir)
+             if f.startswith(CHECKPOINT_FILE_PREFIX)
+             and f.endswith(CHECKPOINT_FILE_SUFFIX)]
+    files.sort()
+    return [os.path.join(checkpoint_dir, f) for f in files]
+
+
+def find_last_checkpoint(checkpoint_dir: str) -> Optional[str]:
+    """
+    :return: file name of the checkpoint with the latest simulation time
+        or None if there is not any checkpoint
+    """
+    checkpoints = list_checkpoints(checkpoint_dir)
+    if checkpoints:
+        return checkpoints[-1]
+    else:
+        return None
+
+
+def save_checkpoint(checkpoint_dir: str, snapshot: HdlSimulatorSnapshot,
+                    stats: Optional[SimCheckpointStats]=None) -> str:
+    """
+    Write the checkpoint to checkpoint_dir (the checkpoint file is written
+    to temporary file first and then renamed, the checkpoint file is always complete)
+    and remove the old checkpoints (only CHECKPOINT_KEEP newest are kept)
+
+    :return: file name of the checkpoint
+    """
+    start = perf_counter()
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    file_name = get_checkpoint_file_name(checkpoint_dir, snapshot.now)
+    tmp_file_name = file_name + ".tmp"
+    data = pickle.dumps({
+        "version": CHECKPOINT_FORMAT_VERSION,
+        "now": snapshot.now,
+        "rtl_state": snapshot.rtl_state,
+    })
+    with open(tmp_file_name, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file_name, file_name)
+
+    for old in list_checkpoints(checkpoint_dir)[:-CHECKPOINT_KEEP]:
+        os.remove(old)
+
+    if stats is not None:
+        stats.cnt += 1
+        stats.time += perf_counter() - start
+        stats.bytes += len(data)
+
+    return file_name
+
+
+def load_checkpoint(file_name: str) -> HdlSimulatorSnapshot:
+    """
+    Load the checkpoint written by :func:`~.save_checkpoint`
+
+    :return: snapshot which can be used in :meth:`HdlSimulator.restore`
+    """
+    with open(file_name, "rb") as f:
+        d = pickle.load(f)
+    v = d["version"]
+    if v != CHECKPOINT_FORMAT_VERSION:
+        raise ValueError("Unsupported version of checkpoint", file_name, v)
+    return HdlSimulatorSnapshot(d["now"], d["rtl_state"])
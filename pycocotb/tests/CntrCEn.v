@@ -0,0 +1,13 @@
+module CntrCEn(input clk,
+        output reg [15:0] val
+    );
+
+    initial val = 16'h0000;
+    always @(posedge clk) begin: assig_process_val
+        // the counter is enabled by the c++ code inserted by $c,
+        // the state of the rand() is not a part of the model
+        if(($c32("rand()") & 3) == 0) begin
+            val <= val + 16'h0001;
+        end
+    end
+endmodule
@@ -0,0 +1,19 @@
+
+module CntrDisplay(input clk,
+        input rst,
+        output reg [7:0] val
+    );
+
+    reg [8 * 16 - 1:0] msg;
+    initial val = 8'h00;
+    always @(posedge clk) begin: assig_process_val
+        if(rst == 1'b1) begin
+            val <= 8'h00;
+        end else begin
+            val <= val + 8'h01;
+        end
+        // uses the buffers of the Verilator runtime
+        $sformat(msg, "val=%d", val);
+        $display("%s", msg);
+    end
+endmodule
@@ -0,0 +1,13 @@
+module CntrRandomEn(input clk,
+        output reg [15:0] val
+    );
+
+    initial val = 16'h0000;
+    always @(posedge clk) begin: assig_process_val
+        // the state of the model does not change in the cycles where
+        // the counter is not enabled, but the state of $random does
+        if(($random & 3) == 0) begin
+            val <= val + 16'h0001;
+        end
+    end
+endmodule
@@ -8,6 +8,13 @@ from pycocotb.tests.verilatorHierarchy_test import VerilatorHierarchyTC
 from pycocotb.tests.wire_test import VerilatorWireTC
 from pycocotb.tests.verilatorHandshakedWire_test import VerilatorHandshakedWireTC
 from pycocotb.tests.i2c_test import I2cAgent_TC
+from pycocotb.tests.simCalendar_test import SimCalendarTC
+from pycocotb.tests.simCheckpoint_test import SimCheckpointTC
+from pycocotb.tests.regressionRunner_test import RegressionRunnerTC
+from pycocotb.tests.buildCache_test import VerilatorBuildCacheTC
+from pycocotb.tests.parallelCompile_test import ParallelCompileTC
+from pycocotb.tests.simulatorGen_test import SimulatorGenTC
+from pycocotb.tests.basicRtlSimulator_test import BasicRtlSimulatorTC
 
 
 def testSuiteFromTCs(*tcs):
@@ -19,6 +26,13 @@ def testSuiteFromTCs(*tcs):
 
 suite = testSuiteFromTCs(
     # basic tests
+    SimCalendarTC,
+    SimCheckpointTC,
+    RegressionRunnerTC,
+    VerilatorBuildCacheTC,
+    ParallelCompileTC,
+    SimulatorGenTC,
+    BasicRtlSimulatorTC,
     VerilatorCntrTC,
     VerilatorWireTC,
     VerilatorHierarchyTC,
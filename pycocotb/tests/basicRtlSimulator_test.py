@@ -0,0 +1,236 @@
+import unittest
+
+from pyMathBitPrecise.bits3t import Bits3t
+from pycocotb.agents.clk import ClockAgent
+from pycocotb.basic_hdl_simulator.model import BasicRtlSimModel
+from pycocotb.basic_hdl_simulator.model_utils import sensitivity
+from pycocotb.basic_hdl_simulator.proxy import BasicRtlSimProxy
+from pycocotb.basic_hdl_simulator.rtlSimulator import BasicRtlSimulator
+from pycocotb.constants import CLK_PERIOD
+from pycocotb.hdlSimulator import HdlSimulator
+from pycocotb.process_utils import OnRisingCallbackLoop, OnFallingCallbackLoop
+from pycocotb.tests.example_agents import get_clk_driver
+from pycocotb.triggers import Edge, RisingEdge, FallingEdge, WaitCombRead, \
+    WaitValue, Timer, WaitWriteOnly, SimCallback
+
+BIT = Bits3t(1, False)
+DATA = Bits3t(4, False)
+
+
+class ClkWireModel(BasicRtlSimModel):
+    """
+    o = clk, d is an input which is not used by the model
+    """
+
+    def __init__(self, sim, name=None):
+        super(ClkWireModel, self).__init__(sim, name)
+        io = self.io
+        io.clk = BasicRtlSimProxy(sim, self, "clk", BIT, None)
+        io.o = BasicRtlSimProxy(sim, self, "o", BIT, None)
+        io.d = BasicRtlSimProxy(sim, self, "d", DATA, None)
+        self._interfaces = [io.clk, io.o, io.d]
+        self._processes = [self.assig_process_o, ]
+        self._outputs = {self.assig_process_o: (io.o, )}
+        sensitivity(self.assig_process_o, io.clk)
+
+    def assig_process_o(self):
+        self.io.o.val_next = (self.io.clk.val, 0)
+
+
+class BasicRtlSimulatorTC(unittest.TestCase):
+    """
+    Triggers of the simulation processes with the python RTL simulator
+    """
+
+    def build_sim(self):
+        rtl_sim = BasicRtlSimulator()
+        rtl_sim.bound_model(ClkWireModel(rtl_sim))
+        return rtl_sim, HdlSimulator(rtl_sim)
+
+    def run_monitor(self, trigger_cls, clk_cycles=5):
+        rtl_sim, sim = self.build_sim()
+        io = rtl_sim.io
+        data = []
+
+        def monitor():
+            while True:
+                yield trigger_cls(io.o)
+                yield WaitCombRead()
+                data.append((sim.now, int(io.o.read())))
+
+        sim.run(CLK_PERIOD * clk_cycles,
+                extraProcesses=[get_clk_driver(sim, io.clk, CLK_PERIOD), monitor()])
+        return data
+
+    def test_edge(self):
+        data = self.run_monitor(Edge)
+        ref = [(i * CLK_PERIOD // 2, i % 2) for i in range(10)]
+        self.assertSequenceEqual(data, ref)
+
+    def test_rising_edge(self):
+        data = self.run_monitor(RisingEdge)
+        ref = [(CLK_PERIOD // 2 + i * CLK_PERIOD, 1) for i in range(5)]
+        self.assertSequenceEqual(data, ref)
+
+    def test_falling_edge(self):
+        data = self.run_monitor(FallingEdge)
+        ref = [(i * CLK_PERIOD, 0) for i in range(5)]
+        self.assertSequenceEqual(data, ref)
+
+    def test_edge_callback_loops(self):
+        rtl_sim, sim = self.build_sim()
+        io = rtl_sim.io
+        rising = []
+        falling = []
+
+        def on_rising():
+            rising.append(sim.now)
+
+        def on_falling():
+            falling.append(sim.now)
+            yield WaitCombRead()
+            self.assertEqual(int(io.o.read()), 0)
+
+        procs = [
+            get_clk_driver(sim, io.clk, CLK_PERIOD),
+            OnRisingCallbackLoop(sim, io.o, on_rising, lambda: True)(),
+            OnFallingCallbackLoop(sim, io.o, on_falling, lambda: True)(),
+        ]
+        sim.run(CLK_PERIOD * 5, extraProcesses=procs)
+        self.assertSequenceEqual(rising, [CLK_PERIOD // 2 + i * CLK_PERIOD for i in range(5)])
+        self.assertSequenceEqual(falling, [i * CLK_PERIOD for i in range(5)])
+
+    def test_wait_value(self):
+        rtl_sim, sim = self.build_sim()
+        io = rtl_sim.io
+        data = [0, 2, 6, 6, 4, 7, 2, 15, 6]
+        res = []
+
+        def driver():
+            for d in data:
+                yield WaitWriteOnly()
+                io.d.write(d)
+                yield Timer(CLK_PERIOD)
+
+        def monitor(value, mask):
+            while True:
+                yield WaitValue(io.d, value, mask)
+                yield WaitCombRead()
+                res.append((value, mask, sim.now // CLK_PERIOD, int(io.d.read())))
+
+        sim.run(CLK_PERIOD * len(data),
+                extraProcesses=[driver(), monitor(6, None), monitor(2, 0b0110)])
+        # the value 6 in the 3. cycle is not a change
+        self.assertSequenceEqual(res, [
+            (2, 0b0110, 1, 2),
+            (6, None, 2, 6),
+            (2, 0b0110, 6, 2),
+            (6, None, 8, 6),
+        ])
+
+    def test_subscribe(self):
+        rtl_sim, sim = self.build_sim()
+        io = rtl_sim.io
+        any_edge = []
+        rising = []
+
+        def on_change(sim):
+            any_edge.append(sim.now)
+            if len(any_edge) == 3:
+                io.o.unsubscribe(on_change)
+            return
+            yield
+
+        def on_rising(sim):
+            yield WaitCombRead()
+            rising.append((sim.now, int(io.o.read())))
+
+        def subscribe():
+            io.o.subscribe(on_change)
+            io.o.subscribe(on_rising, edge=1)
+            return
+            yield
+
+        sim.run(CLK_PERIOD * 3,
+                extraProcesses=[get_clk_driver(sim, io.clk, CLK_PERIOD), subscribe()])
+        self.assertSequenceEqual(any_edge, [0, CLK_PERIOD // 2, CLK_PERIOD])
+        self.assertSequenceEqual(rising, [(CLK_PERIOD // 2 + i * CLK_PERIOD, 1) for i in range(3)])
+        with self.assertRaises(ValueError):
+            io.o.subscribe(on_change, edge=2)
+
+    def test_timer_cache(self):
+        self.assertIs(Timer(CLK_PERIOD), Timer(CLK_PERIOD))
+        self.assertIsNot(Timer(CLK_PERIOD), Timer(CLK_PERIOD + 1))
+        self.assertIs(WaitCombRead(), WaitCombRead())
+        self.assertIs(WaitWriteOnly(), WaitWriteOnly())
+        # the float is not accepted even if the Timer with the same int value is cached
+        Timer(5)
+        with self.assertRaises(AssertionError):
+            Timer(5.0)
+
+    def test_time_slot_reuse(self):
+        rtl_sim, sim = self.build_sim()
+        new_time_slot = sim._new_time_slot
+        allocated = []
+
+        def _new_time_slot():
+            ts = new_time_slot()
+            # the reused time slot has no leftover state from the previous time
+            self.assertTrue(ts.is_empty(), ts)
+            allocated.append(ts)
+            return ts
+
+        sim._new_time_slot = _new_time_slot
+        sim.run(CLK_PERIOD * 10, extraProcesses=[get_clk_driver(sim, rtl_sim.io.clk, CLK_PERIOD)])
+        # a time slot for each clock edge, but only a few instances
+        self.assertGreaterEqual(len(allocated), 19)
+        self.assertLessEqual(len(set(map(id, allocated))), 3)
+        for ts in sim._free_time_slots:
+            self.assertTrue(ts.is_empty(), ts)
+
+    def test_sim_callback(self):
+        rtl_sim, sim = self.build_sim()
+        io = rtl_sim.io
+        calls = []
+
+        def recorder(phase):
+            def cb(sim):
+                calls.append((sim.now, phase, int(io.o.read())))
+            return cb
+
+        # subscribed in reverse order, the phases decide the order of the calls
+        callbacks = [SimCallback(recorder(p), p) for p in (
+            SimCallback.MEM_STABLE, SimCallback.COMB_STABLE, SimCallback.COMB_READ)]
+
+        def subscribe():
+            for cb in callbacks:
+                io.o.subscribe(cb, edge=1)
+            return
+            yield
+
+        sim.run(CLK_PERIOD * 2,
+                extraProcesses=[get_clk_driver(sim, io.clk, CLK_PERIOD), subscribe()])
+        ref = []
+        for i in range(2):
+            t = CLK_PERIOD // 2 + i * CLK_PERIOD
+            ref.extend((t, p, 1) for p in (
+                SimCallback.COMB_READ, SimCallback.COMB_STABLE, SimCallback.MEM_STABLE))
+        self.assertSequenceEqual(calls, ref)
+
+        with self.assertRaises(AssertionError):
+            SimCallback(recorder(None), "write_only")
+
+    def test_clock_agent_monitor(self):
+        rtl_sim, sim = self.build_sim()
+        io = rtl_sim.io
+        a = ClockAgent(sim, io.o)
+        sim.run(CLK_PERIOD * 5,
+                extraProcesses=[get_clk_driver(sim, io.clk, CLK_PERIOD), *a.getMonitors()])
+        self.assertSequenceEqual(a.data, [(i * CLK_PERIOD // 2, i % 2) for i in range(10)])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(BasicRtlSimulatorTC))
+    runner = unittest.TextTestRunner(verbosity=3)
+    runner.run(suite)
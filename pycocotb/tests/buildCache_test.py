@@ -0,0 +1,88 @@
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from pycocotb.tests.common import VERILOG_SRCS, format_accessible_signals
+from pycocotb.verilator.build_cache import VerilatorBuildCache, PGO_KEY_SUFFIX, \
+    get_build_source_files
+from pycocotb.verilator.simulator_gen import DEFAULT_EXTENSION_EXTRA_ARGS, \
+    get_build_profile, COCOPY_SRCS, VERILATOR_THREADED_SRCS
+
+
+class VerilatorBuildCacheTC(unittest.TestCase):
+
+    def _get_key(self, cache, accessible_signals, profile=None):
+        return cache.get_key(
+            [os.path.join(VERILOG_SRCS, "Cntr.v")], "Cntr", "Cntr",
+            format_accessible_signals(accessible_signals, "Cntr"),
+            DEFAULT_EXTENSION_EXTRA_ARGS, profile)
+
+    def test_key(self):
+        with TemporaryDirectory() as cache_dir:
+            cache = VerilatorBuildCache(cache_dir)
+            sigs0 = [("clk", 0, 0, 1), ("val", 1, 0, 2)]
+            sigs1 = [("clk", 0, 0, 1)]
+            k0 = self._get_key(cache, sigs0)
+            self.assertEqual(k0, self._get_key(cache, sigs0))
+            self.assertNotEqual(k0, self._get_key(cache, sigs1))
+            self.assertNotEqual(self._get_key(cache, sigs0, get_build_profile("debug")),
+                                self._get_key(cache, sigs0, get_build_profile("max-speed")))
+
+    def test_key_sources(self):
+        srcs = get_build_source_files(get_build_profile("fast-build"))
+        for f in COCOPY_SRCS:
+            self.assertIn(f, srcs)
+        self.assertTrue(any(f.endswith("pycocotb_sim.h") for f in srcs))
+        for f in VERILATOR_THREADED_SRCS:
+            self.assertNotIn(f, srcs)
+
+        srcs = get_build_source_files(get_build_profile("fast-build", threads=2))
+        for f in COCOPY_SRCS + VERILATOR_THREADED_SRCS:
+            self.assertIn(f, srcs)
+
+    def _store(self, cache, build_dir, key, size):
+        f = os.path.join(build_dir, key + ".so")
+        with open(f, "wb") as fp:
+            fp.write(bytes(size))
+        return cache.store(key, f)
+
+    def test_store_lookup_evict(self):
+        with TemporaryDirectory() as cache_dir, TemporaryDirectory() as build_dir:
+            cache = VerilatorBuildCache(cache_dir, max_size=250)
+            self.assertIsNone(cache.lookup("a"))
+            f = self._store(cache, build_dir, "a", 100)
+            self.assertEqual(cache.lookup("a"), f)
+            # store of the same entry by other process
+            self.assertEqual(self._store(cache, build_dir, "a", 100), f)
+
+            self._store(cache, build_dir, "b", 100)
+            # "a" is now the most recently used
+            os.utime(os.path.join(cache_dir, "b"), (0, 0))
+            self._store(cache, build_dir, "c", 100)
+            self.assertIsNotNone(cache.lookup("a"))
+            self.assertIsNone(cache.lookup("b"))
+            self.assertIsNotNone(cache.lookup("c"))
+            self.assertSequenceEqual(sorted(os.listdir(cache_dir)), ["a", "c"])
+
+    def test_pgo_entry_preferred(self):
+        sigs = [("clk", 0, 0, 1), ("val", 1, 0, 2)]
+        with TemporaryDirectory() as cache_dir, TemporaryDirectory() as build_dir:
+            cache = VerilatorBuildCache(cache_dir)
+            key = self._get_key(cache, sigs)
+            f = self._store(cache, build_dir, key, 10)
+            f_pgo = self._store(cache, build_dir, key + PGO_KEY_SUFFIX, 10)
+            # the lookup is successful, Verilator is not required
+            build = lambda pgo_training: cache.build(
+                [os.path.join(VERILOG_SRCS, "Cntr.v")], "Cntr", "Cntr",
+                format_accessible_signals(sigs, "Cntr"), build_dir,
+                pgo_training=pgo_training)
+            self.assertEqual(build(None), f_pgo)
+            self.assertEqual(build("pkg.module:training"), f_pgo)
+            self.assertNotEqual(f, f_pgo)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(VerilatorBuildCacheTC))
+    runner = unittest.TextTestRunner(verbosity=3)
+    runner.run(suite)
@@ -1,8 +1,18 @@
+import os
 from os.path import dirname, abspath, join
+from pycocotb.verilator.build_cache import VerilatorBuildCache
+from pycocotb.verilator.sim_module_reuse import get_reused_sim_cls, store_reused_sim_cls
 from pycocotb.verilator.simulator_gen import verilatorCompile, \
     generatePythonModuleWrapper, loadPythonCExtensionFromFile
 
 VERILOG_SRCS = dirname(abspath(__file__))
+# persistent cache of the simulator modules, enabled by PYCOCOTB_BUILD_CACHE_DIR
+# environment variable
+_build_cache_dir = os.environ.get("PYCOCOTB_BUILD_CACHE_DIR", None)
+if _build_cache_dir:
+    BUILD_CACHE = VerilatorBuildCache(_build_cache_dir)
+else:
+    BUILD_CACHE = None
 
 
 def format_accessible_signals(accessible_signals, top_name):
@@ -29,17 +39,26 @@ def format_accessible_signals(accessible_signals, top_name):
 
     
 def build_sim(verilog_files, accessible_signals, tc, build_dir, top_name):
-    sim_verilog = [join(VERILOG_SRCS, f) for f in verilog_files]
-    verilatorCompile(sim_verilog, build_dir)
-
     accessible_signals = format_accessible_signals(accessible_signals, top_name)
-    module_file_name = generatePythonModuleWrapper(
-        top_name, top_name,
-        build_dir,
-        accessible_signals)
+    cache_key = (tuple(verilog_files), top_name, repr(accessible_signals))
+    # the module is loaded only once per worker of pycocotb.regressionRunner
+    sim_cls = get_reused_sim_cls(cache_key)
+    if sim_cls is None:
+        sim_verilog = [join(VERILOG_SRCS, f) for f in verilog_files]
+        if BUILD_CACHE is None:
+            verilatorCompile(sim_verilog, build_dir)
+            module_file_name = generatePythonModuleWrapper(
+                top_name, top_name,
+                build_dir,
+                accessible_signals)
+        else:
+            module_file_name = BUILD_CACHE.build(
+                sim_verilog, top_name, top_name,
+                accessible_signals, build_dir)
 
-    sim_module = loadPythonCExtensionFromFile(module_file_name, top_name)
-    sim_cls = getattr(sim_module, top_name)
+        sim_module = loadPythonCExtensionFromFile(module_file_name, top_name)
+        sim_cls = getattr(sim_module, top_name)
+        store_reused_sim_cls(cache_key, sim_cls)
 
     simInstance = sim_cls()
     io = simInstance.io
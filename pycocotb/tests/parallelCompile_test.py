@@ -0,0 +1,161 @@
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from setuptools import Extension
+from setuptools.dist import Distribution
+
+from pycocotb.verilator.fs_utils import working_directory, find_files
+from pycocotb.verilator.parallel_compile import ParallelBuildExt, ObjectCache,\
+    PCH_DIR_NAME
+from pycocotb.verilator.simulator_gen import loadPythonCExtensionFromFile, \
+    writeFileIfChanged
+
+MODULE_SRC = """
+#include <Python.h>
+int get_value(void);
+
+static PyObject * value(PyObject * self, PyObject * args) {
+    return PyLong_FromLong(get_value());
+}
+static PyMethodDef methods[] = {
+    {"value", value, METH_NOARGS, ""},
+    {NULL, NULL, 0, NULL}
+};
+static struct PyModuleDef module = {
+    PyModuleDef_HEAD_INIT, "%s", NULL, -1, methods
+};
+PyMODINIT_FUNC PyInit_%s(void) {
+    return PyModule_Create(&module);
+}
+"""
+
+PCH_HEADER_SRC = """
+#pragma once
+#include <vector>
+#include <string>
+static inline int get_value_cpp() {
+    std::vector<std::string> v = {"a", "b", "c"};
+    return v.size();
+}
+"""
+
+PCH_MODULE_SRC = """
+#include "pch_common.h"
+#include <Python.h>
+
+static PyObject * value(PyObject * self, PyObject * args) {
+    return PyLong_FromLong(get_value_cpp());
+}
+static PyMethodDef methods[] = {
+    {"value", value, METH_NOARGS, ""},
+    {NULL, NULL, 0, NULL}
+};
+static struct PyModuleDef module = {
+    PyModuleDef_HEAD_INIT, "%s", NULL, -1, methods
+};
+PyMODINIT_FUNC PyInit_%s(void) {
+    return PyModule_Create(&module);
+}
+"""
+
+
+class ParallelCompileTC(unittest.TestCase):
+
+    def build(self, build_dir, name, value, obj_cache, incremental=False):
+        with working_directory(build_dir):
+            writeFileIfChanged(name + ".c", MODULE_SRC % (name, name))
+            writeFileIfChanged("value.c", "int get_value(void) { return %d; }\n" % value)
+            dist = Distribution()
+            ext = Extension(name, sources=[name + ".c", "value.c"])
+            dist.ext_modules = [ext]
+            b = ParallelBuildExt(dist)
+            b.compile_jobs = 2
+            b.obj_cache = obj_cache
+            b.incremental = incremental
+            b.force = incremental
+            b.finalize_options()
+            b.run()
+            return loadPythonCExtensionFromFile(
+                os.path.join(build_dir, b.build_lib, ext._file_name), name)
+
+    def test_build_with_obj_cache(self):
+        with TemporaryDirectory() as cache_dir:
+            obj_cache = ObjectCache(cache_dir)
+            with TemporaryDirectory() as build_dir:
+                m = self.build(build_dir, "pcompile_test0", 1, obj_cache)
+                self.assertEqual(m.value(), 1)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+            # only value.c changed
+            with TemporaryDirectory() as build_dir:
+                m = self.build(build_dir, "pcompile_test0_", 2, obj_cache)
+                self.assertEqual(m.value(), 2)
+            self.assertEqual(len(os.listdir(cache_dir)), 4)
+
+            # same sources, everything from cache
+            with TemporaryDirectory() as build_dir:
+                m = self.build(build_dir, "pcompile_test1", 2, obj_cache)
+                self.assertEqual(m.value(), 2)
+            self.assertEqual(len(os.listdir(cache_dir)), 5)
+
+    def test_incremental_build(self):
+        def value_obj_mtime():
+            objs = list(find_files(build_dir, "value.o"))
+            self.assertEqual(len(objs), 1)
+            return os.stat(objs[0]).st_mtime_ns
+
+        with TemporaryDirectory() as build_dir:
+            m = self.build(build_dir, "pcompile_inc_test0", 1, None, incremental=True)
+            self.assertEqual(m.value(), 1)
+            t0 = value_obj_mtime()
+
+            # only the module source changed, value.o is up to date
+            m = self.build(build_dir, "pcompile_inc_test1", 1, None, incremental=True)
+            self.assertEqual(m.value(), 1)
+            self.assertEqual(value_obj_mtime(), t0)
+
+            # value.c changed
+            m = self.build(build_dir, "pcompile_inc_test2", 2, None, incremental=True)
+            self.assertEqual(m.value(), 2)
+            self.assertNotEqual(value_obj_mtime(), t0)
+
+    def build_with_pch(self, build_dir, name, obj_cache, header):
+        with working_directory(build_dir):
+            with open(name + ".cpp", "w") as f:
+                f.write(PCH_MODULE_SRC % (name, name))
+            dist = Distribution()
+            ext = Extension(name, sources=[name + ".cpp"], language="c++",
+                            include_dirs=[os.path.dirname(header)])
+            dist.ext_modules = [ext]
+            b = ParallelBuildExt(dist)
+            b.obj_cache = obj_cache
+            b.pch_headers = [header]
+            b.finalize_options()
+            b.run()
+            return loadPythonCExtensionFromFile(
+                os.path.join(build_dir, b.build_lib, ext._file_name), name)
+
+    def test_build_with_pch(self):
+        with TemporaryDirectory() as cache_dir, TemporaryDirectory() as inc_dir:
+            header = os.path.join(inc_dir, "pch_common.h")
+            with open(header, "w") as f:
+                f.write(PCH_HEADER_SRC)
+            obj_cache = ObjectCache(cache_dir)
+            for name in ["pcompile_pch_test0", "pcompile_pch_test1"]:
+                with TemporaryDirectory() as build_dir:
+                    m = self.build_with_pch(build_dir, name, obj_cache, header)
+                    self.assertEqual(m.value(), 3)
+
+            # the precompiled header was build only once and it was reused
+            pch_keys = os.listdir(os.path.join(cache_dir, PCH_DIR_NAME))
+            self.assertEqual(len(pch_keys), 1)
+            gch_dir = os.path.join(cache_dir, PCH_DIR_NAME, pch_keys[0], "pch_common.h.gch")
+            self.assertEqual(os.listdir(gch_dir), ["pch.gch"])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(ParallelCompileTC))
+    runner = unittest.TextTestRunner(verbosity=3)
+    runner.run(suite)
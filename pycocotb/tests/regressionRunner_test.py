@@ -0,0 +1,29 @@
+import unittest
+
+from pycocotb.regressionRunner import sort_longest_first, collect_test_ids, \
+    run_regression
+
+
+class RegressionRunnerTC(unittest.TestCase):
+
+    def test_sort_longest_first(self):
+        history = {"a": 1.0, "b": 3.0, "c": 2.0}
+        self.assertSequenceEqual(
+            sort_longest_first(["a", "b", "c", "d"], history),
+            ["d", "b", "c", "a"])
+
+    def test_run_regression(self):
+        suite = unittest.TestLoader().loadTestsFromName(
+            "pycocotb.tests.simCalendar_test.SimCalendarTC")
+        test_ids = collect_test_ids(suite)
+        results = run_regression(test_ids, jobs=2)
+        self.assertEqual(sorted(r.test_id for r in results), sorted(test_ids))
+        for r in results:
+            self.assertEqual(r.status, "ok", r.msg)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(RegressionRunnerTC))
+    runner = unittest.TextTestRunner(verbosity=3)
+    runner.run(suite)
@@ -0,0 +1,76 @@
+from random import Random
+import unittest
+
+from pycocotb.simCalendar import SimCalendar, SimCalendarTimingWheel, \
+    SimTimeSlot
+
+
+class SimCalendarTC(unittest.TestCase):
+    """
+    Check that the timing wheel calendar behaves same as the SortedDict based one
+    """
+
+    def test_push_pop_order(self):
+        cal = SimCalendarTimingWheel(bucket_width=10, bucket_cnt=4)
+        times = [35, 0, 7, 1000, 40, 39, 9, 100, 11]
+        for t in times:
+            cal.push(t, SimTimeSlot())
+
+        self.assertEqual(len(cal), len(times))
+        res = [cal.pop()[0] for _ in range(len(times))]
+        self.assertSequenceEqual(res, sorted(times))
+        self.assertEqual(len(cal), 0)
+        with self.assertRaises(KeyError):
+            cal.pop()
+
+    def test_push_to_past_when_empty(self):
+        # HdlSimulator.restore rewinds the time and schedules to the empty calendar
+        cal = SimCalendarTimingWheel()
+        for t in (0, 5, 100000):
+            cal.push(t, SimTimeSlot())
+        self.assertEqual([cal.pop()[0] for _ in range(3)], [0, 5, 100000])
+        ts = SimTimeSlot()
+        cal.push(5, ts)
+        cal.push(100, SimTimeSlot())
+        self.assertEqual(cal.peek(), (5, ts))
+        self.assertEqual([cal.pop()[0] for _ in range(2)], [5, 100])
+
+    def test_get_and_overwrite(self):
+        cal = SimCalendarTimingWheel(bucket_width=10, bucket_cnt=4)
+        ts0 = SimTimeSlot()
+        ts1 = SimTimeSlot()
+        cal.push(5, ts0)
+        self.assertIs(cal.get(5), ts0)
+        self.assertIsNone(cal.get(6))
+        cal.push(5, ts1)
+        self.assertEqual(len(cal), 1)
+        self.assertEqual(cal.pop(), (5, ts1))
+
+    def test_random_against_SortedDict(self):
+        rand = Random(0)
+        ref = SimCalendar()
+        cal = SimCalendarTimingWheel(bucket_width=16, bucket_cnt=8)
+        now = 0
+        for _ in range(20000):
+            if rand.random() < 0.55 or not len(ref):
+                t = now + rand.choice((0, 1, 8, 16, rand.randint(0, 1000)))
+                ts = ref.get(t, None)
+                self.assertIs(cal.get(t, None), ts)
+                if ts is None:
+                    ts = SimTimeSlot()
+                    ref.push(t, ts)
+                    cal.push(t, ts)
+            else:
+                r = ref.pop()
+                self.assertEqual(cal.pop(), r)
+                now = r[0]
+            self.assertEqual(len(cal), len(ref))
+            if len(ref):
+                self.assertEqual(cal.peek(), ref.peek())
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(SimCalendarTC))
+    runner = unittest.TextTestRunner(verbosity=3)
+    runner.run(suite)
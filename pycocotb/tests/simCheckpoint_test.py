@@ -0,0 +1,65 @@
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from pycocotb.constants import CLK_PERIOD
+from pycocotb.simCheckpoint import HdlSimulatorSnapshot, SimCheckpointStats, \
+    save_checkpoint, load_checkpoint, find_last_checkpoint, list_checkpoints, \
+    CHECKPOINT_KEEP
+from pycocotb.basic_hdl_simulator.rtlSimulator import BasicRtlSimulator
+from pycocotb.hdlSimulator import HdlSimulator
+from pycocotb.tests.basicRtlSimulator_test import ClkWireModel
+from pycocotb.tests.example_agents import get_clk_driver
+
+
+class SimCheckpointTC(unittest.TestCase):
+
+    def test_save_load(self):
+        with TemporaryDirectory() as checkpoint_dir:
+            self.assertIsNone(find_last_checkpoint(checkpoint_dir))
+            stats = SimCheckpointStats()
+            for now in (10, 200, 3000, 40000):
+                f = save_checkpoint(checkpoint_dir,
+                                    HdlSimulatorSnapshot(now, bytes([now & 0xff])),
+                                    stats)
+                self.assertTrue(os.path.isfile(f))
+
+            self.assertEqual(stats.cnt, 4)
+            self.assertEqual(len(list_checkpoints(checkpoint_dir)), CHECKPOINT_KEEP)
+            s = load_checkpoint(find_last_checkpoint(checkpoint_dir))
+            self.assertEqual(s.now, 40000)
+            self.assertEqual(s.rtl_state, bytes([40000 & 0xff]))
+
+    def test_checkpoints_not_inherited(self):
+        # the empty run with checkpoints ends before the simulation loop
+        rtl_sim = BasicRtlSimulator()
+        rtl_sim.bound_model(ClkWireModel(rtl_sim))
+        sim = HdlSimulator(rtl_sim)
+        with TemporaryDirectory() as checkpoint_dir:
+            sim.run(0, checkpoint_every=10, checkpoint_dir=checkpoint_dir)
+            sim.run(CLK_PERIOD * 3,
+                    extraProcesses=[get_clk_driver(sim, rtl_sim.io.clk, CLK_PERIOD)])
+            self.assertEqual(list_checkpoints(checkpoint_dir), [])
+        self.assertEqual(sim.checkpoint_stats.cnt, 0)
+        self.assertIsNone(sim._next_checkpoint)
+
+    def test_checkpoints_unsupported(self):
+        rtl_sim = BasicRtlSimulator()
+        rtl_sim.bound_model(ClkWireModel(rtl_sim))
+        sim = HdlSimulator(rtl_sim)
+        with TemporaryDirectory() as checkpoint_dir:
+            with self.assertRaises(NotImplementedError):
+                sim.run(CLK_PERIOD * 3,
+                        extraProcesses=[get_clk_driver(sim, rtl_sim.io.clk, CLK_PERIOD)],
+                        checkpoint_every=CLK_PERIOD, checkpoint_dir=checkpoint_dir)
+            self.assertEqual(list_checkpoints(checkpoint_dir), [])
+        # nothing was simulated
+        self.assertEqual(sim.now, 0)
+        self.assertEqual(sim.checkpoint_stats.cnt, 0)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(SimCheckpointTC))
+    runner = unittest.TextTestRunner(verbosity=3)
+    runner.run(suite)
@@ -0,0 +1,294 @@
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from pycocotb.tests.common import format_accessible_signals
+from pycocotb.verilator.fs_utils import working_directory
+from pycocotb.verilator.pgo import PGO_PROFILE_DIR_NAME, get_pgo_generate_args, \
+    get_pgo_use_args, resolve_training, run_training
+from pycocotb.verilator.simulator_gen import getSignalTable, getIdleSkipBlockers, \
+    renderPythonModuleWrapper, get_build_profile, BUILD_PROFILES, _buildExtension, \
+    loadPythonCExtensionFromFile, _buildExtensionPgo, getThreadedExtensionArgs, DEFAULT_EXTENSION_EXTRA_ARGS, \
+    COCOPY_SRCS, SOABI, DEFAULT_BUILD_PROFILE
+
+MODEL_HEADER = """
+class VCntr : public VerilatedModule {
+  public:
+    VL_IN8(clk,0,0);
+    VL_OUT8(val,1,0);
+    // VL_SIG8(Cntr__DOT__removed,1,0);
+    /* CData Cntr__DOT__removed2; */
+    IData/*31:0*/ Cntr__DOT__mem[4];
+    VL_SIGW(Cntr__DOT__wide,127,0,4);
+    VlUnpacked<VlWide<4>/*127:0*/, 2> Cntr__DOT__wide_mem;
+    VCntr__Syms* __VlSymsp;
+    static void _eval(VCntr__Syms* __restrict vlSymsp);
+    IData Cntr__DOT__fn(IData a);
+};
+"""
+
+MODEL_SRC_RANDOM = """
+VL_INLINE_OPT void VRnd::_sequent__TOP__1(VRnd__Syms* __restrict vlSymsp) {
+    // VL_TIME_Q() in comment
+    vlTOPp->Rnd__DOT__r = VL_RANDOM_I(32);
+    vlTOPp->Rnd__DOT__r2 = VL_RAND_RESET_I(32);
+}
+"""
+
+MODEL_SRC_TIME = """
+void VRnd::_sequent__TOP__2(VRnd__Syms* __restrict vlSymsp) {
+    if ((0x3e8ULL < VL_TIME_Q())) {
+        VL_WRITEF("late\\n");
+    }
+}
+"""
+
+MODEL_SRC_PURE = """
+#include "VCc.h"
+#include "VCc__Syms.h"
+
+VL_CTOR_IMP(VCc) {
+    VCc__Syms* __restrict vlSymsp = __VlSymsp = new VCc__Syms(this, name());
+    _ctor_var_reset();
+}
+
+void VCc::eval() {
+    VL_DEBUG_IF(VL_DBG_MSGF("+++++TOP Evaluate VCc::eval() printf(\\n"); );
+    if (VL_UNLIKELY(!vlSymsp->__Vm_didInit)) _eval_initial_loop(vlSymsp);
+    do {
+        _eval(vlSymsp);
+        if (VL_UNLIKELY(++__VclockLoop > 100)) {
+            int __Vsaved_debug = Verilated::debug();
+            VL_FATAL_MT(__FILE__,__LINE__,__FILE__,"Verilated model didn't converge");
+        }
+    } while (VL_UNLIKELY(__Vchange));
+}
+
+VL_INLINE_OPT void VCc::_sequent__TOP__1(VCc__Syms* __restrict vlSymsp) {
+    vlTOPp->Cc__DOT__w = VL_EXTEND_WI(65,32, __Vtemp1, VL_REDXOR_32(vlTOPp->Cc__DOT__r));
+    vlTOPp->val = ((IData)(vlTOPp->rst) ? 0U : (0xffffU & ((IData)(1U) + (IData)(vlTOPp->val))));
+}
+
+void VCc::_eval_initial_loop(VCc__Syms* __restrict vlSymsp) {
+    vlSymsp->__Vm_didInit = true;
+    _eval(vlSymsp);
+}
+
+void VCc::_eval(VCc__Syms* __restrict vlSymsp) {
+    vlTOPp->onBeforeEdge(vlSymsp, vlTOPp->clk);
+    if (((IData)(vlTOPp->clk) & (~ (IData)(vlTOPp->__Vclklast__TOP__clk)))) {
+        vlTOPp->_sequent__TOP__1(vlSymsp);
+    }
+}
+
+void VCc::__Vdeserialize(VerilatedDeserialize& os) {
+    vluint64_t __Vcheckval = VL_ULL(0xa1b2c3d4e5f6);
+    os.readAssert(__Vcheckval);
+}
+
+void VCc::_ctor_var_reset() {
+    clk = VL_RAND_RESET_I(1);
+}
+"""
+
+# $c32("rand()") and the DPI import "import "DPI-C" function void dpi_tick(int x);"
+MODEL_SRC_C = """
+VL_INLINE_OPT void VCc::_sequent__TOP__2(VCc__Syms* __restrict vlSymsp) {
+    if ((0U == (3U & ((IData)(rand()))))) {
+        vlTOPp->val = (0xffffU & ((IData)(1U) + (IData)(vlTOPp->val)));
+    }
+    vlTOPp->__Vdpiimwrap_dpi_tick_TOP(vlTOPp->val);
+}
+
+VL_INLINE_OPT void VCc::__Vdpiimwrap_dpi_tick_TOP(IData x) {
+    int x__Vcvt;
+    x__Vcvt = x;
+    dpi_tick(x__Vcvt);
+}
+"""
+
+PGO_MODULE_SRC = """
+#include <Python.h>
+
+static PyObject * pgo_test_module(PyObject * self, PyObject * args) {
+    long s = 0;
+    for (long i = 0; i < 1000; i++)
+        s += i % 7;
+    return PyLong_FromLong(s);
+}
+static PyMethodDef methods[] = {
+    {"pgo_test_module", pgo_test_module, METH_NOARGS, ""},
+    {NULL, NULL, 0, NULL}
+};
+static struct PyModuleDef module = {
+    PyModuleDef_HEAD_INIT, "pgo_test_module", NULL, -1, methods
+};
+PyMODINIT_FUNC PyInit_pgo_test_module(void) {
+    return PyModule_Create(&module);
+}
+"""
+
+
+def pgo_training(sim_cls):
+    # sim_cls is the function from PGO_MODULE_SRC in this test
+    for _ in range(100):
+        assert sim_cls() == 2997
+
+
+class SimulatorGenTC(unittest.TestCase):
+
+    def test_idle_skip_blockers(self):
+        with TemporaryDirectory() as build_dir:
+            with open(os.path.join(build_dir, "VRnd.h"), "w") as f:
+                f.write(MODEL_HEADER)
+            self.assertEqual(getIdleSkipBlockers(build_dir, "Rnd"), set())
+            with open(os.path.join(build_dir, "VRnd.cpp"), "w") as f:
+                f.write(MODEL_SRC_RANDOM)
+            # the random initialization of the variables is not a blocker
+            self.assertEqual(getIdleSkipBlockers(build_dir, "Rnd"), {"VL_RANDOM_I"})
+            with open(os.path.join(build_dir, "VRnd__1.cpp"), "w") as f:
+                f.write(MODEL_SRC_TIME)
+            # the wrapper of the model is not checked
+            with open(os.path.join(build_dir, "VRnd_sim_wrapper.cpp"), "w") as f:
+                f.write("sc_time_stamp();")
+            self.assertEqual(getIdleSkipBlockers(build_dir, "Rnd"),
+                             {"VL_RANDOM_I", "VL_TIME_Q", "VL_WRITEF"})
+
+        with TemporaryDirectory() as build_dir:
+            with open(os.path.join(build_dir, "VCc.cpp"), "w") as f:
+                f.write(MODEL_SRC_PURE)
+            # the symbol table and the trace are not evaluated in the simulation step
+            with open(os.path.join(build_dir, "VCc__Syms.cpp"), "w") as f:
+                f.write("VCc__Syms::VCc__Syms(VCc* topp, const char* namep) "
+                        "{ __Vscope_Cc.configure(this, name(), \"Cc\", \"Cc\", 0); }")
+            with open(os.path.join(build_dir, "VCc__Trace.cpp"), "w") as f:
+                f.write("void VCc::traceChgThis(VCc__Syms* __restrict vlSymsp, "
+                        "VerilatedVcd* vcdp, uint32_t code) { vcdp->chgBit(c+1, vlTOPp->clk); }")
+            self.assertEqual(getIdleSkipBlockers(build_dir, "Cc"), set())
+
+            # the calls from $c code and DPI imports are not in the allowed set
+            with open(os.path.join(build_dir, "VCc__1.cpp"), "w") as f:
+                f.write(MODEL_SRC_C)
+            self.assertEqual(getIdleSkipBlockers(build_dir, "Cc"), {"rand", "dpi_tick"})
+
+        sigs = format_accessible_signals([("clk", 0, 0, 1)], "Top")
+        src = renderPythonModuleWrapper("Top", "Top", sigs)
+        self.assertIn('"IDLE_SKIP_SUPPORTED", 1', src)
+        src = renderPythonModuleWrapper("Top", "Top", sigs, idle_skip_supported=False)
+        self.assertIn('"IDLE_SKIP_SUPPORTED", 0', src)
+        self.assertIn("return false;", src)
+
+    def test_signal_table(self):
+        sigs = format_accessible_signals([
+            ("clk", 0, 0, 1),
+            (("removed", ), 1, 0, 2),
+            ("val", 1, 1, 2),
+            (("mem", ), 1, 0, (4, 32)),
+        ], "Cntr")
+        names, widths, table = getSignalTable(sigs)
+        self.assertEqual(names, ["clk", "removed", "val", "mem"])
+        self.assertEqual(widths, [1, 2, 2, 4, 32])
+        self.assertEqual(table, [
+            (0, 1, "clk", 0, 1, "false"),
+            (1, 1, "removed", 1, 1, "false"),
+            (2, 1, "val", 2, 1, "true"),
+            (3, 1, "mem", 3, 2, "false"),
+        ])
+
+    def test_render_single_table(self):
+        sigs = format_accessible_signals([("s%d" % i, 0, 0, 8) for i in range(100)], "Top")
+        src = renderPythonModuleWrapper("Top", "Top", sigs)
+        # one table entry and one accessor per signal, the accessors are resolved
+        # by the compiler (the signals optimised out by Verilator have nullptr)
+        self.assertEqual(src.count("define_member_addr(s"), 100)
+        self.assertEqual(src.count("::addr, "), 100)
+        self.assertNotIn("offsetof", src)
+
+    def test_build_profile(self):
+        self.assertEqual(set(BUILD_PROFILES.keys()), {"debug", "fast-build", "max-speed"})
+        p = get_build_profile("max-speed")
+        self.assertIn("-march=native", p.extra_compile_args)
+        self.assertIn("-flto", p.extra_link_args)
+        with self.assertRaises(ValueError):
+            get_build_profile("unknown")
+        # the fast X modes are used only if explicitly requested
+        self.assertIn("fast", p.verilator_flags)
+        for name in (DEFAULT_BUILD_PROFILE, "debug"):
+            self.assertNotIn("fast", get_build_profile(name).verilator_flags)
+        self.assertEqual(get_build_profile(DEFAULT_BUILD_PROFILE).verilator_flags, [])
+
+        sigs = format_accessible_signals([("clk", 0, 0, 1)], "Top")
+        src = renderPythonModuleWrapper("Top", "Top", sigs, profile=p)
+        self.assertIn('"BUILD_PROFILE", "max-speed"', src)
+
+    def test_build_profile_threads(self):
+        p = get_build_profile("fast-build", threads=4)
+        self.assertEqual(p.threads, 4)
+        self.assertEqual(p.name, "fast-build")
+        # the profiles in BUILD_PROFILES are not modified
+        self.assertEqual(BUILD_PROFILES["fast-build"].threads, 1)
+        self.assertIs(get_build_profile("fast-build", threads=1), BUILD_PROFILES["fast-build"])
+        with self.assertRaises(ValueError):
+            get_build_profile("fast-build", threads=0)
+
+        args = getThreadedExtensionArgs(DEFAULT_EXTENSION_EXTRA_ARGS)
+        self.assertNotIn("common." + SOABI, args["libraries"])
+        for f in COCOPY_SRCS:
+            self.assertIn(f, args["sources"])
+        self.assertIn(("VL_THREADED", "1"), args["define_macros"])
+        self.assertIn("common." + SOABI, DEFAULT_EXTENSION_EXTRA_ARGS["libraries"])
+
+    def test_resolve_training(self):
+        self.assertIs(resolve_training(__name__ + ":pgo_training"), pgo_training)
+        with self.assertRaises(ValueError):
+            resolve_training("pgo_training")
+
+    def test_pgo_build(self):
+        name = "pgo_test_module"
+        training = __name__ + ":pgo_training"
+        with TemporaryDirectory() as build_dir, working_directory(build_dir):
+            with open(name + ".cpp", "w") as f:
+                f.write(PGO_MODULE_SRC)
+            profile_dir = os.path.join(build_dir, PGO_PROFILE_DIR_NAME)
+            pgo_args = get_pgo_generate_args(profile_dir)
+            instrumented = _buildExtension(name, build_dir, {}, None, None, pgo_args, pgo_args)
+            run_training(instrumented, name, training, build_dir)
+            self.assertTrue(any(f.endswith(".gcda") for f in os.listdir(profile_dir)))
+
+            pgo_args = get_pgo_use_args(profile_dir)
+            m = _buildExtension(name, build_dir, {}, None, None, pgo_args, pgo_args)
+            self.assertEqual(getattr(loadPythonCExtensionFromFile(m, name), name)(), 2997)
+
+    def test_pgo_rebuild(self):
+        name = "pgo_test_module"
+        training = __name__ + ":pgo_training"
+        with TemporaryDirectory() as build_dir, working_directory(build_dir):
+            with open(name + ".cpp", "w") as f:
+                f.write(PGO_MODULE_SRC)
+            profile_dir = os.path.join(build_dir, PGO_PROFILE_DIR_NAME)
+
+            def build():
+                m = _buildExtensionPgo(name, build_dir, {}, None, [], [], training)
+                objs = [os.path.join(d, f) for d, _, files in os.walk(build_dir)
+                        for f in files if f.endswith(".o")]
+                return m, {o: os.stat(o).st_mtime_ns for o in objs}
+
+            _, objs0 = build()
+            # the profile of the previous build is not reused (or merged with)
+            stale = os.path.join(profile_dir, "stale.gcda")
+            with open(stale, "w"):
+                pass
+            m, objs1 = build()
+            self.assertFalse(os.path.exists(stale))
+            self.assertTrue(any(f.endswith(".gcda") for f in os.listdir(profile_dir)))
+            # the objects were compiled again with the new profile
+            self.assertEqual(objs0.keys(), objs1.keys())
+            for o, t in objs0.items():
+                self.assertNotEqual(objs1[o], t, o)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(SimulatorGenTC))
+    runner = unittest.TextTestRunner(verbosity=3)
+    runner.run(suite)
@@ -1,16 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import os
 from os.path import join
+import sys
 from tempfile import TemporaryDirectory
 import unittest
+import weakref
 
 from pycocotb.agents.clk import ClockAgent
 from pycocotb.agents.rst import PullDownAgent, PullUpAgent
 from pycocotb.constants import CLK_PERIOD
 from pycocotb.hdlSimulator import HdlSimulator
-from pycocotb.tests.common import build_sim
+from pycocotb.process_utils import CallbackLoop
+from pycocotb.simCheckpoint import find_last_checkpoint, load_checkpoint
+from pycocotb.tests.common import build_sim, format_accessible_signals, VERILOG_SRCS
 from pycocotb.tests.example_agents import get_clk_driver, get_rst_driver, \
     get_pull_up_driver, get_sync_sig_monitor, get_pull_up_driver_with_reset, \
     get_sync_pull_up_driver_with_reset
-from pycocotb.triggers import Timer, WaitCombStable
+from pycocotb.triggers import Timer, WaitCombStable, WaitValue, WaitCombRead, \
+    Edge, RisingEdge, FallingEdge, SimCallback
+from pycocotb.verilator.build_cache import VerilatorBuildCache
+from pycocotb.verilator.fs_utils import find_files
+from pycocotb.verilator.simulator_gen import loadPythonCExtensionFromFile, \
+    verilatorCompile, generatePythonModuleWrapper, get_build_profile
 
 
 REF_DATA = [
@@ -25,6 +37,42 @@ REF_DATA = [
     (95000, 0)
 ]
 
+CNTR_ACCESSIBLE_SIGNALS = [
+    # (signal_name, read_only, is_signed, type_width)
+    ("clk", 0, 0, 1),
+    ("en", 0, 0, 1),
+    ("rst", 0, 0, 1),
+    ("val", 1, 0, 2),
+]
+
+CNTR_DISPLAY_ACCESSIBLE_SIGNALS = [
+    ("clk", 0, 0, 1),
+    ("rst", 0, 0, 1),
+    ("val", 1, 0, 8),
+]
+
+CNTR_RANDOM_EN_ACCESSIBLE_SIGNALS = [
+    ("clk", 0, 0, 1),
+    ("val", 1, 0, 16),
+]
+
+
+def cntr_pgo_training(sim_cls):
+    """
+    Training testbench for the build of the counter with profile guided optimization
+    """
+    rtl_sim = sim_cls()
+    io = rtl_sim.io
+    sim = HdlSimulator(rtl_sim)
+    data = []
+    procs = [
+        get_clk_driver(sim, io.clk, CLK_PERIOD),
+        get_rst_driver(sim, io.rst, CLK_PERIOD),
+        get_pull_up_driver(sim, io.en, CLK_PERIOD),
+        get_sync_sig_monitor(sim, io.val, io.clk, io.rst, data)
+    ]
+    sim.run(CLK_PERIOD * 1000, extraProcesses=procs)
+
 
 class VerilatorCntrTC(unittest.TestCase):
     """
@@ -35,15 +83,8 @@ class VerilatorCntrTC(unittest.TestCase):
         """
         Build simulator for Cntr.v in specified dir
         """
-        accessible_signals = [
-            # (signal_name, read_only, is_signed, type_width)
-            ("clk", 0, 0, 1),
-            ("en", 0, 0, 1),
-            ("rst", 0, 0, 1),
-            ("val", 1, 0, 2),
-        ]
         verilog_files = ["Cntr.v"]
-        return build_sim(verilog_files, accessible_signals, self, build_dir, "Cntr")
+        return build_sim(verilog_files, CNTR_ACCESSIBLE_SIGNALS, self, build_dir, "Cntr")
 
     def test_dual_build(self):
         """
@@ -112,6 +153,209 @@ class VerilatorCntrTC(unittest.TestCase):
 
             self.assertSequenceEqual(data, REF_DATA)
 
+    def test_wait_value(self):
+        """
+        The process is woken only when the counter changes to 3
+        """
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.cntr_build(build_dir)
+            io = rtl_sim.io
+            sim = HdlSimulator(rtl_sim)
+            data = []
+
+            def wait_for_3():
+                while True:
+                    yield WaitValue(io.val, 3)
+                    yield WaitCombRead()
+                    data.append(int(io.val.read()))
+
+            procs = [
+                get_clk_driver(sim, io.clk, CLK_PERIOD),
+                get_rst_driver(sim, io.rst, CLK_PERIOD),
+                get_pull_up_driver(sim, io.en, CLK_PERIOD),
+                wait_for_3(),
+            ]
+            sim.run(int(CLK_PERIOD * 10.5), extraProcesses=procs)
+            # REF_DATA contains the value 3 twice
+            self.assertSequenceEqual(data, [3, 3])
+
+    def test_sim_cntr_threads(self):
+        """
+        Independent simulators used from Python threads (the GIL is kept during
+        the evaluation of the DUT because the model is not multithreaded)
+        """
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.cntr_build(build_dir)
+            sim_cls = type(rtl_sim)
+
+            def run_sim(rtl_sim):
+                io = rtl_sim.io
+                sim = HdlSimulator(rtl_sim)
+                data = []
+                procs = [
+                    get_clk_driver(sim, io.clk, CLK_PERIOD),
+                    get_rst_driver(sim, io.rst, CLK_PERIOD),
+                    get_pull_up_driver(sim, io.en, CLK_PERIOD),
+                    get_sync_sig_monitor(sim, io.val, io.clk, io.rst, data)
+                ]
+                sim.run(int(CLK_PERIOD * 10.5), extraProcesses=procs)
+                return data
+
+            sims = [rtl_sim, ] + [sim_cls() for _ in range(3)]
+            with ThreadPoolExecutor(len(sims)) as executor:
+                for data in executor.map(run_sim, sims):
+                    self.assertSequenceEqual(data, REF_DATA)
+
+    def test_pgo_build(self):
+        with TemporaryDirectory() as build_dir, TemporaryDirectory() as cache_dir:
+            cache = VerilatorBuildCache(cache_dir)
+            build = lambda pgo_training: cache.build(
+                [join(VERILOG_SRCS, "Cntr.v")], "Cntr", "Cntr",
+                format_accessible_signals(CNTR_ACCESSIBLE_SIGNALS, "Cntr"), build_dir,
+                pgo_training=pgo_training)
+            module_file_name = build(__name__ + ":cntr_pgo_training")
+            # the regular build uses the module optimized by PGO
+            self.assertEqual(build(None), module_file_name)
+
+            sim_cls = getattr(loadPythonCExtensionFromFile(module_file_name, "Cntr"), "Cntr")
+            rtl_sim = sim_cls()
+            io = rtl_sim.io
+            sim = HdlSimulator(rtl_sim)
+            data = []
+            procs = [
+                get_clk_driver(sim, io.clk, CLK_PERIOD),
+                get_rst_driver(sim, io.rst, CLK_PERIOD),
+                get_pull_up_driver(sim, io.en, CLK_PERIOD),
+                get_sync_sig_monitor(sim, io.val, io.clk, io.rst, data)
+            ]
+            sim.run(int(CLK_PERIOD * 10.5), extraProcesses=procs)
+            self.assertSequenceEqual(data, REF_DATA)
+
+    def test_incremental_build(self):
+        verilog_files = [join(VERILOG_SRCS, "Cntr.v")]
+        with TemporaryDirectory() as build_dir:
+            self.assertTrue(verilatorCompile(verilog_files, build_dir))
+            generatePythonModuleWrapper(
+                "Cntr", "Cntr_inc0", build_dir,
+                format_accessible_signals(CNTR_ACCESSIBLE_SIGNALS[:-1], "Cntr"))
+            model_objs = {f: os.stat(f).st_mtime_ns for f in find_files(build_dir, "*.o")
+                          if "_sim_wrapper" not in f}
+
+            # only accessible signals changed, only the wrapper is compiled
+            self.assertFalse(verilatorCompile(verilog_files, build_dir))
+            module_file_name = generatePythonModuleWrapper(
+                "Cntr", "Cntr_inc1", build_dir,
+                format_accessible_signals(CNTR_ACCESSIBLE_SIGNALS, "Cntr"))
+            for f, t in model_objs.items():
+                self.assertEqual(os.stat(f).st_mtime_ns, t, f)
+
+            sim_cls = getattr(loadPythonCExtensionFromFile(module_file_name, "Cntr_inc1"),
+                              "Cntr_inc1")
+            rtl_sim = sim_cls()
+            self.assertTrue(hasattr(rtl_sim.io, "val"))
+            rtl_sim.finalize()
+
+    def cntr_threaded_build(self, build_dir, threads=2):
+        """
+        Build simulator for Cntr.v with multithreaded Verilator model
+        """
+        profile = get_build_profile(threads=threads)
+        verilatorCompile([join(VERILOG_SRCS, "Cntr.v")], build_dir, profile)
+        module_file_name = generatePythonModuleWrapper(
+            "Cntr", "Cntr_threaded", build_dir,
+            format_accessible_signals(CNTR_ACCESSIBLE_SIGNALS, "Cntr"),
+            profile=profile)
+        sim_cls = getattr(loadPythonCExtensionFromFile(module_file_name, "Cntr_threaded"),
+                          "Cntr_threaded")
+        return sim_cls()
+
+    def test_threaded_model(self):
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.cntr_threaded_build(build_dir)
+            io = rtl_sim.io
+            sim = HdlSimulator(rtl_sim)
+            data = []
+            procs = [
+                get_clk_driver(sim, io.clk, CLK_PERIOD),
+                get_rst_driver(sim, io.rst, CLK_PERIOD),
+                get_pull_up_driver(sim, io.en, CLK_PERIOD),
+                get_sync_sig_monitor(sim, io.val, io.clk, io.rst, data)
+            ]
+            sim.run(int(CLK_PERIOD * 10.5), extraProcesses=procs)
+            self.assertSequenceEqual(data, REF_DATA)
+
+    def test_threaded_model_display_threads(self):
+        """
+        Independent instances of the multithreaded model with $display/$sformat
+        evaluated in parallel in Python threads (the GIL is released during the evaluation)
+        """
+        profile = get_build_profile(threads=2)
+        with TemporaryDirectory() as build_dir:
+            verilatorCompile([join(VERILOG_SRCS, "CntrDisplay.v")], build_dir, profile)
+            module_file_name = generatePythonModuleWrapper(
+                "CntrDisplay", "CntrDisplay_threaded", build_dir,
+                format_accessible_signals(CNTR_DISPLAY_ACCESSIBLE_SIGNALS, "CntrDisplay"),
+                profile=profile)
+            sim_cls = getattr(
+                loadPythonCExtensionFromFile(module_file_name, "CntrDisplay_threaded"),
+                "CntrDisplay_threaded")
+
+            def run_sim(rtl_sim):
+                io = rtl_sim.io
+                sim = HdlSimulator(rtl_sim)
+                data = []
+                procs = [
+                    get_clk_driver(sim, io.clk, CLK_PERIOD),
+                    get_rst_driver(sim, io.rst, CLK_PERIOD),
+                    get_sync_sig_monitor(sim, io.val, io.clk, io.rst, data)
+                ]
+                sim.run(CLK_PERIOD * 100, extraProcesses=procs)
+                return data
+
+            ref = run_sim(sim_cls())
+            self.assertEqual(len(ref), 99)
+            sims = [sim_cls() for _ in range(4)]
+            with ThreadPoolExecutor(len(sims)) as executor:
+                for data in executor.map(run_sim, sims):
+                    self.assertSequenceEqual(data, ref)
+
+    def test_threaded_model_event_order(self):
+        """
+        The processes waiting on the edges observe the same values in the same order
+        in the single and multithreaded model (the multithreaded model does not
+        pause in BEFORE_EDGE)
+        """
+        def run_sim(rtl_sim):
+            io = rtl_sim.io
+            sim = HdlSimulator(rtl_sim)
+            events = []
+
+            def monitor(name, sig, trigger_cls):
+                while True:
+                    yield trigger_cls(sig)
+                    yield WaitCombRead()
+                    events.append((sim.now, name, int(io.val.read()), int(io.rst.read())))
+
+            procs = [
+                get_clk_driver(sim, io.clk, CLK_PERIOD),
+                get_rst_driver(sim, io.rst, CLK_PERIOD),
+                get_pull_up_driver(sim, io.en, CLK_PERIOD),
+                monitor("clk_rising", io.clk, RisingEdge),
+                monitor("clk_falling", io.clk, FallingEdge),
+                monitor("val", io.val, Edge),
+            ]
+            sim.run(int(CLK_PERIOD * 10.5), extraProcesses=procs)
+            return events
+
+        with TemporaryDirectory() as build_dir0, TemporaryDirectory() as build_dir1:
+            ref = run_sim(self.cntr_build(build_dir0))
+            rtl_sim = self.cntr_threaded_build(build_dir1)
+            self.assertSequenceEqual(run_sim(rtl_sim), ref)
+            self.assertTrue(any(name == "val" for _, name, _, _ in ref))
+
+            with self.assertRaises(NotImplementedError):
+                rtl_sim.eval_to(rtl_sim.BEFORE_EDGE)
+
     def test_sim_cntr_pull_up_reset(self):
         """
         Clock dependency on clk
@@ -163,6 +407,208 @@ class VerilatorCntrTC(unittest.TestCase):
 
             self.assertSequenceEqual(data, REF_DATA)
 
+    def test_sim_cntr_native_clk(self):
+        """
+        Clock generated by RTL simulator
+            * monitor of val
+        """
+        # build_dir = "tmp"
+        # if True:
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.cntr_build(build_dir)
+            io = rtl_sim.io
+            sim = HdlSimulator(rtl_sim)
+            data = []
+
+            sim.add_clock(io.clk, CLK_PERIOD)
+            procs = [
+                get_rst_driver(sim, io.rst, CLK_PERIOD),
+                get_pull_up_driver(sim, io.en, CLK_PERIOD),
+                get_sync_sig_monitor(sim, io.val, io.clk, io.rst, data)
+            ]
+            sim.run(int(CLK_PERIOD * 10.5), extraProcesses=procs)
+
+            self.assertSequenceEqual(data, REF_DATA)
+
+    def test_run_cycles(self):
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.cntr_build(build_dir)
+            io = rtl_sim.io
+            rtl_sim.add_clock(io.clk, CLK_PERIOD)
+            io.rst.write(0)
+            io.en.write(1)
+            cycles, ev = rtl_sim.run_cycles(io.clk, 5)
+            self.assertEqual(cycles, 5)
+            self.assertIsNone(ev)
+            self.assertEqual(rtl_sim.time, 9 * CLK_PERIOD // 2)
+            rtl_sim.finalize()
+
+    def test_run_cycles_skip_idle(self):
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.cntr_build(build_dir)
+            self.assertTrue(sys.modules["Cntr"].IDLE_SKIP_SUPPORTED)
+            io = rtl_sim.io
+            rtl_sim.add_clock(io.clk, CLK_PERIOD)
+            io.rst.write(0)
+            io.en.write(0)
+            cycles, ev = rtl_sim.run_cycles(io.clk, 1000, until=CLK_PERIOD * 10000,
+                                            skip_idle=True)
+            self.assertEqual(cycles, 1000)
+            self.assertIsNone(ev)
+            self.assertEqual(rtl_sim.time, (2 * 1000 - 1) * CLK_PERIOD // 2)
+            rtl_sim.finalize()
+
+    def test_run_cycles_skip_idle_random(self):
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = build_sim(["CntrRandomEn.v"], CNTR_RANDOM_EN_ACCESSIBLE_SIGNALS,
+                                self, build_dir, "CntrRandomEn")
+            # the state of $random is not part of the model, the design must not be skipped
+            self.assertFalse(sys.modules["CntrRandomEn"].IDLE_SKIP_SUPPORTED)
+            io = rtl_sim.io
+            rtl_sim.add_clock(io.clk, CLK_PERIOD)
+            cycles, ev = rtl_sim.run_cycles(io.clk, 1000, until=CLK_PERIOD * 10000,
+                                            skip_idle=True)
+            self.assertEqual(cycles, 1000)
+            self.assertIsNone(ev)
+            rtl_sim.eval()
+            # the counter is enabled in 1/4 of the cycles, all cycles were evaluated
+            self.assertGreater(io.val.read(), 150)
+            rtl_sim.finalize()
+
+    def test_run_cycles_skip_idle_c(self):
+        with TemporaryDirectory() as build_dir:
+            # the same ports as CntrRandomEn
+            rtl_sim = build_sim(["CntrCEn.v"], CNTR_RANDOM_EN_ACCESSIBLE_SIGNALS,
+                                self, build_dir, "CntrCEn")
+            # rand() called from $c is not a known pure call, the design must not be skipped
+            self.assertFalse(sys.modules["CntrCEn"].IDLE_SKIP_SUPPORTED)
+            io = rtl_sim.io
+            rtl_sim.add_clock(io.clk, CLK_PERIOD)
+            cycles, ev = rtl_sim.run_cycles(io.clk, 1000, until=CLK_PERIOD * 10000,
+                                            skip_idle=True)
+            self.assertEqual(cycles, 1000)
+            self.assertIsNone(ev)
+            rtl_sim.eval()
+            self.assertGreater(io.val.read(), 150)
+            rtl_sim.finalize()
+
+    def test_snapshot_restore(self):
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.cntr_build(build_dir)
+            io = rtl_sim.io
+            sim = HdlSimulator(rtl_sim)
+            sim.add_clock(io.clk, CLK_PERIOD)
+            # warm up, reset and enable of the counter
+            sim.run(CLK_PERIOD * 2, extraProcesses=[
+                get_rst_driver(sim, io.rst, CLK_PERIOD),
+                get_pull_up_driver(sim, io.en, CLK_PERIOD),
+            ])
+            snapshot = sim.snapshot()
+
+            def run_test_case():
+                data = []
+
+                def data_collector():
+                    while True:
+                        yield Timer(CLK_PERIOD)
+                        yield WaitCombStable()
+                        data.append((sim.now, int(io.val.read())))
+
+                sim.run(CLK_PERIOD * 5, extraProcesses=[data_collector()])
+                return data
+
+            data0 = run_test_case()
+            sim.restore(snapshot)
+            self.assertEqual(sim.now, snapshot.now)
+            data1 = run_test_case()
+            self.assertEqual(len(data0), 5)
+            self.assertSequenceEqual(data0, data1)
+
+    def test_subscribe_multiple_runs(self):
+        """
+        The persistent subscription stays after the end of HdlSimulator.run
+        and after restore (only the processes waiting on events are dropped)
+        """
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.cntr_build(build_dir)
+            io = rtl_sim.io
+            sim = HdlSimulator(rtl_sim)
+            sim.add_clock(io.clk, CLK_PERIOD)
+            data = []
+
+            def monitor():
+                data.append((sim.now, int(io.val.read())))
+
+            sim.run(CLK_PERIOD * 2, extraProcesses=[
+                get_rst_driver(sim, io.rst, CLK_PERIOD),
+                get_pull_up_driver(sim, io.en, CLK_PERIOD),
+                CallbackLoop(sim, io.val, monitor, lambda: True,
+                             phase=SimCallback.COMB_READ)(),
+            ])
+            snapshot = sim.snapshot()
+            data0_len = len(data)
+            sim.run(CLK_PERIOD * 4)
+            data1 = data[data0_len:]
+            self.assertEqual(len(data1), 4)
+
+            sim.restore(snapshot)
+            del data[data0_len:]
+            sim.run(CLK_PERIOD * 4)
+            self.assertSequenceEqual(data[data0_len:], data1)
+
+            # the reference cycle simulator - subscription - simulator is collected
+            sim_ref = weakref.ref(sim)
+            del rtl_sim, io, sim, monitor
+            gc.collect()
+            self.assertIsNone(sim_ref())
+
+    def test_checkpoint_resume(self):
+        with TemporaryDirectory() as build_dir, TemporaryDirectory() as checkpoint_dir:
+            rtl_sim = self.cntr_build(build_dir)
+            io = rtl_sim.io
+            sim = HdlSimulator(rtl_sim)
+            sim.add_clock(io.clk, CLK_PERIOD)
+            sim.run(CLK_PERIOD * 10, extraProcesses=[
+                get_rst_driver(sim, io.rst, CLK_PERIOD),
+                get_pull_up_driver(sim, io.en, CLK_PERIOD),
+            ], checkpoint_every=CLK_PERIOD * 4, checkpoint_dir=checkpoint_dir)
+            self.assertEqual(sim.checkpoint_stats.cnt, 2)
+
+            # resume in new instance of the simulator
+            rtl_sim1 = rtl_sim.__class__()
+            sim1 = HdlSimulator(rtl_sim1)
+            sim1.add_clock(rtl_sim1.io.clk, CLK_PERIOD)
+            sim1.restore(load_checkpoint(find_last_checkpoint(checkpoint_dir)))
+            self.assertEqual(sim1.now, CLK_PERIOD * 8)
+
+            def collect(sim, io, end):
+                data = []
+
+                def data_collector():
+                    while True:
+                        yield Timer(CLK_PERIOD)
+                        yield WaitCombStable()
+                        data.append((sim.now, int(io.val.read())))
+
+                sim.run(end - sim.now, extraProcesses=[data_collector()])
+                return data
+
+            data0 = collect(sim, io, CLK_PERIOD * 14)
+            data1 = collect(sim1, rtl_sim1.io, CLK_PERIOD * 14)
+            self.assertSequenceEqual(data0, data1[2:])
+
+    def test_eval_to(self):
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.cntr_build(build_dir)
+            io = rtl_sim.io
+            io.clk.write(0)
+            io.rst.write(1)
+            io.en.write(0)
+            self.assertEqual(rtl_sim.eval_to(rtl_sim.BEFORE_EDGE), rtl_sim.BEFORE_EDGE)
+            self.assertEqual(rtl_sim.eval_to(rtl_sim.END_OF_STEP), rtl_sim.END_OF_STEP)
+            self.assertEqual(int(io.val.read()), 0)
+            rtl_sim.finalize()
+
     def test_sim_normal_agents(self):
         # build_dir = "tmp"
         # if True:
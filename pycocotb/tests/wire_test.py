@@ -1,4 +1,5 @@
 from os.path import join
+import sys
 from tempfile import TemporaryDirectory
 import unittest
 
@@ -64,10 +65,86 @@ class VerilatorWireTC(unittest.TestCase):
         data = [1 << x for x in range(63)]
         self._test_sim_wire(64, data)
 
+    def test_wire64_full_range(self):
+        # values which do not fit to signed 64b int
+        data = [0, (1 << 64) - 1, 1 << 63, 1, (1 << 63) - 1]
+        self._test_sim_wire(64, data)
+
     def test_wire128(self):
         data = [1 << x for x in range(127)]
         self._test_sim_wire(128, data)
 
+    def test_wire128_bytes(self):
+        DW = 128
+        test_data = [(1 << x).to_bytes(DW // 8, "little") for x in range(127)]
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.build_sim(build_dir, DW, f"wire{DW:d}")
+            io = rtl_sim.io
+            sim = HdlSimulator(rtl_sim)
+
+            r_data = []
+
+            def data_collect():
+                for i, d_ref in enumerate(test_data):
+                    yield WaitCombRead()
+                    if i % 2:
+                        d = io.outp.read_bytes()
+                    else:
+                        # view of the memory in the simulator
+                        d = bytes(memoryview(io.outp))
+                    r_data.append(d)
+                    self.assertEqual(d, d_ref)
+                    yield Timer(CLK_PERIOD)
+
+            def data_feed():
+                for i, d in enumerate(test_data):
+                    yield WaitWriteOnly()
+                    if i % 2:
+                        io.inp.write_bytes(d)
+                    else:
+                        memoryview(io.inp)[:] = d
+                    yield Timer(CLK_PERIOD)
+
+            sim.run(int(CLK_PERIOD * (len(test_data) + 0.5)),
+                    extraProcesses=[
+                        data_collect(),
+                        data_feed()
+                        ]
+                    )
+            self.assertEqual(len(r_data), len(test_data))
+            # the read only phase, the view is read only
+            self.assertTrue(memoryview(io.outp).readonly)
+            with self.assertRaises(AssertionError):
+                io.inp.write_bytes(test_data[0])
+
+    def test_wire2_view_phase_change(self):
+        DW = 2
+        with TemporaryDirectory() as build_dir:
+            rtl_sim = self.build_sim(build_dir, DW, f"wire{DW:d}")
+            io = rtl_sim.io
+            refcnt = sys.getrefcount(rtl_sim)
+            rtl_sim.set_write_only()
+            v = memoryview(io.inp)
+            self.assertFalse(v.readonly)
+            # the view keeps the simulator alive
+            self.assertEqual(sys.getrefcount(rtl_sim), refcnt + 1)
+            v[0] = 0xff
+            # the view would remain writable in the read only phase
+            with self.assertRaises(BufferError):
+                rtl_sim.eval()
+            with self.assertRaises(BufferError):
+                rtl_sim.set_write_only()
+            with self.assertRaises(BufferError):
+                rtl_sim.reset_eval()
+
+            v.release()
+            self.assertEqual(sys.getrefcount(rtl_sim), refcnt)
+            rtl_sim.eval()
+            # the bits above the width of the signal were cleared on release
+            self.assertEqual(io.inp.read_bytes(), b"\x03")
+            self.assertEqual(io.outp.read(), 3)
+            self.assertTrue(memoryview(io.outp).readonly)
+
 
 if __name__ == "__main__":
     suite = unittest.TestSuite()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pycocotb.simCalendar import DONE
 
 
@@ -49,18 +51,36 @@ def raise_StopSimulation(sim):
 
 
 class Action():
+    __slots__ = []
 
     def applyProcess(self, sim, process):
         raise NotImplementedError()
 
 
-# [TODO] RisingEdge/FallingEdge with support in c++ code
+class PhaseAction(Action):
+    """
+    Base class of the actions which are waiting for a phase of the actual
+    time slot, these actions do not have any state and only a single
+    instance of each class is created (the instance is reused)
+    """
+    __slots__ = []
+
+    def __new__(cls):
+        self = cls.__dict__.get("_instance", None)
+        if self is None:
+            self = super(PhaseAction, cls).__new__(cls)
+            cls._instance = self
+        return self
+
+
 class Edge(Action):
     """
     :note: if multiple signals specified the process will be triggered on first
         edge on any signal, once at most
     """
 
+    __slots__ = ["signals"]
+
     def __init__(self, *signals: "RtlSignal"):
         self.signals = signals
 
@@ -84,16 +104,123 @@ class Edge(Action):
         return False
 
 
+class RisingEdge(Action):
+    """
+    Wait for the change of the signal to a value with bit 0 set
+    (the edge is resolved by the RTL simulator, the process is not woken
+    on the other edge)
+    """
+
+    __slots__ = ["signal"]
+
+    def __init__(self, signal: "RtlSignal"):
+        self.signal = signal
+
+    def applyProcess(self, sim, process):
+        self.signal.wait_rising(process)
+        return False
+
+
+class FallingEdge(Action):
+    """
+    Wait for the change of the signal to a value with bit 0 cleared
+    (the edge is resolved by the RTL simulator, the process is not woken
+    on the other edge)
+    """
+
+    __slots__ = ["signal"]
+
+    def __init__(self, signal: "RtlSignal"):
+        self.signal = signal
+
+    def applyProcess(self, sim, process):
+        self.signal.wait_falling(process)
+        return False
+
+
+class WaitValue(Action):
+    """
+    Wait for the change of the signal to a value where (signal & mask) == (value & mask)
+
+    The condition is checked by the RTL simulator, the process is not woken
+    by the changes to other values.
+
+    :note: the process waits for the change, it is not woken if the signal already
+        has the value when the process starts waiting
+    :note: mask=None means all bits of the signal
+    """
+
+    __slots__ = ["signal", "value", "mask"]
+
+    def __init__(self, signal: "RtlSignal", value: int, mask: Optional[int]=None):
+        self.signal = signal
+        self.value = value
+        self.mask = mask
+
+    def applyProcess(self, sim, process):
+        self.signal.wait_value(process, self.value, self.mask)
+        return False
+
+
+class SimCallback():
+    """
+    Plain (non-generator) callback fn(sim) which is called directly by
+    :class:`pycocotb.hdlSimulator.HdlSimulator` in the specified phase of the time slot,
+    no generator is created or resumed for it
+
+    Used as a subscriber of the signal (signal.subscribe(SimCallback(fn, phase), edge)),
+    the callback is called in the phase of the time slot where it was triggered.
+    If the phase is already done the callback is called in the actual phase
+    (same as :class:`~.WaitCombRead`/:class:`~.WaitCombStable`).
+
+    :note: the callback can only read the signals, the return value is ignored
+    :cvar COMB_READ: the combinational logic was evaluated, the values may still change
+        by the writes of the simulation processes
+    :cvar COMB_STABLE: the combinational logic is stable
+    :cvar MEM_STABLE: the memories (registers) are updated
+    """
+    COMB_READ = "comb_read"
+    COMB_STABLE = "comb_stable"
+    MEM_STABLE = "mem_stable"
+
+    __slots__ = ["fn", "phase"]
+
+    def __init__(self, fn, phase: str=COMB_READ):
+        assert phase in (self.COMB_READ, self.COMB_STABLE, self.MEM_STABLE), phase
+        self.fn = fn
+        self.phase = phase
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__:s} {self.fn!r} {self.phase:s}>"
+
+
 class Timer(Action):
     """
     Container for wait time of processes
 
     next activation of process will be now + time
-    """
 
-    def __init__(self, time: int):
-        assert isinstance(time, int)
+    :note: the instances are immutable and the instances for the most common
+        times are cached and reused
+    """
+    __slots__ = ["time"]
+    # max number of cached instances
+    CACHE_SIZE = 1024
+    _cache = {}
+
+    def __new__(cls, time: int):
+        # checked before the lookup, Timer(5.0) would find the cached Timer(5)
+        assert isinstance(time, int), time
+        if cls is Timer:
+            self = Timer._cache.get(time, None)
+            if self is not None:
+                return self
+
+        self = super(Timer, cls).__new__(cls)
         self.time = time
+        if cls is Timer and len(Timer._cache) < Timer.CACHE_SIZE:
+            Timer._cache[time] = self
+        return self
 
     def applyProcess(self, sim, process):
         sim._schedule_proc(sim.now + self.time, process)
@@ -104,7 +231,8 @@ class Timer(Action):
         return f"<{self.__class__.__name__:s} {self.time}>"
 
 
-class WaitWriteOnly(Action):
+class WaitWriteOnly(PhaseAction):
+    __slots__ = []
 
     def applyProcess(self, sim, process):
         t = sim._current_time_slot
@@ -118,7 +246,8 @@ class WaitWriteOnly(Action):
         return False
 
 
-class WaitCombRead(Action):
+class WaitCombRead(PhaseAction):
+    __slots__ = []
 
     def applyProcess(self, sim, process):
         t = sim._current_time_slot
@@ -132,7 +261,8 @@ class WaitCombRead(Action):
         return False
 
 
-class WaitCombStable(Action):
+class WaitCombStable(PhaseAction):
+    __slots__ = []
 
     def applyProcess(self, sim, process):
         t = sim._current_time_slot
@@ -147,7 +277,8 @@ class WaitCombStable(Action):
         return False
 
 
-class WaitTimeslotEnd(Action):
+class WaitTimeslotEnd(PhaseAction):
+    __slots__ = []
 
     def applyProcess(self, sim, process):
         t = sim._current_time_slot
@@ -0,0 +1,237 @@
+"""
+Persistent cache of the compiled simulator modules
+
+The simulator module is stored under the hash of everything which affects the build
+(Verilog sources and includes, accessible signals, rendered wrapper, pycocotb c++ headers,
+Verilator version and flags, compiler and its flags, build profile). If the module is found in the cache
+the Verilator and the c++ compilation is skipped entirely.
+
+Cache directory layout::
+
+    cache_dir/
+        <hash>/                 complete entry (mtime of the directory = last use)
+            <module>.so
+        tmp-<hash>-<pid>-<rnd>/ entry which is being written (or removed)
+
+The simulator build with profile guided optimization (pgo_training) is stored
+under "<hash>-pgo" and it is preferred also by the builds without training
+(the training changes only the performance of the module).
+
+The entry is always written to a temporary directory and renamed to its final name,
+the rename is atomic so the other processes see only complete entries.
+If more processes build the same entry concurrently the first rename wins and the others
+use the existing entry. The evicted entries are also renamed first and then removed.
+"""
+from functools import lru_cache
+import hashlib
+import os
+import shutil
+from subprocess import check_output, CalledProcessError
+import sysconfig
+from tempfile import mkdtemp
+from typing import List, Tuple, Dict, Optional
+
+from pycocotb.verilator.fs_utils import find_files
+from pycocotb.verilator.parallel_compile import ObjectCache
+from pycocotb.verilator.simulator_gen import VERILATOR_FLAGS, \
+    COCOPY_SRC_DIR, DEFAULT_EXTENSION_EXTRA_ARGS, verilatorCompile, \
+    generatePythonModuleWrapper, renderPythonModuleWrapper, \
+    VerilatorBuildProfile, get_build_profile, hashFile, hashVerilogInputs, \
+    VERILATOR_THREADED_SRCS
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pycocotb", "build")
+# max size of the cache in bytes (the least recently used entries are removed first)
+DEFAULT_MAX_SIZE = 1 << 30
+TMP_PREFIX = "tmp-"
+PGO_KEY_SUFFIX = "-pgo"
+
+
+@lru_cache(maxsize=None)
+def get_tool_version(cmd: Tuple[str, ...]) -> str:
+    """
+    :return: output of the command (e.g. --version of Verilator) or "" if the command failed
+    """
+    try:
+        return check_output(cmd).decode()
+    except (OSError, CalledProcessError):
+        return ""
+
+
+def get_build_source_files(profile: VerilatorBuildProfile) -> List[str]:
+    """
+    :return: the c++ sources and headers which are compiled to the simulator module
+        or to the common library it is linked with (the Verilator runtime sources
+        are compiled to the module of the multithreaded model)
+    """
+    files = set()
+    for p in ("*.h", "*.cpp"):
+        files.update(find_files(COCOPY_SRC_DIR, p, recursive=False))
+    files = sorted(files)
+    if profile.threads > 1:
+        files.extend(VERILATOR_THREADED_SRCS)
+    return files
+
+
+class VerilatorBuildCache():
+    """
+    Content-addressed cache of the simulator modules with LRU eviction
+
+    :ivar ~.cache_dir: directory where the modules are stored
+    :ivar ~.max_size: max size of the cache in bytes
+    """
+
+    def __init__(self, cache_dir: str=DEFAULT_CACHE_DIR, max_size: int=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def get_key(self, verilog_files: List[str], top_name: str, top_unique_name: str,
+                accessible_signals: List[Tuple[str, bool, bool, int]],
+                extra_Extension_args: Dict[str, object],
+                profile: Optional[VerilatorBuildProfile]=None) -> str:
+        """
+        :return: hash of all inputs of the build
+        """
+        if profile is None:
+            profile = get_build_profile()
+        h = hashlib.sha256()
+        hashVerilogInputs(h, verilog_files)
+        for f in get_build_source_files(profile):
+            hashFile(h, f)
+
+        h.update(renderPythonModuleWrapper(
+            top_name, top_unique_name, accessible_signals, profile=profile).encode())
+        h.update(repr(VERILATOR_FLAGS).encode())
+        h.update(repr(profile.to_dict()).encode())
+        h.update(get_tool_version((profile.verilator, "--version")).encode())
+
+        cxx = sysconfig.get_config_var("CXX") or "c++"
+        h.update(get_tool_version((cxx.split()[0], "--version")).encode())
+        for v in ("CXX", "CFLAGS", "SOABI"):
+            h.update(repr(sysconfig.get_config_var(v)).encode())
+        h.update(repr(sorted(extra_Extension_args.items())).encode())
+
+        return h.hexdigest()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        :return: file name of the cached module or None
+        """
+        entry = os.path.join(self.cache_dir, key)
+        try:
+            files = os.listdir(entry)
+        except FileNotFoundError:
+            return None
+        if not files:
+            return None
+        # mark the entry as recently used
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            # evicted in meantime
+            return None
+        return os.path.join(entry, files[0])
+
+    def store(self, key: str, module_file_name: str) -> str:
+        """
+        Copy the module to the cache
+
+        :return: file name of the cached module
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = mkdtemp(prefix=f"{TMP_PREFIX:s}{key:s}-{os.getpid():d}-", dir=self.cache_dir)
+        shutil.copy2(module_file_name, tmp)
+        entry = os.path.join(self.cache_dir, key)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # other process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(entry):
+                raise
+
+        self.evict(keep=key)
+        return os.path.join(entry, os.path.basename(module_file_name))
+
+    def _entry_size(self, entry: str) -> int:
+        size = 0
+        for f in os.listdir(entry):
+            size += os.path.getsize(os.path.join(entry, f))
+        return size
+
+    def evict(self, keep: Optional[str]=None):
+        """
+        Remove the least recently used entries until the size of the cache is <= max_size
+
+        :param keep: key of the entry which should not be removed
+        """
+        entries = []
+        total_size = 0
+        for key in os.listdir(self.cache_dir):
+            if key.startswith(TMP_PREFIX):
+                continue
+            entry = os.path.join(self.cache_dir, key)
+            try:
+                size = self._entry_size(entry)
+                mtime = os.stat(entry).st_mtime
+            except FileNotFoundError:
+                # removed by other process
+                continue
+            entries.append((mtime, key, size))
+            total_size += size
+
+        entries.sort()
+        for _, key, size in entries:
+            if total_size <= self.max_size:
+                break
+            if key == keep:
+                continue
+            entry = os.path.join(self.cache_dir, key)
+            tmp = os.path.join(self.cache_dir, f"{TMP_PREFIX:s}{key:s}-{os.getpid():d}-evict")
+            try:
+                os.rename(entry, tmp)
+            except OSError:
+                # removed by other process
+                continue
+            shutil.rmtree(tmp, ignore_errors=True)
+            total_size -= size
+
+    def build(self, verilog_files: List[str], top_name: str, top_unique_name: str,
+              accessible_signals: List[Tuple[str, bool, bool, int]],
+              build_dir: str,
+              extra_Extension_args: Dict[str, object]=DEFAULT_EXTENSION_EXTRA_ARGS,
+              compile_jobs: Optional[int]=None,
+              obj_cache: Optional[ObjectCache]=None,
+              profile: Optional[VerilatorBuildProfile]=None,
+              pgo_training: Optional[str]=None) -> str:
+        """
+        Build the simulator module (verilatorCompile + generatePythonModuleWrapper)
+        or get it from the cache
+
+        :param build_dir: directory where the simulator is build on cache miss
+        :param compile_jobs: see :func:`generatePythonModuleWrapper`
+        :param obj_cache: see :func:`generatePythonModuleWrapper`
+        :param profile: see :func:`generatePythonModuleWrapper`
+        :param pgo_training: see :func:`generatePythonModuleWrapper`,
+            the module build with PGO is used if it is in the cache even if pgo_training is None
+        :return: file name of the module (.so/.dll file) for loadPythonCExtensionFromFile
+        """
+        if profile is None:
+            profile = get_build_profile()
+        key = self.get_key(verilog_files, top_name, top_unique_name,
+                           accessible_signals, extra_Extension_args, profile)
+        pgo_key = key + PGO_KEY_SUFFIX
+        module_file_name = self.lookup(pgo_key)
+        if module_file_name is None and pgo_training is None:
+            module_file_name = self.lookup(key)
+        if module_file_name is not None:
+            return module_file_name
+
+        verilatorCompile(verilog_files, build_dir, profile)
+        module_file_name = generatePythonModuleWrapper(
+            top_name, top_unique_name, build_dir,
+            accessible_signals, extra_Extension_args,
+            compile_jobs=compile_jobs, obj_cache=obj_cache, profile=profile,
+            pgo_training=pgo_training)
+        if pgo_training is not None:
+            key = pgo_key
+        return self.store(key, module_file_name)
@@ -1,45 +1,697 @@
 #include "pycocotb_sim.h"
+#include <algorithm>
 
-int PySim_eval_event_triggers(_PySim_t<void*>* self) {
-	for (auto s : *self->event_triggering_signals) {
+#ifdef VL_THREADED
+// the Verilator runtime of the multithreaded model is thread safe,
+// the DUT is evaluated with the GIL released
+#define PySim_BEGIN_DUT_EVAL Py_BEGIN_ALLOW_THREADS
+#define PySim_END_DUT_EVAL Py_END_ALLOW_THREADS
+#else
+// the runtime in the common library is build without thread support
+// ($display/$sformat buffers and Verilated:: state are plain globals),
+// the GIL has to be kept so only one simulator is evaluated at once
+#define PySim_BEGIN_DUT_EVAL {
+#define PySim_END_DUT_EVAL }
+#endif
+
+int PySim_eval_event_triggers(PySim_t* self) {
+	auto & watched = *self->event_triggering_signals;
+	size_t i = 0;
+	while (i < watched.size()) {
+		auto s = watched[i];
 		if (SignalMemProxy_value_changed(s)) {
-			_PyList_Extend(
-					reinterpret_cast<PyListObject*>(self->pending_event_list),
-					s->callbacks);
-			auto cbs = s->callbacks;
-			auto len = PySequence_Length(cbs);
-			if (len > 0) {
-				if (PySequence_DelSlice(cbs, 0, len) < 0) {
-					return -1;
-				}
+			if (SignalMemProxy_trigger_callbacks(s, self->pending_event_list) < 0)
+				return -1;
+			SignalMemProxy_cache_value(s);
+			if (!SignalMemProxy_has_callbacks(s)) {
+				// nobody waits for the next change, stop checking this signal
+				s->is_watched = false;
+				watched[i] = watched.back();
+				watched.pop_back();
+				continue;
 			}
+		}
+		i++;
+	}
+	return 0;
+}
+
+PySimMemSave::PySimMemSave() {
+	m_isOpen = true;
+	header();
+}
+
+void PySimMemSave::flush() {
+	data.insert(data.end(), m_bufp, m_cp);
+	m_cp = m_bufp;
+}
+
+void PySimMemSave::close() {
+	if (m_isOpen) {
+		trailer();
+		flush();
+		m_isOpen = false;
+	}
+}
+
+PySimMemSave::~PySimMemSave() {
+	close();
+}
+
+PySimMemRestore::PySimMemRestore(const uint8_t * data, size_t size) :
+		data(data), size(size), pos(0) {
+	m_isOpen = true;
+	m_endp = m_bufp;
+	header();
+}
+
+void PySimMemRestore::fill() {
+	// move the unread data to the beginning of the buffer
+	size_t remaining = m_endp - m_cp;
+	memmove(m_bufp, m_cp, remaining);
+	m_cp = m_bufp;
+	m_endp = m_bufp + remaining;
+	// and read the next part of the data behind them
+	size_t n = std::min(bufferSize() - remaining, size - pos);
+	memcpy(m_endp, data + pos, n);
+	pos += n;
+	m_endp += n;
+}
+
+void PySimMemRestore::close() {
+	if (m_isOpen) {
+		trailer();
+		m_isOpen = false;
+	}
+}
+
+PySimMemRestore::~PySimMemRestore() {
+	close();
+}
+
+bool PySim_is_end_of_step(PySim_t * self) {
+	return self->actual_sim_step == nullptr
+			|| self->actual_sim_step->get().first == SIM_EV_END_OF_STEP;
+}
+
+bool PySim_is_between_time_slots(PySim_t * self) {
+	return !self->read_only_not_write_only && PySim_is_end_of_step(self);
+}
+
+int PySim_reset_event_triggers(PySim_t * self) {
+	auto & watched = *self->event_triggering_signals;
+	size_t keep = 0;
+	for (auto s : watched) {
+		if (SignalMemProxy_clear_callbacks(s) < 0)
+			return -1;
+		if (SignalMemProxy_has_callbacks(s)) {
+			// the persistent subscriptions stay,
+			// the change of the value caused by restore is not an event
 			SignalMemProxy_cache_value(s);
+			watched[keep++] = s;
+		} else {
+			s->is_watched = false;
 		}
 	}
+	watched.resize(keep);
+	auto pending = self->pending_event_list;
+	return PySequence_DelSlice(pending, 0, PySequence_Length(pending));
+}
+
+/*
+ * The buffer views of the signals are valid only in the phase where they were
+ * acquired, the simulation can not continue until they are released
+ *
+ * @return 0 if there is not any buffer view, -1 and BufferError otherwise
+ * */
+static int PySim_check_no_buffer_exports(PySim_t * self) {
+	if (self->buffer_exports) {
+		PyErr_Format(PyExc_BufferError,
+				"Simulation can not continue while %zd buffer view(s) of the signals exist"
+				" (release them first)", self->buffer_exports);
+		return -1;
+	}
 	return 0;
 }
 
-PyObject * PySim_set_write_only(_PySim_t<void*> * self, PyObject* args) {
+PyObject * PySim_set_write_only(PySim_t * self, PyObject* args) {
+	if (PySim_check_no_buffer_exports(self) < 0)
+		return nullptr;
 	self->read_only_not_write_only = false;
 	Py_RETURN_NONE;
 }
 
+void PySim_apply_clocks(PySim_t * self) {
+	for (auto & c : *self->clocks) {
+		auto s = c.sig;
+		if (s->signal == nullptr)
+			continue;
+		memset(s->signal, 0, s->signal_bytes);
+		s->signal[0] = PySimClock_value(c, self->time);
+	}
+}
+
+PyObject * PySim_add_clock(PySim_t * self, PyObject* args, PyObject* kwds) {
+	static const char *kwlist[] = {"sig", "period", "phase", "init_wait", nullptr};
+	SignalMemProxy_t * sig = nullptr;
+	unsigned long long period = 0;
+	unsigned long long phase = 0;
+	unsigned long long init_wait = 0;
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O!K|KK", const_cast<char**>(kwlist),
+			&SignalMemProxy_pytype, &sig, &period, &phase, &init_wait)) {
+		return nullptr;
+	}
+	if (period < 2) {
+		PyErr_SetString(PyExc_ValueError, "Clock period has to be >= 2");
+		return nullptr;
+	}
+	Py_INCREF(sig);
+	self->clocks->push_back({sig, period / 2, phase % period, init_wait});
+	Py_RETURN_NONE;
+}
+
+PyObject * PySim_next_clock_edge(PySim_t * self, PyObject* args) {
+	if (self->clocks->empty())
+		Py_RETURN_NONE;
+	vluint64_t t = 0;
+	bool first = true;
+	for (auto & c : *self->clocks) {
+		auto _t = PySimClock_next_edge(c, self->time);
+		if (first || _t < t) {
+			t = _t;
+			first = false;
+		}
+	}
+	return PyLong_FromUnsignedLongLong(t);
+}
+
 PyMemberDef PySim_members[8] = {
-	{(char *)"io", T_OBJECT, offsetof(_PySim_t<void>, io), 0,
+	{(char *)"io", T_OBJECT, offsetof(PySim_t, io), 0,
 			(char *)"container of signals in simulation"},
-	{(char *)"time", T_ULONGLONG, offsetof(_PySim_t<void>, time), 0,
+	{(char *)"time", T_ULONGLONG, offsetof(PySim_t, time), 0,
     	(char *)"actual simulation time"},
-    {(char *)"read_only_not_write_only", T_BOOL, offsetof(_PySim_t<void>, read_only_not_write_only), 0,
+    {(char *)"read_only_not_write_only", T_BOOL, offsetof(PySim_t, read_only_not_write_only), 0,
     	(char *)"if true the IO can be only read if false the IO can be only written"},
 
-	{(char *)"COMB_UPDATE_DONE", T_INT, offsetof(_PySim_t<void>, COMB_UPDATE_DONE), 0,
+	{(char *)"COMB_UPDATE_DONE", T_INT, offsetof(PySim_t, COMB_UPDATE_DONE), 0,
 			(char *)"all non edge dependent updates done"},
-	{(char *)"BEFORE_EDGE", T_INT, offsetof(_PySim_t<void>, BEFORE_EDGE), 0,
+	{(char *)"BEFORE_EDGE", T_INT, offsetof(PySim_t, BEFORE_EDGE), 0,
 			(char *)"before evaluation of edge dependent event"},
-    {(char *)"END_OF_STEP", T_INT, offsetof(_PySim_t<void>, END_OF_STEP), 0,
+    {(char *)"END_OF_STEP", T_INT, offsetof(PySim_t, END_OF_STEP), 0,
     		(char *)"all parts of circuit updated and stable"},
 
-	{(char *)"pending_event_list", T_OBJECT, offsetof(_PySim_t<void>, pending_event_list), 0,
+	{(char *)"pending_event_list", T_OBJECT, offsetof(PySim_t, pending_event_list), 0,
     		(char *)"List of triggered callbacks"},
     {nullptr}
 };
+
+int PySim_init(PySim_t* self, PySimDutBase * dut) {
+	self->dut = dut;
+	self->COMB_UPDATE_DONE = SIM_EV_COMB_UPDATE_DONE;
+	self->BEFORE_EDGE      = SIM_EV_BEFORE_EDGE;
+	self->END_OF_STEP      = SIM_EV_END_OF_STEP;
+	self->signals = new std::vector<SignalProxyPtr_t>();
+	self->event_triggering_signals = new std::vector<SignalMemProxy_t*>();
+	self->clocks = new std::vector<PySimClock_t>();
+	self->actual_sim_step = nullptr;
+	self->read_only_not_write_only = false;
+	self->in_eval = false;
+	self->buffer_exports = 0;
+	self->time = 0;
+	// turn on tracing
+	self->tfp = nullptr;
+	self->trace_file_name = nullptr;
+
+	self->io = PyObject_CallObject(reinterpret_cast<PyObject*>(&PySimIo_pytype), nullptr);
+	if (!self->io) {
+		PyErr_SetString(PyExc_AssertionError,
+						"Can not create simulation io");
+		return -1;
+	}
+	self->pending_event_list = PyList_New(0);
+	if (self->pending_event_list == nullptr) {
+		return -1;
+	}
+	return 0;
+}
+
+PyObject * PySim_set_trace_file(PySim_t * self, PyObject* args) {
+	char * trace_file = nullptr;
+	int trace_level = 99;
+	if (!PyArg_ParseTuple(args, "si", &trace_file, &trace_level))
+		return nullptr;
+
+	if (self->tfp != nullptr
+			&& strcmp(self->trace_file_name, trace_file) != 0) {
+		// different trace file will be used now
+		self->tfp->close();
+		Verilated::traceEverOn(true);
+		delete self->tfp;
+		self->tfp = nullptr;
+		free(self->trace_file_name);
+	} else if (self->tfp == nullptr) {
+		Verilated::traceEverOn(true);
+		self->trace_file_name = strdup(trace_file);
+		Verilated::traceEverOn(true);  // Verilator must compute traced signals
+		self->tfp = new VerilatedVcdC;
+		self->dut->dut_trace(self->tfp, trace_level); // Trace x levels of hierarchy
+		self->tfp->open(self->trace_file_name);  // Open the dump file
+		self->tfp->dump(0);
+	}
+
+	Py_RETURN_NONE;
+}
+
+PyObject * PySim_finalize(PySim_t* self, PyObject* args) {
+	// Cancel all pending python callbacks to prevent mem leaks
+	// (the persistent subscriptions stay for the next run)
+	for (auto & s : *self->signals) {
+		auto scl = s.scalar;
+		if (!scl)
+			continue;
+		if (SignalMemProxy_clear_callbacks(scl) < 0)
+			return nullptr;
+	}
+	delete self->actual_sim_step;
+	self->actual_sim_step = nullptr;
+	self->dut->dut_final();
+
+	if (self->tfp) {
+		self->tfp->flush();
+		self->tfp->close();
+		delete self->tfp;
+		self->tfp = nullptr;
+		free(self->trace_file_name);
+		self->trace_file_name = nullptr;
+	}
+	Py_RETURN_NONE;
+}
+
+int PySim_traverse(PySim_t* self, visitproc visit, void *arg) {
+	// the object may be only partially initialized (PySim_init, PySim_add_proxies)
+	Py_VISIT(self->io);
+	Py_VISIT(self->pending_event_list);
+	if (self->signals) {
+		for (auto & s : *self->signals) {
+			Py_VISIT(s.scalar);
+			Py_VISIT(s.vector);
+		}
+	}
+	if (self->clocks) {
+		for (auto & c : *self->clocks)
+			Py_VISIT(c.sig);
+	}
+	return 0;
+}
+
+void PySim_dealloc(PySim_t* self) {
+	PyObject_GC_UnTrack(self);
+	auto res = PySim_finalize(self, nullptr);
+	Py_DECREF(res);
+
+	delete self->event_triggering_signals;
+
+	for (auto & c : *self->clocks) {
+		Py_DECREF(c.sig);
+	}
+	delete self->clocks;
+
+	for (auto & s : *self->signals) {
+		s.destroy();
+	}
+	delete self->signals;
+	delete self->dut;
+	Py_XDECREF(self->io);
+	Py_XDECREF(self->pending_event_list);
+
+	Py_TYPE(self)->tp_free((PyObject*) self);
+}
+
+static void PySim_call_eval_sim(sim_step_t::push_type &sink, PySimDutBase * sim) {
+	sim->__pause_sink = &sink;
+	for (;;) {
+		sim->dut_eval();
+	}
+}
+
+/*
+ * Resume the evaluation of the DUT until next pause
+ *
+ * The evaluation of the DUT does not touch any Python object. In the multithreaded
+ * model (VL_THREADED) it runs with the GIL released and the simulators on different
+ * Python threads are evaluated in parallel (the event triggers are resolved after
+ * the GIL is reacquired), otherwise the GIL is kept because the Verilator runtime
+ * is not thread safe.
+ *
+ * @note a single simulator can not be used from multiple threads at once
+ * @return type of the pause (SimEventType) or -1 on error
+ * */
+int PySim_eval_step(PySim_t* self) {
+	if (PySim_check_no_buffer_exports(self) < 0)
+		return -1;
+	if (self->in_eval) {
+		PyErr_SetString(PyExc_RuntimeError,
+				"Simulator is already evaluated in an other thread");
+		return -1;
+	}
+	if (!self->read_only_not_write_only && !self->clocks->empty()) {
+		// new evaluation step, clock signals have to be updated for actual time
+		PySim_apply_clocks(self);
+	}
+	int end_type;
+	self->in_eval = true;
+	PySim_BEGIN_DUT_EVAL
+	if (self->actual_sim_step) {
+		(*(self->actual_sim_step))();
+	} else {
+		using std::placeholders::_1;
+		// _1 means first parameter of call_eval will be sim
+		// when coroutine obj. is constructed function is evaluated
+		// until sink is triggered
+		self->actual_sim_step = new sim_step_t::pull_type(
+				std::bind(PySim_call_eval_sim, _1, self->dut));
+	}
+	end_type = self->actual_sim_step->get().first;
+	// Dump trace data for this step
+	// end_type == SIM_EV_END_OF_STEP &&
+	if (self->tfp) {
+		// auto vlSymsp = self->dut->__VlSymsp;  // Setup global symbol table
+		// printf("dump-end-of-step %lu __Vm_activity: %u __Vm_didInit: %u \n",
+		// 		self->time, vlSymsp->__Vm_activity, vlSymsp->__Vm_didInit);
+		self->tfp->dump(self->time);
+	}
+	PySim_END_DUT_EVAL
+	self->in_eval = false;
+	self->read_only_not_write_only = true;
+
+	if (PySim_eval_event_triggers(self) < 0)
+		return -1;
+	return end_type;
+}
+
+PyObject * PySim_eval(PySim_t* self, PyObject* args) {
+	int end_type = PySim_eval_step(self);
+	if (end_type < 0)
+		return nullptr;
+	return PyLong_FromLong(end_type);
+}
+
+/*
+ * Run the simulation steps until the specified type of pause is reached
+ * (or until the end of the time slot)
+ *
+ * @note the evaluation stops in the first pause where some process
+ *       was woken by an event on signal
+ * @note the multithreaded model (VL_THREADED) does not pause in BEFORE_EDGE,
+ *       NotImplementedError is raised if it is requested
+ * @return type of the last pause
+ * */
+PyObject * PySim_eval_to(PySim_t* self, PyObject* args) {
+	int phase;
+	if (!PyArg_ParseTuple(args, "i", &phase))
+		return nullptr;
+#ifdef VL_THREADED
+	if (phase == SIM_EV_BEFORE_EDGE) {
+		// the multithreaded model can not pause before the clock edge (see onBeforeEdge)
+		PyErr_SetString(PyExc_NotImplementedError,
+				"BEFORE_EDGE pause is not available in multithreaded model");
+		return nullptr;
+	}
+#endif
+
+	int end_type;
+	do {
+		end_type = PySim_eval_step(self);
+		if (end_type < 0)
+			return nullptr;
+		if (PyList_GET_SIZE(self->pending_event_list) > 0)
+			break;
+	} while (end_type != phase && end_type != SIM_EV_END_OF_STEP);
+	return PyLong_FromLong(end_type);
+}
+
+/*
+ * Evaluate the clock edges and the DUT without returning to Python
+ * until the n cycles of clk are done, until the time limit is reached
+ * or until some process is woken by an event on signal
+ *
+ * @note the clk has to be added by add_clock first
+ * @note has to be called between time slots (simulator in write only phase)
+ * @return tuple (number of finished cycles, type of the pause or None)
+ *         the type of the pause is None if evaluation stopped on the end of a time slot,
+ *         otherwise the simulator is in the middle of the time slot in time self->time
+ *         and the evaluation of this time slot has to be finished by the caller
+ * @note if skip_idle is true and the values of the variables of the DUT did not change
+ *       during the whole cycle of clk the evaluation of the rest of the cycles before "until"
+ *       is skipped (the DUT is quiescent and only the clock is toggling), this is possible
+ *       only with a single clock generator, specified "until" and without trace
+ *       and only if the model of the DUT calls only known pure functions
+ *       (no $random, $time, file/console IO, DPI imports or calls in $c code,
+ *       IDLE_SKIP_SUPPORTED of the simulator module), otherwise skip_idle is ignored
+ * @warning the $c code which modifies the state outside of the model without any call
+ *       is not detected and the DUT which depends on it may be skipped incorrectly
+ * */
+PyObject * PySim_run_cycles(PySim_t* self, PyObject* args, PyObject* kwds) {
+	static const char *kwlist[] = {"clk", "n", "stop_on", "until", "skip_idle", nullptr};
+	SignalMemProxy_t * clk = nullptr;
+	unsigned long long n = 0;
+	PyObject * stop_on = Py_None;
+	PyObject * until_obj = Py_None;
+	int skip_idle = 0;
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O!K|OOp", const_cast<char**>(kwlist),
+			&SignalMemProxy_pytype, &clk, &n, &stop_on, &until_obj, &skip_idle)) {
+		return nullptr;
+	}
+	const PySimClock_t * c = nullptr;
+	for (auto & _c : *self->clocks) {
+		if (_c.sig == clk) {
+			c = &_c;
+			break;
+		}
+	}
+	if (c == nullptr) {
+		PyErr_SetString(PyExc_ValueError, "clk has to be added by add_clock first");
+		return nullptr;
+	}
+	if (!PySim_is_between_time_slots(self)) {
+		PyErr_SetString(PyExc_AssertionError,
+				"run_cycles can be called only between time slots");
+		return nullptr;
+	}
+	bool has_until = until_obj != Py_None;
+	vluint64_t until = 0;
+	if (has_until) {
+		until = PyLong_AsUnsignedLongLong(until_obj);
+		if (PyErr_Occurred())
+			return nullptr;
+	}
+	// cache the values of signals which should stop the evaluation when changed
+	std::vector<std::pair<SignalMemProxy_t*, std::vector<uint8_t>>> stop_on_values;
+	if (stop_on != Py_None) {
+		PyObject * it = PyObject_GetIter(stop_on);
+		if (it == nullptr)
+			return nullptr;
+		PyObject * item;
+		while ((item = PyIter_Next(it))) {
+			if (!PyObject_TypeCheck(item, &SignalMemProxy_pytype)) {
+				Py_DECREF(item);
+				Py_DECREF(it);
+				PyErr_SetString(PyExc_TypeError, "stop_on has to contain only SignalMemProxy objects");
+				return nullptr;
+			}
+			auto s = reinterpret_cast<SignalMemProxy_t*>(item);
+			stop_on_values.push_back({s, std::vector<uint8_t>(s->signal, s->signal + s->signal_bytes)});
+			Py_DECREF(item);
+		}
+		Py_DECREF(it);
+		if (PyErr_Occurred())
+			return nullptr;
+	}
+
+	// the skip of idle cycles is possible only if the clock is the only input
+	// which is changing and nobody is watching the clock edges in the trace
+	skip_idle = skip_idle && has_until && self->clocks->size() == 1 && self->tfp == nullptr
+			&& self->dut->dut_idle_skip_supported();
+	// serialized state of the DUT after the last rising edge of clk
+	std::vector<uint8_t> idle_state;
+
+	unsigned long long cycles = 0;
+	auto last_clk = PySimClock_value(*c, self->time);
+	while (cycles < n) {
+		// find the time of the next time slot
+		vluint64_t t = 0;
+		bool first = true;
+		for (auto & _c : *self->clocks) {
+			auto _t = PySimClock_next_edge(_c, self->time);
+			if (first || _t < t) {
+				t = _t;
+				first = false;
+			}
+		}
+		if (has_until && t >= until)
+			break;
+
+		self->time = t;
+		auto clk_v = PySimClock_value(*c, t);
+		bool is_rising_edge = clk_v && !last_clk;
+		if (is_rising_edge)
+			cycles++;
+		last_clk = clk_v;
+
+		int ev;
+		do {
+			ev = PySim_eval_step(self);
+			if (ev < 0)
+				return nullptr;
+			bool stop = PyList_GET_SIZE(self->pending_event_list) > 0;
+			for (auto & sv : stop_on_values) {
+				if (memcmp(sv.first->signal, sv.second.data(), sv.first->signal_bytes) != 0) {
+					stop = true;
+					break;
+				}
+			}
+			if (stop)
+				return Py_BuildValue("(Ki)", cycles, ev);
+		} while (ev != SIM_EV_END_OF_STEP);
+		// end of time slot, next one begins in write only phase
+		self->read_only_not_write_only = false;
+
+		if (skip_idle && is_rising_edge) {
+			// the serialized model contains only the values of its variables
+			// (not the pointers and the padding in the model)
+			PySimMemSave state;
+			self->dut->dut_save(state);
+			state.close();
+			if (state.data == idle_state) {
+				// the state of the DUT did not change during the whole clock cycle,
+				// the same will happen in all following cycles
+				// skip to the last rising edge before "until"
+				vluint64_t period = c->half_period * 2;
+				unsigned long long skip = (until - self->time - 1) / period;
+				if (skip > n - cycles)
+					skip = n - cycles;
+				self->time += skip * period;
+				cycles += skip;
+			} else {
+				std::swap(state.data, idle_state);
+			}
+		}
+	}
+	return Py_BuildValue("(KO)", cycles, Py_None);
+}
+
+/*
+ * Save the state of the simulation (the time and the values of all signals in DUT)
+ *
+ * @note has to be called between time slots
+ * @return bytes object with the state of the simulation
+ * */
+PyObject * PySim_snapshot(PySim_t* self, PyObject* args) {
+	if (!PySim_is_end_of_step(self)) {
+		PyErr_SetString(PyExc_AssertionError,
+				"snapshot can be taken only between time slots");
+		return nullptr;
+	}
+	PySimMemSave os;
+	os.write(&self->time, sizeof(self->time));
+	self->dut->dut_save(os);
+	os.close();
+	return PyBytes_FromStringAndSize(reinterpret_cast<const char*>(os.data.data()),
+			os.data.size());
+}
+
+/*
+ * Restore the state of the simulation saved by PySim_snapshot
+ *
+ * @note has to be called between time slots
+ * @note all processes waiting on events are dropped
+ * */
+PyObject * PySim_restore(PySim_t* self, PyObject* args) {
+	PyObject * state;
+	if (!PyArg_ParseTuple(args, "O!", &PyBytes_Type, &state))
+		return nullptr;
+	if (!PySim_is_end_of_step(self)) {
+		PyErr_SetString(PyExc_AssertionError,
+				"restore can be performed only between time slots");
+		return nullptr;
+	}
+	if (PySim_check_no_buffer_exports(self) < 0)
+		return nullptr;
+	PySimMemRestore os(reinterpret_cast<const uint8_t*>(PyBytes_AS_STRING(state)),
+			PyBytes_GET_SIZE(state));
+	os.read(&self->time, sizeof(self->time));
+	self->dut->dut_restore(os);
+	os.close();
+	// the next time slot starts in write only phase
+	self->read_only_not_write_only = false;
+	// the processes waiting on events belong to the state before restore
+	// and the change of the value caused by restore is not an event
+	if (PySim_reset_event_triggers(self) < 0)
+		return nullptr;
+	Py_RETURN_NONE;
+}
+
+PyObject * PySim_reset_eval(PySim_t* self, PyObject* args) {
+	if (PySim_check_no_buffer_exports(self) < 0)
+		return nullptr;
+	self->dut->__restart_delta_step = true;
+	self->read_only_not_write_only = false;
+	if (self->tfp) {
+		// printf("PySim_reset_eval %lu\n", self->time);
+		self->tfp->dump(self->time);
+	}
+	Py_RETURN_NONE;
+}
+
+PyMethodDef PySim_methods[] = {
+        {"eval", (PyCFunction)PySim_eval, METH_NOARGS, "single simulation step"},
+        {"eval_to", (PyCFunction)PySim_eval_to, METH_VARARGS,
+                "run simulation steps until the specified type of the pause (or the end of the time slot) is reached\n"
+                "the evaluation stops in the first pause where some process was woken by an event on signal\n"
+                ":return: the type of the last pause"},
+        {"reset_eval", (PyCFunction)PySim_reset_eval, METH_NOARGS, "reset evaluation"},
+        {"set_trace_file", (PyCFunction)PySim_set_trace_file, METH_VARARGS,
+                "set file where data from signals should be stored\n"
+                "\n"
+                ":param file_name: name of file where trace should be stored (path of vcd file e.g.)\n"
+                ":param trace_depth: number of hyerarchy levels which should be trraced (-1 = all)\n"
+        },
+        {"set_write_only", (PyCFunction)PySim_set_write_only, METH_NOARGS,
+                "set simulation to write only state, should be called before entering to new evaluation step"},
+        {"finalize", (PyCFunction)PySim_finalize, METH_NOARGS, "flush output and clean all pending actions"},
+        {"add_clock", (PyCFunction)PySim_add_clock, METH_VARARGS | METH_KEYWORDS,
+                "add clock generator which toggles the signal directly in the simulator\n"
+                "\n"
+                ":param sig: signal proxy of the clock signal\n"
+                ":param period: period of the clock\n"
+                ":param phase: time shift of the clock edges to earlier time (default 0)\n"
+                ":param init_wait: time until the clock signal is held in 0 (default 0)\n"
+        },
+        {"next_clock_edge", (PyCFunction)PySim_next_clock_edge, METH_NOARGS,
+                "get the first time after actual time where some clock signal changes (or None)"},
+        {"run_cycles", (PyCFunction)PySim_run_cycles, METH_VARARGS | METH_KEYWORDS,
+                "evaluate n cycles of clk without returning to python\n"
+                "\n"
+                ":param clk: clock signal added by add_clock\n"
+                ":param n: number of cycles to evaluate\n"
+                ":param stop_on: optional list of signals, the evaluation stops when any of them changes\n"
+                ":param until: optional time limit, time slots at this time and later are not evaluated\n"
+                ":param skip_idle: if True and the state of the DUT did not change during the whole cycle of clk\n"
+                "    the rest of the cycles before until is skipped (only with single clock, until and without trace\n"
+                "    and only if IDLE_SKIP_SUPPORTED of the simulator module is true, otherwise it is ignored)\n"
+                ":return: tuple (number of finished cycles, type of the pause or None)\n"
+                "    evaluation stops also if some process is woken by event on signal,\n"
+                "    if type of the pause is not None the simulator stopped in the middle of time slot"
+        },
+        {"snapshot", (PyCFunction)PySim_snapshot, METH_NOARGS,
+                "save the state of the simulation (time and values of all signals in DUT)\n"
+                "\n"
+                ":note: has to be called between time slots\n"
+                ":return: bytes object with the state which can be used in restore()"},
+        {"restore", (PyCFunction)PySim_restore, METH_VARARGS,
+                "restore the state of the simulation saved by snapshot()\n"
+                "\n"
+                ":note: has to be called between time slots\n"
+                ":note: all processes waiting on events are dropped"},
+        {nullptr}  /* Sentinel */
+};
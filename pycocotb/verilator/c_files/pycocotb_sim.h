@@ -1,29 +1,128 @@
 #pragma once
 
+#include <verilated_save.h>
 #include "pycocotb_common.h"
 #include "sim_io.h"
 
+/*
+ * Clock generator which toggles the signal directly in the simulator
+ * (without a python process which would write the value)
+ *
+ * The value of the signal is 0 until init_wait and after that it toggles
+ * every half_period, phase shifts the edges to earlier time.
+ * */
+struct PySimClock_t {
+	SignalMemProxy_t * sig;
+	vluint64_t half_period;
+	vluint64_t phase;
+	vluint64_t init_wait;
+};
+
+/*
+ * @return value of the clock signal in specified time
+ * */
+static inline uint8_t PySimClock_value(const PySimClock_t & c, vluint64_t t) {
+	if (t < c.init_wait)
+		return 0;
+	return ((t - c.init_wait + c.phase) / c.half_period) & 1;
+}
+
+/*
+ * @return first time after t where the value of the clock signal may change
+ * */
+static inline vluint64_t PySimClock_next_edge(const PySimClock_t & c, vluint64_t t) {
+	if (t < c.init_wait)
+		return c.init_wait;
+	vluint64_t k = (t - c.init_wait + c.phase) / c.half_period + 1;
+	return c.init_wait + k * c.half_period - c.phase;
+}
+
+/*
+ * VerilatedSerialize which stores the data in memory
+ * (used for snapshots of the simulation state)
+ * */
+class PySimMemSave: public VerilatedSerialize {
+public:
+	std::vector<uint8_t> data;
+
+	PySimMemSave();
+	virtual void flush() override;
+	virtual void close() override;
+	virtual ~PySimMemSave() override;
+};
+
+/*
+ * VerilatedDeserialize which reads the data from memory
+ * */
+class PySimMemRestore: public VerilatedDeserialize {
+	const uint8_t * data;
+	size_t size;
+	size_t pos;
+public:
+	PySimMemRestore(const uint8_t * data, size_t size);
+	virtual void fill() override;
+	virtual void close() override;
+	virtual ~PySimMemRestore() override;
+};
+
+/*
+ * Interface of the DUT model used by the PySim_* functions
+ *
+ * The generated wrapper of the Verilator model implements it, this allows
+ * the DUT independent functions to be compiled only once in the common library
+ * (the wrapper of the DUT contains only the signal table and the model specific glue).
+ * */
+class PySimDutBase {
+public:
+	sim_step_t::push_type* __pause_sink;
+	bool __comb_update_triggered;
+	bool __restart_delta_step;
+
+	PySimDutBase(): __pause_sink(nullptr), __comb_update_triggered(false),
+			__restart_delta_step(false) {
+	}
+	PySimDutBase(const PySimDutBase &) = delete;
+	// evaluate the DUT until the end of the time slot (pauses in the sim_step_t coroutine)
+	virtual void dut_eval() = 0;
+	virtual void dut_trace(VerilatedVcdC* tfp, int levels) = 0;
+	virtual void dut_final() = 0;
+	// serialize/deserialize the state of the model (Verilator --savable)
+	virtual void dut_save(VerilatedSerialize & os) = 0;
+	virtual void dut_restore(VerilatedDeserialize & os) = 0;
+	// false if the model depends on the state outside of its variables or has side effects
+	// ($random, $time, file IO, ...), the idle clock cycles of such model can not be skipped
+	virtual bool dut_idle_skip_supported() = 0;
+	virtual ~PySimDutBase() {
+	}
+};
+
 /*
  * Main Python type of the Verilator simulator
  * */
-template<typename DUT_t>
-struct _PySim_t {
+struct PySim_t {
 	PyObject_HEAD
 	// simulator of DUT
-	DUT_t * dut;
+	PySimDutBase * dut;
 	// coroutine of simulation step
 	sim_step_t::pull_type * actual_sim_step;
 	// python IO for signals
 	std::vector<SignalProxyPtr_t> * signals;
-	// set of singals which have sim. process which waits on event on this signal
-	std::unordered_set<SignalMemProxy_t*> * event_triggering_signals;
+	// signals which have sim. process which waits on event on this signal
+	// (dense list, the signal is removed when there is not any process waiting on it)
+	std::vector<SignalMemProxy_t*> * event_triggering_signals;
 	bool read_only_not_write_only;
+	// the DUT is evaluated (with the GIL released)
+	bool in_eval;
+	// number of the buffer views of the signals which were not released yet
+	Py_ssize_t buffer_exports;
 	// VCD writter
 	VerilatedVcdC* tfp;
 	// VCD file name
 	char * trace_file_name;
 	// list of sim. processes which should be woken up
 	PyObject * pending_event_list;
+	// clock signals generated directly by this simulator
+	std::vector<PySimClock_t> * clocks;
 	// Current simulation time
 	vluint64_t time;
 	// constants
@@ -33,131 +132,44 @@ struct _PySim_t {
 	PyObject * io; // object to store signal proxies under it's names
 };
 
-// The methods witch does not depend on DUT type are precompiled to same compilation time later
-int PySim_eval_event_triggers(_PySim_t<void*>* self);
-PyObject * PySim_eval(_PySim_t<void*>* self, PyObject* args);
-PyObject * PySim_set_write_only(_PySim_t<void*> * self, PyObject* args);
+// All methods of the simulator are DUT independent and they are precompiled
+// in the common library to save the compilation time of the simulator modules
+int PySim_eval_event_triggers(PySim_t* self);
+/*
+ * Initialize the simulator object with the DUT (everything except the signal proxies)
+ *
+ * @note the self takes the ownership of the dut
+ * @return 0 on success -1 on error
+ * */
+int PySim_init(PySim_t* self, PySimDutBase * dut);
+void PySim_dealloc(PySim_t* self);
+// visit the signals and the io of the simulator for the garbage collector
+// (the persistent subscriptions on the signals usually reference the simulator)
+int PySim_traverse(PySim_t* self, visitproc visit, void *arg);
+PyObject * PySim_set_trace_file(PySim_t * self, PyObject* args);
+PyObject * PySim_finalize(PySim_t* self, PyObject* args);
+// Resume the evaluation of the DUT until next pause
+// @return type of the pause (SimEventType) or -1 on error
+int PySim_eval_step(PySim_t* self);
+PyObject * PySim_eval(PySim_t* self, PyObject* args);
+PyObject * PySim_eval_to(PySim_t* self, PyObject* args);
+PyObject * PySim_run_cycles(PySim_t* self, PyObject* args, PyObject* kwds);
+PyObject * PySim_snapshot(PySim_t* self, PyObject* args);
+PyObject * PySim_restore(PySim_t* self, PyObject* args);
+PyObject * PySim_reset_eval(PySim_t* self, PyObject* args);
+PyObject * PySim_set_write_only(PySim_t * self, PyObject* args);
+PyObject * PySim_add_clock(PySim_t * self, PyObject* args, PyObject* kwds);
+PyObject * PySim_next_clock_edge(PySim_t * self, PyObject* args);
+// write actual values of the clock signals for actual time
+void PySim_apply_clocks(PySim_t * self);
+// @return true if the evaluation of the last time slot is finished
+bool PySim_is_end_of_step(PySim_t * self);
+// @return true if the simulator is not in the middle of the time slot
+// and the next time slot was not started yet
+bool PySim_is_between_time_slots(PySim_t * self);
+// drop all processes waiting on events (the persistent subscriptions stay) and update
+// the cache of the values used for the detection of the change of the signals
+int PySim_reset_event_triggers(PySim_t * self);
 
 extern PyMemberDef PySim_members[8];
-
-
-template<typename DUT_t>
-PyObject * PySim_set_trace_file(_PySim_t<DUT_t> * self, PyObject* args) {
-	char * trace_file = nullptr;
-	int trace_level = 99;
-	if (!PyArg_ParseTuple(args, "si", &trace_file, &trace_level))
-		return nullptr;
-
-	if (self->tfp != nullptr
-			&& strcmp(self->trace_file_name, trace_file) != 0) {
-		// different trace file will be used now
-		self->tfp->close();
-		Verilated::traceEverOn(true);
-		delete self->tfp;
-		self->tfp = nullptr;
-		free(self->trace_file_name);
-	} else if (self->tfp == nullptr) {
-		Verilated::traceEverOn(true);
-		self->trace_file_name = strdup(trace_file);
-		Verilated::traceEverOn(true);  // Verilator must compute traced signals
-		self->tfp = new VerilatedVcdC;
-		self->dut->trace(self->tfp, trace_level); // Trace x levels of hierarchy
-		self->tfp->open(self->trace_file_name);  // Open the dump file
-		self->tfp->dump(0);
-	}
-
-	Py_RETURN_NONE;
-}
-
-template<typename DUT_t>
-PyObject * PySim_finalize(_PySim_t<DUT_t>* self, PyObject* args) {
-	// Cancel all pending python callbacks to prevent mem leaks
-	for (auto & s : *self->signals) {
-		auto scl = s.scalar;
-		if (!scl)
-			continue;
-		auto cbs = scl->callbacks;
-		auto len = PySequence_Length(cbs);
-		if (len > 0) {
-			if (PySequence_DelSlice(cbs, 0, len) < 0) {
-				return nullptr;
-			}
-		}
-	}
-	delete self->actual_sim_step;
-	self->actual_sim_step = nullptr;
-	self->dut->final();
-
-	if (self->tfp) {
-		self->tfp->flush();
-		self->tfp->close();
-		delete self->tfp;
-		self->tfp = nullptr;
-		free(self->trace_file_name);
-		self->trace_file_name = nullptr;
-	}
-	Py_RETURN_NONE;
-}
-
-template<typename DUT_t>
-void PySim_dealloc(_PySim_t<DUT_t>* self) {
-	auto res = PySim_finalize(self, nullptr);
-	Py_DECREF(res);
-
-	delete self->event_triggering_signals;
-
-	for (auto & s : *self->signals) {
-		s.destroy();
-	}
-	delete self->signals;
-	delete self->dut;
-
-	Py_TYPE(self)->tp_free((PyObject*) self);
-}
-
-template<typename DUT_t>
-static void PySim_call_eval_sim(sim_step_t::push_type &sink, DUT_t * sim) {
-	sim->__pause_sink = &sink;
-	for (;;) {
-		sim->eval();
-	}
-}
-
-template<typename DUT_t>
-PyObject * PySim_eval(_PySim_t<DUT_t>* self, PyObject* args) {
-	if (self->actual_sim_step) {
-		(*(self->actual_sim_step))();
-	} else {
-		using std::placeholders::_1;
-		// _1 means first parameter of call_eval will be sim
-		// when coroutine obj. is constructed function is evaluated
-		// until sink is triggered
-		self->actual_sim_step = new sim_step_t::pull_type(
-				std::bind(PySim_call_eval_sim<DUT_t>, _1, self->dut));
-	}
-	self->read_only_not_write_only = true;
-
-	if (PySim_eval_event_triggers(reinterpret_cast<_PySim_t<void*>*>(self)) < 0)
-		return nullptr;
-	auto end_type = self->actual_sim_step->get().first;
-	// Dump trace data for this step
-	// end_type == SIM_EV_END_OF_STEP &&
-	if (self->tfp) {
-		// auto vlSymsp = self->dut->__VlSymsp;  // Setup global symbol table
-		// printf("dump-end-of-step %lu __Vm_activity: %u __Vm_didInit: %u \n",
-		// 		self->time, vlSymsp->__Vm_activity, vlSymsp->__Vm_didInit);
-		self->tfp->dump(self->time);
-	}
-	return PyLong_FromLong(end_type);
-}
-
-template<typename DUT_t>
-PyObject * PySim_reset_eval(_PySim_t<DUT_t>* self, PyObject* args) {
-	self->dut->__restart_delta_step = true;
-	self->read_only_not_write_only = false;
-	if (self->tfp) {
-		// printf("PySim_reset_eval %lu\n", self->time);
-		self->tfp->dump(self->time);
-	}
-	Py_RETURN_NONE;
-}
+extern PyMethodDef PySim_methods[];
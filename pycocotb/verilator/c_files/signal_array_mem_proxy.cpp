@@ -129,7 +129,7 @@ PyObject * SignalArrayMemProxy_sq_item(SignalArrayMemProxy_t * self,
 		}
 		SignalMemProxy_c_init(proxy, true, sig_addr, (*self->dim)[1],
 				self->is_signed, nullptr, nullptr,
-				self->read_only_not_write_only);
+				self->read_only_not_write_only, nullptr, nullptr);
 		return (PyObject* )proxy;
 	} else if (dims > 2) {
 		std::vector<size_t> type_width(dims - 1);
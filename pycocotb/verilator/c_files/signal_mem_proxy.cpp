@@ -1,6 +1,7 @@
 #include "signal_mem_proxy.h"
 #include <structmember.h>
 #include <assert.h>
+#include <climits>
 
 static inline uint8_t MASK(uint8_t bits) {
 	return (1 << bits) - 1;
@@ -13,8 +14,9 @@ inline void SET_INVALID(void * d, size_t size) {
 
 void SignalMemProxy_c_init(SignalMemProxy_t * self, bool is_read_only,
 		uint8_t * signal, size_t signal_bits, bool is_signed, const char * name,
-		std::unordered_set<SignalMemProxy_t*> * signals_checked_for_change,
-		const bool * read_only_not_write_only) {
+		std::vector<SignalMemProxy_t*> * signals_checked_for_change,
+		const bool * read_only_not_write_only,
+		PyObject * sim, Py_ssize_t * buffer_exports) {
 	self->is_read_only = is_read_only;
 	self->signal = signal;
 	assert(signal_bits > 0);
@@ -30,8 +32,13 @@ void SignalMemProxy_c_init(SignalMemProxy_t * self, bool is_read_only,
 	if (name)
 		self->name = PyUnicode_FromString(name);
 	self->signals_checked_for_change = signals_checked_for_change;
+	self->is_watched = false;
+	// the buffer for the value is aligned to 8B (allocated by new)
+	// so the small values can be compared as a single word
 	self->value_cache = new uint8_t[self->signal_bytes];
 	self->read_only_not_write_only = read_only_not_write_only;
+	self->sim = sim;
+	self->buffer_exports = buffer_exports;
 }
 
 static PyMemberDef SignalMemProxy_members[] =
@@ -64,9 +71,21 @@ SignalMemProxy_new(PyTypeObject *type, PyObject *args, PyObject *kwds) {
 	//self->name = nullptr;
 	self->value_cache = nullptr;
 	self->signals_checked_for_change = nullptr;
+	self->is_watched = false;
 	self->read_only_not_write_only = nullptr;
+	self->sim = nullptr;
+	self->buffer_exports = nullptr;
 	self->callbacks = PyList_New(0);
-	if (self->callbacks == nullptr) {
+	self->rising_callbacks = PyList_New(0);
+	self->falling_callbacks = PyList_New(0);
+	self->value_waiters = nullptr;
+	self->subscribers = PyList_New(0);
+	self->rising_subscribers = PyList_New(0);
+	self->falling_subscribers = PyList_New(0);
+	if (self->callbacks == nullptr || self->rising_callbacks == nullptr
+			|| self->falling_callbacks == nullptr || self->subscribers == nullptr
+			|| self->rising_subscribers == nullptr || self->falling_subscribers == nullptr) {
+		Py_DECREF(self);
 		PyErr_SetString(PyExc_MemoryError,
 				"Can not create callback list for new instance of SignalMemProxy");
 		return nullptr;
@@ -74,6 +93,51 @@ SignalMemProxy_new(PyTypeObject *type, PyObject *args, PyObject *kwds) {
 	return (PyObject *) self;
 }
 
+/*
+ * Load the value of signal with <= 64 bits
+ * (stored in CData/SData/IData/QData in Verilator model)
+ * */
+static inline uint64_t SignalMemProxy_load_u64(const SignalMemProxy_t* self) {
+	switch (self->signal_bytes) {
+	case 1:
+		return *reinterpret_cast<const uint8_t*>(self->signal);
+	case 2:
+		return *reinterpret_cast<const uint16_t*>(self->signal);
+	case 4:
+		return *reinterpret_cast<const uint32_t*>(self->signal);
+	case 8:
+		return *reinterpret_cast<const uint64_t*>(self->signal);
+	default: {
+		// the upper bytes of the IData/QData are not used by the signal
+		uint64_t v = 0;
+		memcpy(&v, self->signal, self->signal_bytes);
+		return v;
+	}
+	}
+}
+
+/*
+ * Store the value of signal with <= 64 bits (the bytes behind signal_bytes are not modified)
+ * */
+static inline void SignalMemProxy_store_u64(SignalMemProxy_t* self, uint64_t v) {
+	switch (self->signal_bytes) {
+	case 1:
+		*reinterpret_cast<uint8_t*>(self->signal) = v;
+		break;
+	case 2:
+		*reinterpret_cast<uint16_t*>(self->signal) = v;
+		break;
+	case 4:
+		*reinterpret_cast<uint32_t*>(self->signal) = v;
+		break;
+	case 8:
+		*reinterpret_cast<uint64_t*>(self->signal) = v;
+		break;
+	default:
+		memcpy(self->signal, &v, self->signal_bytes);
+	}
+}
+
 static PyObject *
 SignalMemProxy_read(SignalMemProxy_t* self, PyObject* args) {
 	if (!*self->read_only_not_write_only) {
@@ -81,6 +145,24 @@ SignalMemProxy_read(SignalMemProxy_t* self, PyObject* args) {
 				"Can not read value in write only simulation phase.");
 		return nullptr;
 	}
+	if (self->signal_bits <= 64) {
+		// fast path, the value fits to a machine word
+		// (PyLong_FromLong returns the cached objects for small ints)
+		uint64_t v = SignalMemProxy_load_u64(self);
+		if (self->signal_bits < 64)
+			v &= (uint64_t(1) << self->signal_bits) - 1;
+		if (self->is_signed) {
+			// sign extension
+			uint64_t msb = uint64_t(1) << (self->signal_bits - 1);
+			int64_t sv = static_cast<int64_t>((v ^ msb) - msb);
+			return PyLong_FromLongLong(sv);
+		} else if (v <= static_cast<uint64_t>(LONG_MAX)) {
+			return PyLong_FromLong(static_cast<long>(v));
+		} else {
+			return PyLong_FromUnsignedLongLong(v);
+		}
+	}
+
 	if (self->last_byte_mask != 0xff) {
 		if (self->is_signed) {
 			uint8_t msb_index = self->signal_bits % 8; // [TODO] check if compiler can resolve & 0x7
@@ -105,59 +187,494 @@ SignalMemProxy_read(SignalMemProxy_t* self, PyObject* args) {
 	return val;
 }
 
-static PyObject *
-SignalMemProxy_write(SignalMemProxy_t* self, PyObject* args) {
-	PyLongObject * val = nullptr;
-	if (!PyArg_ParseTuple(args, "O", &val)) {
-		return nullptr;
-	}
+static PyObject * SignalMemProxy_write_conversion_error() {
+	PyErr_SetString(PyExc_ValueError,
+			"Can not convert value to byte[] (_PyLong_AsByteArray failed)");
+	return nullptr;
+}
 
+/*
+ * Write the value to signal
+ *
+ * @note METH_O, the value is the only argument
+ * @note the value has to fit in to signal_bytes (same as for _PyLong_AsByteArray)
+ * */
+static PyObject *
+SignalMemProxy_write(SignalMemProxy_t* self, PyObject* val) {
 	if (*(self->read_only_not_write_only)) {
 		PyErr_SetString(PyExc_AssertionError,
 				"Can not change signal value in read only simulation phase.");
 		return nullptr;
 	}
-	if (reinterpret_cast<PyObject*>(val) == Py_None) {
+	if (val == Py_None) {
 		SET_INVALID(self->signal, self->signal_bytes);
 	} else if (!PyLong_Check(val)) {
 		PyErr_SetString(PyExc_ValueError, "Argument has to be an integer or None.");
 		return nullptr;
+	} else if (self->signal_bits <= 64) {
+		// fast path, the value fits to a machine word
+		size_t bits = self->signal_bytes * 8;
+		uint64_t v;
+		if (self->is_signed) {
+			int overflow;
+			long long sv = PyLong_AsLongLongAndOverflow(val, &overflow);
+			if (overflow)
+				return SignalMemProxy_write_conversion_error();
+			if (sv == -1 && PyErr_Occurred())
+				return nullptr;
+			if (bits < 64) {
+				long long max = (1LL << (bits - 1));
+				if (sv >= max || sv < -max)
+					return SignalMemProxy_write_conversion_error();
+			}
+			v = static_cast<uint64_t>(sv);
+		} else {
+			v = PyLong_AsUnsignedLongLong(val);
+			if (v == static_cast<uint64_t>(-1) && PyErr_Occurred()) {
+				if (!PyErr_ExceptionMatches(PyExc_OverflowError))
+					return nullptr;
+				PyErr_Clear();
+				return SignalMemProxy_write_conversion_error();
+			}
+			if (bits < 64 && (v >> bits) != 0)
+				return SignalMemProxy_write_conversion_error();
+		}
+		SignalMemProxy_store_u64(self, v);
 	} else {
-		if (_PyLong_AsByteArray(val, self->signal, self->signal_bytes, 1,
-				self->is_signed)) {
-			PyErr_SetString(PyExc_ValueError,
-					"Can not convert value to byte[] (_PyLong_AsByteArray failed)");
-			return nullptr;
+		if (_PyLong_AsByteArray(reinterpret_cast<PyLongObject*>(val),
+				self->signal, self->signal_bytes, 1, self->is_signed)) {
+			return SignalMemProxy_write_conversion_error();
 		}
 	}
 
 	Py_RETURN_NONE;
 }
 
+/*
+ * Check if the proxy is still connected to the simulator
+ * and if the IO operation is allowed in actual simulation phase
+ * */
+static int SignalMemProxy_check_access(SignalMemProxy_t* self, bool write) {
+	if (self->signal == nullptr) {
+		PyErr_SetString(PyExc_AssertionError,
+				"Signal is not connected to the simulator (the simulator was deleted).");
+		return -1;
+	}
+	bool rono = *self->read_only_not_write_only;
+	if (write && rono) {
+		PyErr_SetString(PyExc_AssertionError,
+				"Can not change signal value in read only simulation phase.");
+		return -1;
+	} else if (!write && !rono) {
+		PyErr_SetString(PyExc_AssertionError,
+				"Can not read value in write only simulation phase.");
+		return -1;
+	}
+	return 0;
+}
+
+/*
+ * Read the raw value of the signal as bytes
+ * (little endian, the bits above signal_bits are cleared)
+ * */
+static PyObject *
+SignalMemProxy_read_bytes(SignalMemProxy_t* self, PyObject* args) {
+	if (SignalMemProxy_check_access(self, false) < 0)
+		return nullptr;
+	PyObject * res = PyBytes_FromStringAndSize(
+			reinterpret_cast<const char*>(self->signal), self->signal_bytes);
+	if (res == nullptr)
+		return nullptr;
+	PyBytes_AS_STRING(res)[self->signal_bytes - 1] &= self->last_byte_mask;
+	return res;
+}
+
+/*
+ * Write the raw value to the signal from bytes like object
+ * (little endian, exactly signal_bytes long, the bits above signal_bits are ignored)
+ * */
+static PyObject *
+SignalMemProxy_write_bytes(SignalMemProxy_t* self, PyObject* val) {
+	if (SignalMemProxy_check_access(self, true) < 0)
+		return nullptr;
+	Py_buffer b;
+	if (PyObject_GetBuffer(val, &b, PyBUF_SIMPLE) < 0)
+		return nullptr;
+	if (b.len != static_cast<Py_ssize_t>(self->signal_bytes)) {
+		PyErr_Format(PyExc_ValueError, "Value has to have %zu bytes (has %zd)",
+				self->signal_bytes, b.len);
+		PyBuffer_Release(&b);
+		return nullptr;
+	}
+	memcpy(self->signal, b.buf, self->signal_bytes);
+	self->signal[self->signal_bytes - 1] &= self->last_byte_mask;
+	PyBuffer_Release(&b);
+	Py_RETURN_NONE;
+}
+
+/*
+ * Buffer protocol, the view of the memory of the signal in the simulator
+ * (signal_bytes, little endian)
+ *
+ * The view is writable only if it is acquired in write only phase and read only
+ * if it is acquired in read only phase.
+ *
+ * @note the view keeps the simulator alive and the simulator can not continue
+ *       (eval, set_write_only, reset_eval, restore) until all views are released,
+ *       so the phase of the simulation does not change while the view exists
+ * @note the bits above signal_bits written through the view are cleared on release
+ * @note only top level signals can be accessed as buffer
+ * */
+static int SignalMemProxy_getbuffer(SignalMemProxy_t* self, Py_buffer* view, int flags) {
+	if (self->signal == nullptr) {
+		PyErr_SetString(PyExc_BufferError,
+				"Signal is not connected to the simulator (the simulator was deleted).");
+		view->obj = nullptr;
+		return -1;
+	}
+	if (self->sim == nullptr) {
+		PyErr_SetString(PyExc_BufferError,
+				"Only top level signals of the simulator can be accessed as buffer.");
+		view->obj = nullptr;
+		return -1;
+	}
+	bool readonly = *self->read_only_not_write_only;
+	if ((flags & PyBUF_WRITABLE) == PyBUF_WRITABLE && readonly) {
+		PyErr_SetString(PyExc_BufferError,
+				"Can not change signal value in read only simulation phase.");
+		view->obj = nullptr;
+		return -1;
+	}
+	if (PyBuffer_FillInfo(view, reinterpret_cast<PyObject*>(self), self->signal,
+			self->signal_bytes, readonly, flags) < 0)
+		return -1;
+	Py_INCREF(self->sim);
+	(*self->buffer_exports)++;
+	return 0;
+}
+
+static void SignalMemProxy_releasebuffer(SignalMemProxy_t* self, Py_buffer* view) {
+	if (!view->readonly)
+		self->signal[self->signal_bytes - 1] &= self->last_byte_mask;
+	(*self->buffer_exports)--;
+	Py_DECREF(self->sim);
+}
+
+static PyBufferProcs SignalMemProxy_as_buffer = {
+	(getbufferproc)SignalMemProxy_getbuffer, /* bf_getbuffer */
+	(releasebufferproc)SignalMemProxy_releasebuffer, /* bf_releasebuffer */
+};
+
+/*
+ * Register the callback to the list of callbacks and start checking this signal for change
+ * */
+static PyObject *
+SignalMemProxy_wait_on(SignalMemProxy_t* self, PyObject* callbacks, PyObject* cb) {
+	if (self->signals_checked_for_change == nullptr) {
+		PyErr_SetString(PyExc_AssertionError,
+				"Can not wait on this signal (it is not a top level signal of a simulator)");
+		return nullptr;
+	}
+	SignalMemProxy_cache_value(self);
+	if (PyList_Append(callbacks, cb) < 0)
+		return nullptr;
+	if (!self->is_watched) {
+		self->signals_checked_for_change->push_back(self);
+		self->is_watched = true;
+	}
+
+	Py_RETURN_NONE;
+}
+
+/*
+ * @param edge None for any change, 1 for rising, 0 for falling edge
+ * @return list of the subscribers for the edge (borrowed reference) or nullptr on error
+ * */
+static PyObject * SignalMemProxy_get_subscribers(SignalMemProxy_t* self, PyObject* edge) {
+	if (edge == Py_None)
+		return self->subscribers;
+	long e = PyLong_AsLong(edge);
+	if (e == -1 && PyErr_Occurred())
+		return nullptr;
+	if (e == 1) {
+		return self->rising_subscribers;
+	} else if (e == 0) {
+		return self->falling_subscribers;
+	}
+	PyErr_SetString(PyExc_ValueError, "edge has to be None, 0 (falling) or 1 (rising)");
+	return nullptr;
+}
+
+/*
+ * subscribe(cb, edge=None) persistent registration of the callback which is called
+ * on each change (on the rising/falling edge) of this signal until unsubscribe
+ * */
+static PyObject *
+SignalMemProxy_subscribe(SignalMemProxy_t* self, PyObject* args, PyObject* kwds) {
+	static const char *kwlist[] = {"cb", "edge", nullptr};
+	PyObject * cb = nullptr;
+	PyObject * edge = Py_None;
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O", const_cast<char**>(kwlist),
+			&cb, &edge)) {
+		return nullptr;
+	}
+	PyObject * subscribers = SignalMemProxy_get_subscribers(self, edge);
+	if (subscribers == nullptr)
+		return nullptr;
+	return SignalMemProxy_wait_on(self, subscribers, cb);
+}
+
+static PyObject *
+SignalMemProxy_unsubscribe(SignalMemProxy_t* self, PyObject* args, PyObject* kwds) {
+	static const char *kwlist[] = {"cb", "edge", nullptr};
+	PyObject * cb = nullptr;
+	PyObject * edge = Py_None;
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O", const_cast<char**>(kwlist),
+			&cb, &edge)) {
+		return nullptr;
+	}
+	PyObject * subscribers = SignalMemProxy_get_subscribers(self, edge);
+	if (subscribers == nullptr)
+		return nullptr;
+	// the signal is removed from the list of watched signals on its next change
+	auto i = PySequence_Index(subscribers, cb);
+	if (i < 0)
+		return nullptr;
+	if (PySequence_DelItem(subscribers, i) < 0)
+		return nullptr;
+	Py_RETURN_NONE;
+}
+
 static PyObject *
 SignalMemProxy_wait(SignalMemProxy_t* self, PyObject* args) {
 	PyObject * cb = nullptr;
 	if (!PyArg_ParseTuple(args, "O", &cb)) {
 		return nullptr;
 	}
-	SignalMemProxy_cache_value(self);
-	PyList_Append(self->callbacks, cb);
-	//Py_DECREF(cb);
-	self->signals_checked_for_change->insert(self);
+	return SignalMemProxy_wait_on(self, self->callbacks, cb);
+}
+
+static PyObject *
+SignalMemProxy_wait_rising(SignalMemProxy_t* self, PyObject* cb) {
+	return SignalMemProxy_wait_on(self, self->rising_callbacks, cb);
+}
+
+static PyObject *
+SignalMemProxy_wait_falling(SignalMemProxy_t* self, PyObject* cb) {
+	return SignalMemProxy_wait_on(self, self->falling_callbacks, cb);
+}
+
+/*
+ * Convert python int to signal_bytes little endian bytes
+ * (the bits above signal_bits are cleared)
+ * */
+static int SignalMemProxy_int_to_bytes(SignalMemProxy_t* self, PyObject * v,
+		bool is_signed, std::vector<uint8_t> & res) {
+	if (!PyLong_Check(v)) {
+		PyErr_SetString(PyExc_ValueError, "Argument has to be an integer.");
+		return -1;
+	}
+	res.resize(self->signal_bytes);
+	if (_PyLong_AsByteArray(reinterpret_cast<PyLongObject*>(v), res.data(),
+			self->signal_bytes, 1, is_signed)) {
+		return -1;
+	}
+	res.back() &= self->last_byte_mask;
+	return 0;
+}
+
+static uint64_t bytes_to_u64(const std::vector<uint8_t> & v) {
+	uint64_t res = 0;
+	memcpy(&res, v.data(), v.size());
+	return res;
+}
+
+/*
+ * Register the callback which is called when the signal changes
+ * to a value where (signal & mask) == (value & mask), mask=None means all bits
+ * */
+static PyObject *
+SignalMemProxy_wait_value(SignalMemProxy_t* self, PyObject* args) {
+	PyObject * cb = nullptr;
+	PyObject * value = nullptr;
+	PyObject * mask = Py_None;
+	if (!PyArg_ParseTuple(args, "OO|O", &cb, &value, &mask)) {
+		return nullptr;
+	}
+	if (self->signals_checked_for_change == nullptr) {
+		PyErr_SetString(PyExc_AssertionError,
+				"Can not wait on this signal (it is not a top level signal of a simulator)");
+		return nullptr;
+	}
+	SignalValueWaiter_t w;
+	if (SignalMemProxy_int_to_bytes(self, value, self->is_signed, w.wide_value) < 0)
+		return nullptr;
+	if (mask == Py_None) {
+		w.wide_mask.assign(self->signal_bytes, 0xff);
+		w.wide_mask.back() = self->last_byte_mask;
+	} else if (SignalMemProxy_int_to_bytes(self, mask, false, w.wide_mask) < 0) {
+		return nullptr;
+	}
+	for (size_t i = 0; i < self->signal_bytes; i++)
+		w.wide_value[i] &= w.wide_mask[i];
+	if (self->signal_bits <= 64) {
+		w.value = bytes_to_u64(w.wide_value);
+		w.mask = bytes_to_u64(w.wide_mask);
+		w.wide_value.clear();
+		w.wide_mask.clear();
+	} else {
+		w.value = w.mask = 0;
+	}
+	if (self->value_waiters == nullptr)
+		self->value_waiters = new std::vector<SignalValueWaiter_t>();
+	Py_INCREF(cb);
+	w.cb = cb;
+	self->value_waiters->push_back(std::move(w));
 
+	SignalMemProxy_cache_value(self);
+	if (!self->is_watched) {
+		self->signals_checked_for_change->push_back(self);
+		self->is_watched = true;
+	}
 	Py_RETURN_NONE;
 }
 
-void SignalMemProxy_cache_value(SignalMemProxy_t* self) {
-	memcpy(self->value_cache, (const void *) self->signal, self->signal_bits);
+static bool SignalMemProxy_value_matches(SignalMemProxy_t* self, const SignalValueWaiter_t & w) {
+	if (self->signal_bits <= 64)
+		return (SignalMemProxy_load_u64(self) & w.mask) == w.value;
+	for (size_t i = 0; i < self->signal_bytes; i++) {
+		if ((self->signal[i] & w.wide_mask[i]) != w.wide_value[i])
+			return false;
+	}
+	return true;
+}
+
+/*
+ * dst.extend(src)
+ * */
+static int extend_list(PyObject * src, PyObject * dst) {
+	auto len = PyList_GET_SIZE(src);
+	if (len == 0)
+		return 0;
+	auto dst_len = PyList_GET_SIZE(dst);
+	return PyList_SetSlice(dst, dst_len, dst_len, src);
+}
+
+/*
+ * dst.extend(src); src.clear()
+ * */
+static int move_list_items(PyObject * src, PyObject * dst) {
+	auto len = PyList_GET_SIZE(src);
+	if (len == 0)
+		return 0;
+	auto dst_len = PyList_GET_SIZE(dst);
+	if (PyList_SetSlice(dst, dst_len, dst_len, src) < 0)
+		return -1;
+	return PyList_SetSlice(src, 0, len, nullptr);
 }
 
-bool SignalMemProxy_value_changed(SignalMemProxy_t* self) {
-	return memcmp(self->value_cache, self->signal, self->signal_bits) != 0;
+int SignalMemProxy_trigger_callbacks(SignalMemProxy_t* self, PyObject * pending_event_list) {
+	if (extend_list(self->subscribers, pending_event_list) < 0
+			|| move_list_items(self->callbacks, pending_event_list) < 0)
+		return -1;
+	PyObject * edge_subscribers;
+	PyObject * edge_callbacks;
+	if (self->signal[0] & 1) {
+		edge_subscribers = self->rising_subscribers;
+		edge_callbacks = self->rising_callbacks;
+	} else {
+		edge_subscribers = self->falling_subscribers;
+		edge_callbacks = self->falling_callbacks;
+	}
+	if (extend_list(edge_subscribers, pending_event_list) < 0
+			|| move_list_items(edge_callbacks, pending_event_list) < 0)
+		return -1;
+
+	auto waiters = self->value_waiters;
+	if (waiters == nullptr || waiters->empty())
+		return 0;
+	// move the matching waiters to pending_event_list (and keep the order of the rest)
+	int res = 0;
+	size_t keep = 0;
+	for (size_t i = 0; i < waiters->size(); i++) {
+		auto & w = (*waiters)[i];
+		if (res == 0 && SignalMemProxy_value_matches(self, w)) {
+			res = PyList_Append(pending_event_list, w.cb);
+			if (res == 0) {
+				Py_DECREF(w.cb);
+				continue;
+			}
+		}
+		if (keep != i)
+			(*waiters)[keep] = std::move(w);
+		keep++;
+	}
+	waiters->resize(keep);
+	return res;
+}
+
+int SignalMemProxy_clear_callbacks(SignalMemProxy_t* self) {
+	for (auto cbs: {self->callbacks, self->rising_callbacks, self->falling_callbacks}) {
+		auto len = PyList_GET_SIZE(cbs);
+		if (len > 0 && PyList_SetSlice(cbs, 0, len, nullptr) < 0)
+			return -1;
+	}
+	if (self->value_waiters) {
+		for (auto & w: *self->value_waiters)
+			Py_DECREF(w.cb);
+		self->value_waiters->clear();
+	}
+	return 0;
+}
+
+/*
+ * The callbacks (e.g. the persistent subscriptions) usually reference the simulator
+ * which owns this signal, the reference cycle is collected by the garbage collector
+ * */
+static int SignalMemProxy_traverse(SignalMemProxy_t* self, visitproc visit, void *arg) {
+	Py_VISIT(self->callbacks);
+	Py_VISIT(self->rising_callbacks);
+	Py_VISIT(self->falling_callbacks);
+	Py_VISIT(self->subscribers);
+	Py_VISIT(self->rising_subscribers);
+	Py_VISIT(self->falling_subscribers);
+	if (self->value_waiters) {
+		for (auto & w: *self->value_waiters)
+			Py_VISIT(w.cb);
+	}
+	Py_VISIT(self->_origin);
+	Py_VISIT(self->_dtype);
+	return 0;
+}
+
+static int SignalMemProxy_clear(SignalMemProxy_t* self) {
+	if (self->callbacks && SignalMemProxy_clear_callbacks(self) < 0)
+		return -1;
+	for (auto cbs: {self->subscribers, self->rising_subscribers, self->falling_subscribers}) {
+		if (cbs == nullptr)
+			continue;
+		auto len = PyList_GET_SIZE(cbs);
+		if (len > 0 && PyList_SetSlice(cbs, 0, len, nullptr) < 0)
+			return -1;
+	}
+	Py_CLEAR(self->_origin);
+	Py_CLEAR(self->_dtype);
+	return 0;
 }
 
 static void SignalMemProxy_dealloc(SignalMemProxy_t* self) {
-	Py_DECREF(self->callbacks);
+	PyObject_GC_UnTrack(self);
+	Py_XDECREF(self->callbacks);
+	Py_XDECREF(self->rising_callbacks);
+	Py_XDECREF(self->falling_callbacks);
+	Py_XDECREF(self->subscribers);
+	Py_XDECREF(self->rising_subscribers);
+	Py_XDECREF(self->falling_subscribers);
+	if (self->value_waiters) {
+		for (auto & w: *self->value_waiters)
+			Py_DECREF(w.cb);
+		delete self->value_waiters;
+	}
 	delete[] self->value_cache;
 
 	Py_XDECREF(self->name);
@@ -171,10 +688,26 @@ static void SignalMemProxy_dealloc(SignalMemProxy_t* self) {
 static PyMethodDef SignalMemProxy_methods[] = {                          //
 		{ "read", (PyCFunction) SignalMemProxy_read, METH_NOARGS,        //
 				"read value from signal" },                              //
-		{ "write", (PyCFunction) SignalMemProxy_write, METH_VARARGS,     //
+		{ "write", (PyCFunction) SignalMemProxy_write, METH_O,           //
 				"write value to signal (signal can not be read only)" }, //
 		{ "wait", (PyCFunction) SignalMemProxy_wait, METH_VARARGS,       //
 				"wait for change on this signal" },                      //
+		{ "wait_rising", (PyCFunction) SignalMemProxy_wait_rising, METH_O, //
+				"wait for change on this signal to value with bit 0 set" }, //
+		{ "wait_falling", (PyCFunction) SignalMemProxy_wait_falling, METH_O, //
+				"wait for change on this signal to value with bit 0 cleared" }, //
+		{ "subscribe", (PyCFunction) SignalMemProxy_subscribe, METH_VARARGS | METH_KEYWORDS, //
+				"subscribe(cb, edge=None) call cb on each change of this signal\n"
+				"(edge=1 only rising, edge=0 only falling) until unsubscribe" }, //
+		{ "unsubscribe", (PyCFunction) SignalMemProxy_unsubscribe, METH_VARARGS | METH_KEYWORDS, //
+				"unsubscribe(cb, edge=None) cancel the subscription" }, //
+		{ "wait_value", (PyCFunction) SignalMemProxy_wait_value, METH_VARARGS, //
+				"wait_value(cb, value, mask=None) wait for change on this signal\n"
+				"to value where (signal & mask) == (value & mask)" },    //
+		{ "read_bytes", (PyCFunction) SignalMemProxy_read_bytes, METH_NOARGS, //
+				"read raw value of signal as bytes (little endian)" },   //
+		{ "write_bytes", (PyCFunction) SignalMemProxy_write_bytes, METH_O,    //
+				"write raw value to signal from bytes (little endian)" }, //
 		{ nullptr } /* Sentinel */
 };
 
@@ -197,12 +730,13 @@ PyTypeObject SignalMemProxy_pytype = {
 	0, /* tp_str */
 	0, /* tp_getattro */
 	0, /* tp_setattro */
-	0, /* tp_as_buffer */
+	&SignalMemProxy_as_buffer, /* tp_as_buffer */
 	Py_TPFLAGS_DEFAULT |
-	Py_TPFLAGS_BASETYPE, /* tp_flags */
+	Py_TPFLAGS_BASETYPE |
+	Py_TPFLAGS_HAVE_GC, /* tp_flags */
 	"Simulation proxy for signal in HDL simulation\n(set/get for memory in simulator where value of signal is stored)",/* tp_doc */
-	0, /* tp_traverse */
-	0, /* tp_clear */
+	(traverseproc)SignalMemProxy_traverse, /* tp_traverse */
+	(inquiry)SignalMemProxy_clear, /* tp_clear */
 	0, /* tp_richcompare */
 	0, /* tp_weaklistoffset */
 	0, /* tp_iter */
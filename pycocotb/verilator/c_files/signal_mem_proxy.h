@@ -3,7 +3,21 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
 #include <vector>
-#include <unordered_set>
+#include <cstring>
+
+/*
+ * Python function which waits until the signal changes to a value
+ * where (signal & mask) == value
+ * */
+struct SignalValueWaiter_t {
+	PyObject * cb;
+	// value & mask (for the signals with <= 64 bits)
+	uint64_t value;
+	uint64_t mask;
+	// value & mask and the mask for the wider signals (signal_bytes each)
+	std::vector<uint8_t> wide_value;
+	std::vector<uint8_t> wide_mask;
+};
 
 /*
  * Proxy for memory of signal in simulation. Allows r/w access from python and value change detection.
@@ -18,11 +32,31 @@ struct SignalMemProxy_t {
 	bool is_signed; // flag for value of signed type
 	// flag to specify allowed IO operations
 	const bool * read_only_not_write_only;
+	// simulator which owns the memory of the signal (borrowed reference, nullptr for
+	// the items of arrays), the buffer views of the signal keep it alive
+	PyObject * sim;
+	// number of the buffer views of the signals exported from the simulator
+	// (the simulator can not continue while there are any)
+	Py_ssize_t * buffer_exports;
 	// python functions which are called when value of this signal changes
 	PyObject * callbacks;
-	// set of signals which are checked for change after each step
+	// python functions which are called when value of this signal changes
+	// and the bit 0 of the new value is 1 (rising) or 0 (falling)
+	PyObject * rising_callbacks;
+	PyObject * falling_callbacks;
+	// python functions which are called when value of this signal changes
+	// to a specified value (allocated on first use)
+	std::vector<SignalValueWaiter_t> * value_waiters;
+	// persistent subscriptions, same as callbacks, rising_callbacks, falling_callbacks
+	// but the functions are not removed when they are triggered
+	PyObject * subscribers;
+	PyObject * rising_subscribers;
+	PyObject * falling_subscribers;
+	// list of signals which are checked for change after each step
 	// because there is a process which waits for event on this signal
-	std::unordered_set<SignalMemProxy_t*> * signals_checked_for_change;
+	std::vector<SignalMemProxy_t*> * signals_checked_for_change;
+	// flag which tells that this signal is in signals_checked_for_change
+	bool is_watched;
 	uint8_t * value_cache; // buffer to store previous value for event detection
 
 	// properties used for simplified associations and debug in python
@@ -38,19 +72,68 @@ struct SignalMemProxy_t {
  * */
 void SignalMemProxy_c_init(SignalMemProxy_t * self, bool is_read_only,
 		uint8_t * signal, size_t signal_bits, bool is_signed, const char * name,
-		std::unordered_set<SignalMemProxy_t*> * signals_checked_for_change,
-		const bool * read_only_not_write_only);
+		std::vector<SignalMemProxy_t*> * signals_checked_for_change,
+		const bool * read_only_not_write_only,
+		PyObject * sim, Py_ssize_t * buffer_exports);
 
 /*
  * Store actual value for later change detection
  * */
-void SignalMemProxy_cache_value(SignalMemProxy_t* self);
+static inline void SignalMemProxy_cache_value(SignalMemProxy_t* self) {
+	memcpy(self->value_cache, self->signal, self->signal_bytes);
+}
 
 /*
  * Evaluate if value changed
+ * (the signals with 1, 2, 4 or 8 bytes are compared as a single word)
  * @note SignalMemProxy_cache_value has to be called first
  * */
-bool SignalMemProxy_value_changed(SignalMemProxy_t* self);
+static inline bool SignalMemProxy_value_changed(const SignalMemProxy_t* self) {
+	const uint8_t * a = self->value_cache;
+	const uint8_t * b = self->signal;
+	switch (self->signal_bytes) {
+	case 1:
+		return *a != *b;
+	case 2:
+		return *reinterpret_cast<const uint16_t*>(a) != *reinterpret_cast<const uint16_t*>(b);
+	case 4:
+		return *reinterpret_cast<const uint32_t*>(a) != *reinterpret_cast<const uint32_t*>(b);
+	case 8:
+		return *reinterpret_cast<const uint64_t*>(a) != *reinterpret_cast<const uint64_t*>(b);
+	default:
+		return memcmp(a, b, self->signal_bytes) != 0;
+	}
+}
+
+/*
+ * @return true if there is any callback which waits for the change of this signal
+ * */
+static inline bool SignalMemProxy_has_callbacks(const SignalMemProxy_t* self) {
+	return PyList_GET_SIZE(self->callbacks)
+			|| PyList_GET_SIZE(self->rising_callbacks)
+			|| PyList_GET_SIZE(self->falling_callbacks)
+			|| (self->value_waiters && !self->value_waiters->empty())
+			|| PyList_GET_SIZE(self->subscribers)
+			|| PyList_GET_SIZE(self->rising_subscribers)
+			|| PyList_GET_SIZE(self->falling_subscribers);
+}
+
+/*
+ * Move the callbacks which are triggered by the change of the value
+ * (the callbacks for any change, for the edge selected by the new value
+ * and the callbacks waiting for the new value) to the pending_event_list
+ *
+ * @return 0 on success -1 on error
+ * */
+int SignalMemProxy_trigger_callbacks(SignalMemProxy_t* self, PyObject * pending_event_list);
+
+/*
+ * Remove all one-shot callbacks and value waiters
+ * (the persistent subscriptions are removed only by unsubscribe or with the signal)
+ *
+ * @return 0 on success -1 on error
+ * */
+int SignalMemProxy_clear_callbacks(SignalMemProxy_t* self);
 
 extern PyTypeObject SignalMemProxy_pytype;
 
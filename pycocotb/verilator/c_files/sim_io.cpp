@@ -9,6 +9,22 @@ PyMemberDef PySimIo_members[2] = {
     {nullptr}
 };
 
+static int PySimIo_traverse(PySimIo_t* self, visitproc visit, void *arg) {
+	Py_VISIT(self->dict);
+	return 0;
+}
+
+static int PySimIo_clear(PySimIo_t* self) {
+	Py_CLEAR(self->dict);
+	return 0;
+}
+
+static void PySimIo_dealloc(PySimIo_t* self) {
+	PyObject_GC_UnTrack(self);
+	Py_XDECREF(self->dict);
+	Py_TYPE(self)->tp_free((PyObject*) self);
+}
+
 int PySimIo_pytype_prepare() {
 	if (PyType_Ready(&SignalMemProxy_pytype) < 0) {
 		return -1;
@@ -23,8 +39,13 @@ int PySimIo_pytype_prepare() {
 		"PySimIo", /* tp_name */
 		sizeof(PySimIo_t), /* tp_basicsize */
 	};
-	t.tp_flags = Py_TPFLAGS_DEFAULT;
+	// the io is a part of the reference cycles between the simulator
+	// and the callbacks on the signals (see SignalMemProxy_traverse)
+	t.tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC;
 	t.tp_doc = "Container for signals in simulation";
+	t.tp_dealloc = (destructor)PySimIo_dealloc;
+	t.tp_traverse = (traverseproc)PySimIo_traverse;
+	t.tp_clear = (inquiry)PySimIo_clear;
 	t.tp_new = PyType_GenericNew;
 	t.tp_getattro = PyObject_GenericGetAttr;
 	t.tp_setattro = PyObject_GenericSetAttr;
@@ -41,7 +62,8 @@ int PySim_add_proxy(std::vector<const char *> signal_name, uint8_t * sig_addr,
 		std::vector<size_t> type_width, bool is_signed,
 		const bool * read_only_not_write_only, PyObject * io,
 		std::vector<SignalProxyPtr_t> & signals,
-		std::unordered_set<SignalMemProxy_t*> & event_triggering_signals) {
+		std::vector<SignalMemProxy_t*> & event_triggering_signals,
+		PyObject * sim, Py_ssize_t * buffer_exports) {
 	size_t name_i = 0;
 	while (name_i != signal_name.size() - 1) {
 		auto n = signal_name.at(name_i);
@@ -66,7 +88,8 @@ int PySim_add_proxy(std::vector<const char *> signal_name, uint8_t * sig_addr,
 	if (type_width.size() == 1) {
 		// proxy for the scalar value
 		return PySim_add_scalar_proxy(n, sig_addr, type_width.at(0), is_signed,
-				read_only_not_write_only, io, signals, event_triggering_signals);
+				read_only_not_write_only, io, signals, event_triggering_signals,
+				sim, buffer_exports);
 	} else {
 		// proxy for the array
 		return PySim_add_arr_proxy(n, sig_addr, type_width, is_signed,
@@ -74,11 +97,33 @@ int PySim_add_proxy(std::vector<const char *> signal_name, uint8_t * sig_addr,
 	}
 }
 
+int PySim_add_proxies(void * dut, const PySimSignalInfo_t * signal_table, size_t signal_cnt,
+		const char * const * name_pool, const size_t * width_pool,
+		const bool * read_only_not_write_only, PyObject * io,
+		std::vector<SignalProxyPtr_t> & signals,
+		std::vector<SignalMemProxy_t*> & event_triggering_signals,
+		PyObject * sim, Py_ssize_t * buffer_exports) {
+	signals.reserve(signals.size() + signal_cnt);
+	for (size_t i = 0; i < signal_cnt; i++) {
+		auto & s = signal_table[i];
+		if (s.addr == nullptr)
+			continue;
+		std::vector<const char *> name(name_pool + s.name_i, name_pool + s.name_i + s.name_len);
+		std::vector<size_t> type_width(width_pool + s.width_i, width_pool + s.width_i + s.width_len);
+		if (PySim_add_proxy(name, s.addr(dut), type_width, s.is_signed,
+				read_only_not_write_only, io, signals, event_triggering_signals,
+				sim, buffer_exports) < 0)
+			return -1;
+	}
+	return 0;
+}
+
 int PySim_add_scalar_proxy(const char * signal_name, uint8_t * sig_addr,
 		size_t type_width, bool is_signed,
 		const bool * read_only_not_write_only, PyObject * io,
 		std::vector<SignalProxyPtr_t> & signals,
-		std::unordered_set<SignalMemProxy_t*> & event_triggering_signals) {
+		std::vector<SignalMemProxy_t*> & event_triggering_signals,
+		PyObject * sim, Py_ssize_t * buffer_exports) {
 	SignalMemProxy_t * proxy = (SignalMemProxy_t *) PyObject_CallObject(
 			(PyObject*) &SignalMemProxy_pytype, nullptr);
 	if (!proxy) {
@@ -86,7 +131,8 @@ int PySim_add_scalar_proxy(const char * signal_name, uint8_t * sig_addr,
 		return -1;
 	}
 	SignalMemProxy_c_init(proxy, true, sig_addr, type_width, is_signed,
-			signal_name, &event_triggering_signals, read_only_not_write_only);
+			signal_name, &event_triggering_signals, read_only_not_write_only,
+			sim, buffer_exports);
 	signals.push_back(proxy);
 	if (PyObject_SetAttrString(io, signal_name,
 			reinterpret_cast<PyObject*>(proxy)) < 0) {
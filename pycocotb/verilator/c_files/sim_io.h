@@ -25,6 +25,8 @@ struct SignalProxyPtr_t {
 	void destroy() {
 		if (scalar) {
 			scalar->signal = nullptr;
+			scalar->signals_checked_for_change = nullptr;
+			scalar->is_watched = false;
 			Py_DECREF(scalar);
 		}
 		if (vector) {
@@ -42,67 +44,75 @@ int PySim_add_proxy(std::vector<const char *> signal_name, uint8_t * sig_addr,
 		std::vector<size_t> type_width, bool is_signed,
 		const bool * read_only_not_write_only, PyObject * io,
 		std::vector<SignalProxyPtr_t> & signals,
-		std::unordered_set<SignalMemProxy_t*> & event_triggering_signals);
+		std::vector<SignalMemProxy_t*> & event_triggering_signals,
+		PyObject * sim, Py_ssize_t * buffer_exports);
 
 int PySim_add_scalar_proxy(const char * signal_name, uint8_t * sig_addr,
 		size_t type_width, bool is_signed,
 		const bool * read_only_not_write_only, PyObject * io,
 		std::vector<SignalProxyPtr_t> & signals,
-		std::unordered_set<SignalMemProxy_t*> & event_triggering_signals);
+		std::vector<SignalMemProxy_t*> & event_triggering_signals,
+		PyObject * sim, Py_ssize_t * buffer_exports);
 
 int PySim_add_arr_proxy(const char * signal_name, uint8_t * sig_addr,
 		std::vector<size_t> type_width, bool is_signed,
 		const bool * read_only_not_write_only, PyObject * io,
 		std::vector<SignalProxyPtr_t> & signals);
 
+// returns the address of the signal in the model of DUT
+typedef uint8_t * (*PySimSignalAddr_t)(void * dut);
+
+template<typename DUT_t, typename Cls_t, typename Member_t>
+uint8_t * PySim_member_addr(void * dut, Member_t Cls_t::* member) {
+	return reinterpret_cast<uint8_t*>(&(static_cast<DUT_t*>(dut)->*member));
+}
+
 // https://gist.github.com/maddouri/0da889b331d910f35e05ba3b7b9d869b
-/// This template is used to optionally call PySim_add_proxy if the signal was not optimised out
-/// by Verilator
-#define define_proxy_constructor(member_name)                                             \
-/* struct which check if the T has property member_name */                                \
-template <typename T>                                                                     \
-struct dut_has_##member_name {                                                            \
-    typedef char yes_type;                                                                \
-    typedef long no_type;                                                                 \
-    template <typename U> static yes_type test(decltype(&U::member_name));                \
-    template <typename U> static no_type test(...);                                       \
-    static constexpr bool Has = sizeof(test<T>(0)) == sizeof(yes_type);                   \
+/// This template resolves the address of the signal from the pointer to member of the model
+/// if the signal was not optimised out by Verilator, otherwise dut_member_<name>::addr is nullptr
+#define define_member_addr(member_name)                                                   \
+/* the model does not have the member_name */                                             \
+template <typename T, typename = void>                                                    \
+struct dut_member_##member_name {                                                         \
+    static constexpr PySimSignalAddr_t addr = nullptr;                                    \
 };                                                                                        \
-/* function which is used if the T has member_name property */                            \
-template<typename DUT_t>                                                                  \
-int construct_proxy_##member_name(std::vector<const char *> signal_name, DUT_t * dut,     \
-		std::vector<size_t> type_width, bool is_signed,                                   \
-		const bool * read_only_not_write_only, PyObject * io,                             \
-		std::vector<SignalProxyPtr_t> & signals,                                          \
-		std::unordered_set<SignalMemProxy_t*> & event_triggering_signals,                 \
-		std::true_type) {                                                                 \
-	uint8_t * sig_addr = reinterpret_cast<uint8_t*>(&dut->member_name);                   \
-	return PySim_add_proxy(signal_name, sig_addr, type_width, is_signed,                  \
-			read_only_not_write_only, io, signals,                                        \
-			event_triggering_signals);                                                    \
-}                                                                                         \
-/* function which is dummy call if the T has not property member_name */                  \
-template<typename DUT_t>                                                                  \
-int construct_proxy_##member_name(std::vector<const char *> signal_name, DUT_t * dut,     \
-		std::vector<size_t> type_width, bool is_signed,                                   \
-		const bool * read_only_not_write_only, PyObject * io,                             \
-		std::vector<SignalProxyPtr_t> & signals,                                          \
-		std::unordered_set<SignalMemProxy_t*> & event_triggering_signals,                 \
-		std::false_type) {                                                                \
-	return 0;                                                                             \
-}                                                                                         \
-/* wrapper which selects between real and dummy constructor call */                       \
-template<typename DUT_t>                                                                  \
-int construct_proxy_##member_name(std::vector<const char *> signal_name, DUT_t * dut,     \
-		std::vector<size_t> type_width, bool is_signed,                                   \
-		const bool * read_only_not_write_only, PyObject * io,                             \
-		std::vector<SignalProxyPtr_t> & signals,                                          \
-		std::unordered_set<SignalMemProxy_t*> & event_triggering_signals) {               \
-	auto constexpr has = dut_has_##member_name<DUT_t>::Has;                               \
-	                                                                                      \
-   return construct_proxy_##member_name<DUT_t>(signal_name, dut,                          \
-    		type_width, is_signed,                                                        \
-			read_only_not_write_only, io, signals,                                        \
-			event_triggering_signals,                                                     \
-			std::integral_constant<bool, has>());                                         \
-}
+/* the model has the member_name */                                                       \
+template <typename T>                                                                     \
+struct dut_member_##member_name<T, decltype((void)&T::member_name)> {                     \
+    static uint8_t * get(void * dut) {                                                    \
+        return PySim_member_addr<T>(dut, &T::member_name);                                \
+    }                                                                                     \
+    static constexpr PySimSignalAddr_t addr = &get;                                       \
+};
+
+/*
+ * Description of the signal in the table of accessible signals of the generated wrapper
+ *
+ * The name and the widths are stored in pools (arrays shared by all signals)
+ * the signal uses the items [name_i, name_i + name_len) and [width_i, width_i + width_len)
+ * */
+struct PySimSignalInfo_t {
+	size_t name_i;
+	size_t name_len;
+	// accessor of the signal in the model of DUT (nullptr if the signal was optimised out)
+	PySimSignalAddr_t addr;
+	size_t width_i;
+	size_t width_len;
+	bool is_signed;
+};
+
+/*
+ * Construct the proxies for all signals in the table
+ *
+ * @param dut the model of DUT (the argument of the accessors in the table)
+ * @param signal_cnt the number of signals in the table
+ * @param sim the simulator which owns the signals (kept alive by the buffer views of the signals)
+ * @param buffer_exports the counter of the buffer views of the signals in the simulator
+ * @return 0 on success -1 on error
+ * */
+int PySim_add_proxies(void * dut, const PySimSignalInfo_t * signal_table, size_t signal_cnt,
+		const char * const * name_pool, const size_t * width_pool,
+		const bool * read_only_not_write_only, PyObject * io,
+		std::vector<SignalProxyPtr_t> & signals,
+		std::vector<SignalMemProxy_t*> & event_triggering_signals,
+		PyObject * sim, Py_ssize_t * buffer_exports);
@@ -0,0 +1,306 @@
+"""
+Parallel compilation of the c++ sources for setuptools.Extension
+
+distutils CCompiler compiles the sources of the extension one after another,
+:class:`~.ParallelBuildExt` compiles them in a thread pool (the compiler runs
+in separate processes) and optionally reuses the object files from previous builds
+(:class:`~.ObjectCache`, the key is the hash of the preprocessed source
+and the compiler arguments, similar to ccache with base_dir set to the working directory).
+
+The object cache also stores the precompiled headers (GCC .gch) of the headers
+which are included by many generated sources (e.g. pycocotb_sim.h in the wrapper
+of each simulator). The precompiled header is stored in a directory which contains
+only "<header>.gch/" and this directory is added to the include path before the other
+include directories, the compiler then uses the precompiled header instead of parsing
+the header (the compilers which do not support .gch files simply ignore it).
+
+In incremental mode the object files which are up to date are not compiled again
+(the object is up to date if it was compiled with the same command and it is newer
+than all its dependencies listed in the dependency file generated by -MMD).
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import shutil
+from subprocess import check_output, check_call
+from tempfile import mkstemp
+from typing import Optional, List
+
+from setuptools.command.build_ext import build_ext
+
+DEFAULT_OBJ_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pycocotb", "obj")
+# max size of the object cache in bytes (the least recently used objects are removed first)
+DEFAULT_OBJ_CACHE_MAX_SIZE = 1 << 30
+# number of the most recently used precompiled headers which are kept in the cache
+PCH_KEEP = 4
+PCH_DIR_NAME = "pch"
+# suffixes of the files stored next to the object file in incremental build
+DEP_FILE_SUFFIX = ".d"
+CMD_FILE_SUFFIX = ".cmd"
+
+
+class ObjectCache():
+    """
+    Cache of the object files, the key is the hash of the preprocessed source
+    and of the compiler and its arguments
+
+    :ivar ~.cache_dir: directory where the object files are stored
+    :ivar ~.max_size: max size of the cache in bytes
+    :note: the object files are written to temporary file and atomically renamed,
+        the concurrent builds see only complete object files
+    """
+
+    def __init__(self, cache_dir: str=DEFAULT_OBJ_CACHE_DIR,
+                 max_size: int=DEFAULT_OBJ_CACHE_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def _file_name(self, key: str):
+        return os.path.join(self.cache_dir, key + ".o")
+
+    def get(self, key: str, obj: str) -> bool:
+        """
+        Copy the cached object file to obj
+
+        :return: True if the object file was found in cache
+        """
+        f = self._file_name(key)
+        try:
+            shutil.copyfile(f, obj)
+            os.utime(f)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key: str, obj: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp = mkstemp(prefix="tmp-", dir=self.cache_dir)
+        os.close(fd)
+        shutil.copyfile(obj, tmp)
+        os.replace(tmp, self._file_name(key))
+
+    def get_pch(self, key: str, header: str, build) -> str:
+        """
+        Get the directory with the precompiled header, build it if it is not in the cache
+
+        :param build: function(header, gch_file_name) which builds the precompiled header
+        :return: directory which contains the "<header name>.gch/" directory
+        """
+        d = os.path.join(self.cache_dir, PCH_DIR_NAME, key)
+        gch_dir = os.path.join(d, os.path.basename(header) + ".gch")
+        gch = os.path.join(gch_dir, "pch.gch")
+        if os.path.isfile(gch):
+            os.utime(d)
+            return d
+
+        os.makedirs(gch_dir, exist_ok=True)
+        fd, tmp = mkstemp(prefix="tmp-", suffix=".gch", dir=d)
+        os.close(fd)
+        try:
+            build(header, tmp)
+            os.replace(tmp, gch)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return d
+
+    def _evict_pch(self):
+        pch_root = os.path.join(self.cache_dir, PCH_DIR_NAME)
+        if not os.path.isdir(pch_root):
+            return
+        entries = []
+        for key in os.listdir(pch_root):
+            d = os.path.join(pch_root, key)
+            try:
+                entries.append((os.stat(d).st_mtime, d))
+            except FileNotFoundError:
+                continue
+        entries.sort(reverse=True)
+        for _, d in entries[PCH_KEEP:]:
+            shutil.rmtree(d, ignore_errors=True)
+
+    def evict(self):
+        """
+        Remove the least recently used objects until the size of the cache is <= max_size
+        (and the precompiled headers except PCH_KEEP most recently used)
+        """
+        self._evict_pch()
+        files = []
+        total_size = 0
+        for f in os.listdir(self.cache_dir):
+            if not f.endswith(".o"):
+                continue
+            f = os.path.join(self.cache_dir, f)
+            try:
+                st = os.stat(f)
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, f, st.st_size))
+            total_size += st.st_size
+
+        files.sort()
+        for _, f, size in files:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+
+def read_dep_file(file_name: str) -> List[str]:
+    """
+    :return: list of the dependencies from the make rule written by the compiler (-MMD)
+    """
+    with open(file_name) as f:
+        rule = f.read()
+    _, _, deps = rule.partition(":")
+    return deps.replace("\\\n", " ").split()
+
+
+def is_object_up_to_date(obj: str, cmd: str) -> bool:
+    """
+    :param cmd: description of the compilation command
+    :return: True if the object was compiled by the same command
+        and it is newer than all its dependencies
+    """
+    try:
+        obj_mtime = os.stat(obj).st_mtime
+        with open(obj + CMD_FILE_SUFFIX) as f:
+            if f.read() != cmd:
+                return False
+        for d in read_dep_file(obj + DEP_FILE_SUFFIX):
+            if os.stat(d).st_mtime > obj_mtime:
+                return False
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def parallel_ccompile(compiler, sources, output_dir=None, macros=None,
+                      include_dirs=None, debug=0, extra_preargs=None,
+                      extra_postargs=None, depends=None,
+                      jobs: Optional[int]=None, obj_cache: Optional[ObjectCache]=None,
+                      pch_headers: Optional[List[str]]=None,
+                      incremental: bool=False):
+    """
+    Replacement of distutils CCompiler.compile which compiles the sources in parallel
+
+    :param jobs: number of parallel compilations (default number of CPUs)
+    :param obj_cache: optional cache of the object files
+    :param pch_headers: headers which should be precompiled
+        (used only together with obj_cache, the precompiled headers are stored in it)
+    :param incremental: if True the object files which are up to date are not compiled again
+    """
+    macros, objects, extra_postargs, pp_opts, build = compiler._setup_compile(
+        output_dir, macros, include_dirs, sources, depends, extra_postargs)
+    cc_args = compiler._get_cc_args(pp_opts, debug, extra_preargs)
+    compiler_so = getattr(compiler, "compiler_so", None)
+    if compiler_so is None:
+        # the object cache and incremental build are supported only for unix like compilers
+        obj_cache = None
+        incremental = False
+
+    cwd = os.getcwd()
+
+    def get_key(src: str, lang_args: List[str]=[]) -> str:
+        # the build directory is usually a temporary directory,
+        # it is removed from the key so the objects can be reused between builds
+        # (same as base_dir of ccache)
+        h = hashlib.sha256()
+        h.update(repr((compiler_so, cc_args, extra_postargs)).replace(cwd, ".").encode())
+        pp = check_output(compiler_so + cc_args + ["-E", "-fno-working-directory",
+                                                    *lang_args, src]
+                          + extra_postargs)
+        h.update(pp.replace(cwd.encode(), b"."))
+        return h.hexdigest()
+
+    if obj_cache is not None and pch_headers:
+        def build_pch(header: str, gch: str):
+            check_call(compiler_so + cc_args + ["-x", "c++-header", header, "-o", gch]
+                       + extra_postargs)
+
+        pch_include_dirs = []
+        for header in pch_headers:
+            d = obj_cache.get_pch(get_key(header, ["-x", "c++-header"]), header, build_pch)
+            pch_include_dirs.append("-I" + d)
+        # the directories with precompiled headers have to be searched first
+        cc_args = pch_include_dirs + cc_args
+
+    def compile_single(obj):
+        try:
+            src, ext = build[obj]
+        except KeyError:
+            return
+
+        if incremental:
+            cmd = repr((compiler_so, cc_args, extra_postargs, src))
+            if is_object_up_to_date(obj, cmd):
+                return
+            # the dependency file is written during the compilation
+            postargs = extra_postargs + ["-MMD", "-MF", obj + DEP_FILE_SUFFIX]
+        else:
+            postargs = extra_postargs
+
+        if obj_cache is not None:
+            key = get_key(src)
+            if obj_cache.get(key, obj):
+                if incremental:
+                    # the dependencies are unknown, the object will be checked
+                    # in the object cache again next time
+                    try:
+                        os.remove(obj + DEP_FILE_SUFFIX)
+                    except FileNotFoundError:
+                        pass
+                return
+
+        compiler._compile(obj, src, ext, cc_args, postargs, pp_opts)
+
+        if obj_cache is not None:
+            obj_cache.put(key, obj)
+        if incremental:
+            with open(obj + CMD_FILE_SUFFIX, "w") as f:
+                f.write(cmd)
+
+    with ThreadPoolExecutor(jobs or os.cpu_count()) as executor:
+        # list() to propagate the exceptions
+        list(executor.map(compile_single, objects))
+
+    if obj_cache is not None:
+        obj_cache.evict()
+
+    return objects
+
+
+class ParallelBuildExt(build_ext):
+    """
+    build_ext which compiles the sources of the extension in parallel
+
+    :ivar ~.compile_jobs: number of parallel compilations (default number of CPUs)
+    :ivar ~.obj_cache: optional cache of the object files
+    :ivar ~.pch_headers: headers which should be precompiled (requires obj_cache)
+    :ivar ~.incremental: if True the object files which are up to date are not compiled again
+    """
+
+    def initialize_options(self):
+        super(ParallelBuildExt, self).initialize_options()
+        self.compile_jobs = None
+        self.obj_cache = None  # type: Optional[ObjectCache]
+        self.pch_headers = None  # type: Optional[List[str]]
+        self.incremental = False
+
+    def build_extensions(self):
+        compiler = self.compiler
+        jobs = self.compile_jobs
+        obj_cache = self.obj_cache
+        pch_headers = self.pch_headers
+        incremental = self.incremental
+
+        def compile(*args, **kwargs):
+            return parallel_ccompile(compiler, *args, jobs=jobs,
+                                     obj_cache=obj_cache, pch_headers=pch_headers,
+                                     incremental=incremental, **kwargs)
+
+        compiler.compile = compile
+        super(ParallelBuildExt, self).build_extensions()
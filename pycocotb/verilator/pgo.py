@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profile guided optimization (PGO) of the simulator modules
+
+The simulator is build twice (:func:`pycocotb.verilator.simulator_gen.generatePythonModuleWrapper`
+with pgo_training):
+
+1. instrumented module (-fprofile-generate) is build and the training testbench
+   is executed with it in a separate python process (the profile is written on the exit
+   of the process and the instrumented module can not be unloaded from the process
+   which builds the simulator)
+2. the module is build again using the collected profile (-fprofile-use)
+
+:note: only the profile of the c++ compiler is used, the profile feedback of Verilator
+    (--prof-pgo, scheduling of the threads in Verilator 5) is not available
+    in the Verilator with --event-triggers used by pycocotb
+
+The training testbench is specified as "package.module:function", the function
+is called with the class of the simulator from the instrumented module
+and it should run the typical simulation using :class:`pycocotb.hdlSimulator.HdlSimulator`:
+
+.. code-block:: python
+
+    def cntr_training(sim_cls):
+        rtl_sim = sim_cls()
+        sim = HdlSimulator(rtl_sim)
+        sim.run(CLK_PERIOD * 10000, extraProcesses=[...])
+
+Usage of the training process:
+python -m pycocotb.verilator.pgo <module file> <module name> <package.module:function>
+"""
+from importlib import import_module
+import os
+from subprocess import check_call
+import sys
+from typing import List, Callable
+
+# directory in build directory where the profile data are stored
+PGO_PROFILE_DIR_NAME = "pgo_profile"
+
+
+def get_pgo_generate_args(profile_dir: str) -> List[str]:
+    """
+    :return: compiler/linker flags for the instrumented build
+    """
+    return [f"-fprofile-generate={profile_dir:s}"]
+
+
+def get_pgo_use_args(profile_dir: str) -> List[str]:
+    """
+    :return: compiler/linker flags for the build optimized using the profile
+    """
+    return [f"-fprofile-use={profile_dir:s}", "-fprofile-correction",
+            # the code which was not executed during the training
+            "-Wno-missing-profile"]
+
+
+def resolve_training(training: str) -> Callable:
+    """
+    :param training: name of the training function in format "package.module:function"
+    """
+    module_name, sep, fn_name = training.partition(":")
+    if not sep or not module_name or not fn_name:
+        raise ValueError("Training has to be specified as package.module:function", training)
+    return getattr(import_module(module_name), fn_name)
+
+
+def run_training(module_file_name: str, module_name: str, training: str, cwd: str):
+    """
+    Run the training testbench with the instrumented module in a new python process
+    (with the same sys.path as this process)
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    check_call([sys.executable, "-m", "pycocotb.verilator.pgo",
+                os.path.abspath(module_file_name), module_name, training],
+               cwd=cwd, env=env)
+
+
+def main():
+    from pycocotb.verilator.simulator_gen import loadPythonCExtensionFromFile
+    module_file_name, module_name, training = sys.argv[1:]
+    sim_cls = getattr(loadPythonCExtensionFromFile(module_file_name, module_name), module_name)
+    resolve_training(training)(sim_cls)
+
+
+if __name__ == "__main__":
+    main()
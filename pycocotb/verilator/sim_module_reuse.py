@@ -0,0 +1,32 @@
+"""
+Reuse of the loaded simulator modules in a long running process
+
+If enabled, the simulator module is build and loaded only once per process
+and the testbenches only create a new instance of the simulator for the same design
+(enabled in the worker processes of :mod:`pycocotb.regressionRunner`).
+"""
+
+REUSE_SIM_MODULES = False
+_sim_cls_cache = {}
+
+
+def enable_sim_module_reuse():
+    global REUSE_SIM_MODULES
+    REUSE_SIM_MODULES = True
+
+
+def get_reused_sim_cls(key):
+    """
+    :return: simulator class stored for the same key before (None if the reuse is disabled)
+    """
+    if REUSE_SIM_MODULES:
+        return _sim_cls_cache.get(key, None)
+    return None
+
+
+def store_reused_sim_cls(key, sim_cls):
+    """
+    Remember the simulator class for :func:`~.get_reused_sim_cls` (if the reuse is enabled)
+    """
+    if REUSE_SIM_MODULES:
+        _sim_cls_cache[key] = sim_cls
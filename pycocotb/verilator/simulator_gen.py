@@ -2,27 +2,172 @@
 
 from copy import deepcopy
 from distutils.sysconfig import get_config_var
+import hashlib
 from importlib import machinery
 from jinja2.environment import Environment
 from jinja2.loaders import PackageLoader
+import json
 import os
 from os.path import dirname
 import  platform
+import re
 from setuptools import Extension
-from setuptools.command.build_ext import build_ext
+import shutil
 from setuptools.dist import Distribution
 from subprocess import check_call
 import sys
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Set
 
 from pycocotb.verilator.fs_utils import find_files, working_directory
+from pycocotb.verilator.parallel_compile import ParallelBuildExt, ObjectCache
+from pycocotb.verilator.pgo import PGO_PROFILE_DIR_NAME, get_pgo_generate_args, \
+    get_pgo_use_args, run_training
 
 
 VER_SIM_GEN_BASE = os.path.dirname(__file__)
 COCOPY_SRC_DIR = os.path.join(VER_SIM_GEN_BASE, "c_files")
 VERILATOR_ROOT = "/usr/local/share/verilator"
 VERILATOR_INCLUDE_DIR = os.path.join(VERILATOR_ROOT, "include")
-VERILATOR = "verilator_bin_dbg"
+VERILATOR = "verilator_bin"
+VERILATOR_DBG = "verilator_bin_dbg"
+# approximate size of the generated c++ files (in Verilator statements),
+# the larger files are split so they can be compiled in parallel
+VERILATOR_OUTPUT_SPLIT = 20000
+# flags used in all build profiles
+VERILATOR_FLAGS = ["--cc", "--event-triggers", "--trace", "--savable",
+                   "--output-split", str(VERILATOR_OUTPUT_SPLIT)]
+# name of the file in build directory where the used build profile is recorded
+BUILD_PROFILE_FILE_NAME = "build_profile.json"
+# name of the file in build directory with the hash of the inputs of the last Verilator run
+VERILATOR_STAMP_FILE_NAME = "verilator.stamp"
+# files in include directories which are considered to be part of the design
+VERILOG_FILE_PATTERNS = ["*.v", "*.sv", "*.vh", "*.svh"]
+
+
+class VerilatorBuildProfile():
+    """
+    Settings of Verilator and of the c++ compiler for the build of the simulator
+
+    :ivar ~.name: name of the profile
+    :ivar ~.verilator: Verilator binary
+    :ivar ~.verilator_flags: additional flags for Verilator (optimization level, X handling)
+    :ivar ~.extra_compile_args: additional flags for the c++ compiler
+    :ivar ~.extra_link_args: additional flags for the linker
+    :ivar ~.threads: number of threads of the Verilator model (Verilator --threads),
+        if > 1 the model is evaluated by the Verilator thread pool
+    """
+    __slots__ = ["name", "verilator", "verilator_flags",
+                 "extra_compile_args", "extra_link_args", "threads"]
+
+    def __init__(self, name: str, verilator: str, verilator_flags: List[str],
+                 extra_compile_args: List[str], extra_link_args: List[str],
+                 threads: int=1):
+        self.name = name
+        self.verilator = verilator
+        self.verilator_flags = verilator_flags
+        self.extra_compile_args = extra_compile_args
+        self.extra_link_args = extra_link_args
+        self.threads = threads
+
+    def with_threads(self, threads: int) -> "VerilatorBuildProfile":
+        """
+        :return: copy of this profile with specified number of threads
+        """
+        return VerilatorBuildProfile(
+            self.name, self.verilator, self.verilator_flags,
+            self.extra_compile_args, self.extra_link_args, threads)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__:s} {self.to_dict()}>"
+
+
+BUILD_PROFILES = {p.name: p for p in [
+    # Verilator with internal checks, no optimizations, X values randomized
+    VerilatorBuildProfile(
+        "debug", VERILATOR_DBG,
+        ["-O0", "--x-assign", "unique", "--x-initial", "unique"],
+        ["-O0", "-g"], []),
+    # the shortest build time, the default X handling of Verilator
+    # (same initial and X values as the build without profile)
+    VerilatorBuildProfile(
+        "fast-build", VERILATOR,
+        [],
+        ["-O1"], []),
+    # the fastest simulation (the module can be used only on the CPU where it was build),
+    # X values are resolved in the fastest way (--x-assign fast --x-initial fast)
+    VerilatorBuildProfile(
+        "max-speed", VERILATOR,
+        ["-O3", "--x-assign", "fast", "--x-initial", "fast"],
+        ["-O3", "-march=native", "-flto"],
+        ["-O3", "-march=native", "-flto"]),
+]}
+# the profile used if not specified otherwise, can be overridden
+# by PYCOCOTB_BUILD_PROFILE environment variable
+DEFAULT_BUILD_PROFILE = "fast-build"
+
+
+def get_build_profile(name: Optional[str]=None,
+                      threads: Optional[int]=None) -> VerilatorBuildProfile:
+    """
+    :param name: name of the profile, if None the PYCOCOTB_BUILD_PROFILE environment variable
+        or DEFAULT_BUILD_PROFILE is used
+    :param threads: number of threads of the model, if None the PYCOCOTB_BUILD_THREADS
+        environment variable or 1 is used
+    """
+    if name is None:
+        name = os.environ.get("PYCOCOTB_BUILD_PROFILE", DEFAULT_BUILD_PROFILE)
+    try:
+        profile = BUILD_PROFILES[name]
+    except KeyError:
+        raise ValueError("Unknown build profile", name, list(BUILD_PROFILES.keys()))
+
+    if threads is None:
+        threads = int(os.environ.get("PYCOCOTB_BUILD_THREADS", 1))
+    if threads < 1:
+        raise ValueError("Number of threads has to be >= 1", threads)
+    if threads != profile.threads:
+        profile = profile.with_threads(threads)
+    return profile
+
+
+# headers included by the generated wrapper which are precompiled
+# (requires the object cache, see :mod:`pycocotb.verilator.parallel_compile`)
+PCH_HEADERS = [os.path.join(COCOPY_SRC_DIR, "pycocotb_sim.h")]
+
+_CPP_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_CPP_STRING_RE = re.compile(r'"(?:\\.|[^"\\\n])*"')
+_CPP_PREPROCESSOR_RE = re.compile(r"^\s*#[^\n]*", re.MULTILINE)
+# name of the called function (or of the macro, of the keyword followed by "(")
+_CPP_CALL_RE = re.compile(r"((?:\w+\s*::\s*)*~?\w+)\s*\(")
+# the files of the model which are not evaluated during the simulation steps
+_CPP_IDLE_SKIP_IGNORED_FILES_RE = re.compile(r"__(?:Syms|Trace)\w*\.cpp$")
+# the calls in the Verilator model which depend only on the variables of the model
+# and which do not have a side effect outside of the model, the skip of the idle
+# clock cycles is allowed only if the model does not call anything else
+# (e.g. $random, $time, file and console IO, DPI imports, $c code)
+_CPP_IDLE_SKIP_PURE_CALLS = {
+    # c++ keywords
+    "if", "for", "while", "switch", "return", "sizeof", "catch", "decltype",
+    # the runtime of the Verilator model
+    "name", "readAssert", "onBeforeEdge",
+    "Verilated::debug", "Verilated::overWidthError", "Verilated::quiesce",
+    # real math
+    "ceil", "floor", "fabs", "exp", "log", "log10", "pow", "sqrt", "hypot",
+    "sin", "cos", "tan", "asin", "acos", "atan", "atan2", "sinh", "cosh", "tanh",
+}
+# the expression and the declaration macros of Verilator
+_CPP_IDLE_SKIP_PURE_CALL_RE = re.compile(
+    r"VL_(?:(?:IN|OUT|INOUT|SIG)\d*[WA]?|MODULE|CELL|CTOR|CTOR_IMP|UNCOPYABLE|ATTR_\w+"
+    r"|DEBUG_IF|DBG_MSGF|LIKELY|UNLIKELY|FATAL_MT|ULL|RAND_RESET_\w+|ZERO_RESET_\w+"
+    r"|(?:EXTEND|EXTENDS|EXTENDSIGN|SHIFTL|SHIFTR|SHIFTRS|ADD|SUB|MUL|MULS|DIV|DIVS"
+    r"|MODDIV|MODDIVS|POW|POWSS|NEGATE|NOT|AND|OR|XOR|CHANGEXOR|CHANGED"
+    r"|EQ|NEQ|LT|LTE|GT|GTE|LTS|LTES|GTS|GTES|REDAND|REDOR|REDXOR|COUNTONES|ONEHOT|ONEHOT0"
+    r"|CLOG2|MOSTSETBITP1|BITSEL|BITISSET|BITWORD|BITBIT|SEL|ASSIGN|ASSIGNBIT|ASSIGNSEL"
+    r"|ASSIGNCLEAN|CONCAT|REPLICATE|STREAML|CONST|ZERO|ALLONES|CLEAN|MASK|SIGN|SIGNONES"
+    r"|ITOR|ISTOR|RTOI|RTOIROUND|CVT|WORDS)(?:\d*_\w+)?)$")
 
 template_env = Environment(
     loader=PackageLoader("pycocotb", "verilator/templates")
@@ -63,70 +208,358 @@ DEFAULT_EXTENSION_EXTRA_ARGS = {
         # "-faligned-new"
     ],
 }
+# sources of the common library (build by setup.py --verilator)
+COCOPY_SRCS = [os.path.join(COCOPY_SRC_DIR, f) for f in [
+    "signal_mem_proxy.cpp",
+    "signal_array_mem_proxy.cpp",
+    "sim_io.cpp",
+    "pycocotb_sim.cpp",
+]]
+# sources of the Verilator runtime for the multithreaded models
+VERILATOR_THREADED_SRCS = [os.path.join(VERILATOR_INCLUDE_DIR, f) for f in [
+    "verilated.cpp",
+    "verilated_threads.cpp",
+    "verilated_save.cpp",
+    "verilated_vcd_c.cpp",
+]]
 
 
-def verilatorCompile(files: List[str], build_dir: str):
-    include_dirs = [f"-I{dn:s}"
-                    for dn in set(dirname(f)
-                                  for f in files)
-                    if dn and dn != "."]
-    files = [files[-1], ]
-    cmd = [VERILATOR, "--cc", "--event-triggers",
-           "--trace", "--Mdir", build_dir] + files + include_dirs
+def getThreadedExtensionArgs(extra_Extension_args: Dict[str, object]) -> Dict[str, object]:
+    """
+    Update the setuptools.Extension arguments for the multithreaded Verilator model
+
+    The common library is compiled without VL_THREADED and the layout of the Verilator
+    runtime classes depends on it, the sources of the common library and of the Verilator
+    runtime are compiled directly into the module instead.
+    """
+    args = deepcopy(extra_Extension_args)
+    common_lib = "common." + SOABI
+    args["libraries"] = [lib for lib in args.get("libraries", []) if lib != common_lib]
+    args["sources"] = args.get("sources", []) + COCOPY_SRCS + VERILATOR_THREADED_SRCS
+    args["define_macros"] = args.get("define_macros", []) + [("VL_THREADED", "1")]
+    args["extra_compile_args"] = args.get("extra_compile_args", []) + ["-pthread"]
+    args["extra_link_args"] = args.get("extra_link_args", []) + ["-pthread"]
+    return args
+
+
+def getVerilogIncludeDirs(files: List[str]) -> List[str]:
+    return sorted(set(dn for dn in (dirname(f) for f in files)
+                      if dn and dn != "."))
+
+
+def hashFile(h, file_name: str):
+    h.update(file_name.encode())
+    with open(file_name, "rb") as f:
+        h.update(f.read())
+
+
+def hashVerilogInputs(h, files: List[str]):
+    """
+    Update the hash with the content of the Verilog files and of all files
+    which can be included from them
+    """
+    for f in files:
+        hashFile(h, os.path.abspath(f))
+
+    for d in getVerilogIncludeDirs(files):
+        inc_files = set()
+        for p in VERILOG_FILE_PATTERNS:
+            inc_files.update(find_files(d, p, recursive=False))
+        for f in sorted(inc_files):
+            hashFile(h, os.path.abspath(f))
+
+
+def verilatorCompile(files: List[str], build_dir: str,
+                     profile: Optional[VerilatorBuildProfile]=None) -> bool:
+    """
+    Run Verilator if the files or the build profile changed since the last run
+    in the build_dir (the build_dir can be reused for incremental builds)
+
+    :param profile: build profile (default :func:`~.get_build_profile`)
+    :return: True if Verilator was executed, False if the output in build_dir is up to date
+    """
+    if profile is None:
+        profile = get_build_profile()
+    include_dirs = [f"-I{dn:s}" for dn in getVerilogIncludeDirs(files)]
+    cmd = [profile.verilator, *VERILATOR_FLAGS, *profile.verilator_flags]
+    if profile.threads > 1:
+        cmd += ["--threads", str(profile.threads)]
+    cmd += ["--Mdir", build_dir, files[-1], *include_dirs]
+
+    h = hashlib.sha256()
+    hashVerilogInputs(h, files)
+    h.update(repr(cmd).encode())
+    stamp = h.hexdigest()
+    stamp_file = os.path.join(build_dir, VERILATOR_STAMP_FILE_NAME)
+    try:
+        with open(stamp_file) as f:
+            if f.read() == stamp:
+                return False
+        # the model changed, remove the old Verilator output
+        # (Verilator may generate less files than previously)
+        for pattern in ("*.cpp", "*.h"):
+            for f in list(find_files(build_dir, pattern, recursive=False)):
+                os.remove(f)
+        os.remove(stamp_file)
+    except FileNotFoundError:
+        pass
+
     try:
         check_call(cmd)
     except Exception:
         print(" ".join(cmd), file=sys.stderr)
         raise
 
+    with open(stamp_file, "w") as f:
+        f.write(stamp)
+    return True
+
+
+def writeFileIfChanged(file_name: str, content: str):
+    """
+    Write the file only if its content changed
+    (the modification time of the file is used by the incremental build)
+    """
+    try:
+        with open(file_name) as f:
+            if f.read() == content:
+                return
+    except FileNotFoundError:
+        pass
+    with open(file_name, "w") as f:
+        f.write(content)
+
 
 def getSrcFiles(build_dir: str):
     build_sources = find_files(build_dir, pattern="*.cpp", recursive=True)
     return [*build_sources]
 
 
+def _isIdleSkipPureCall(name: str, model_classes: str, model_methods: Set[str]) -> bool:
+    if name in _CPP_IDLE_SKIP_PURE_CALLS or name in model_methods \
+            or _CPP_IDLE_SKIP_PURE_CALL_RE.match(name):
+        return True
+    # the methods and the constructors of the classes of the model
+    return name.lstrip("~").startswith(model_classes)
+
+
+def getIdleSkipBlockers(build_dir: str, top_name: str) -> Set[str]:
+    """
+    Find the calls in the Verilator model which make the skip of the idle clock cycles
+    unsafe (see run_cycles(skip_idle=True) of the simulator), the skip detects that
+    the DUT is idle by comparing the values of the variables of the model,
+    but e.g. $random, $time, a read from file, DPI import or $c code may depend
+    on the state outside of the model and the skipped $display would be lost
+
+    Every call in the model which is not a method of the model and which is not
+    in the known set of pure calls is a blocker (the new or unknown Verilator
+    runtime functions disable the skip, they do not break the simulation).
+
+    :note: the $c code which modifies the state outside of the model
+        without any function call is not detected
+    :return: set of the names of such calls in the sources of the model
+    """
+    model_classes = f"V{top_name:s}"
+    wrapper = f"{model_classes:s}_sim_wrapper.cpp"
+    sources = []
+    model_methods = set()
+    definition_re = re.compile(r"\b%s\w*\s*::\s*(~?\w+)\s*\(" % model_classes)
+    for pattern in (f"{model_classes:s}*.h", f"{model_classes:s}*.cpp"):
+        for file_name in find_files(build_dir, pattern=pattern, recursive=False):
+            base_name = os.path.basename(file_name)
+            if base_name == wrapper:
+                continue
+            with open(file_name) as f:
+                src = _CPP_COMMENT_RE.sub(" ", f.read())
+            src = _CPP_PREPROCESSOR_RE.sub(" ", _CPP_STRING_RE.sub('""', src))
+            model_methods.update(definition_re.findall(src))
+            if base_name.endswith(".cpp") \
+                    and not _CPP_IDLE_SKIP_IGNORED_FILES_RE.search(base_name):
+                sources.append(src)
+
+    blockers = set()
+    for src in sources:
+        for name in _CPP_CALL_RE.findall(src):
+            name = re.sub(r"\s+", "", name)
+            if not _isIdleSkipPureCall(name, model_classes, model_methods):
+                blockers.add(name)
+    return blockers
+
+
+def getSignalTable(accessible_signals: List[Tuple[str, bool, bool, int]]):
+    """
+    Convert the accessible signals to the table used by the generated wrapper
+
+    :note: the signals optimised out by Verilator are skipped by the compiler
+        when the wrapper is compiled (define_member_addr in sim_io.h)
+    :return: tuple (names, widths, table) where names and widths are pools
+        of the name parts and widths and table is the list of tuples
+        (name_i, name_len, signal_phy_name, width_i, width_len, is_signed)
+    """
+    names = []
+    widths = []
+    table = []
+    for signal_name, signal_phy_name, _, is_signed, type_width in accessible_signals:
+        table.append((len(names), len(signal_name), signal_phy_name,
+                      len(widths), len(type_width), "true" if is_signed else "false"))
+        names.extend(signal_name)
+        widths.extend(type_width)
+    return names, widths, table
+
+
+def renderPythonModuleWrapper(
+        top_name: str, top_unique_name: str,
+        accessible_signals: List[Tuple[str, bool, bool, int]],
+        profile: Optional[VerilatorBuildProfile]=None,
+        idle_skip_supported: bool=True) -> str:
+    """
+    :param profile: build profile (default :func:`~.get_build_profile`),
+        its name is available as BUILD_PROFILE in the simulator module
+    :param idle_skip_supported: if False the skip of idle clock cycles is never used
+        for this model (see :func:`~.getIdleSkipBlockers`),
+        available as IDLE_SKIP_SUPPORTED in the simulator module
+    :return: c++ code of the wrapper of the Verilator simulation
+    """
+    if profile is None:
+        profile = get_build_profile()
+    signal_names, signal_widths, signal_table = getSignalTable(accessible_signals)
+    signal_phy_names = sorted(set(s[2] for s in signal_table))
+    return verilator_sim_wrapper_template.render(
+        module_name=top_unique_name,
+        top_name=top_name,
+        signal_phy_names=signal_phy_names,
+        signal_names=signal_names,
+        signal_widths=signal_widths,
+        signal_table=signal_table,
+        build_profile=profile.name,
+        idle_skip_supported=idle_skip_supported)
+
+
+def _buildExtension(top_unique_name: str, build_dir: str,
+                    extra_Extension_args: Dict[str, object],
+                    compile_jobs: Optional[int], obj_cache: Optional[ObjectCache],
+                    extra_compile_args: List[str], extra_link_args: List[str],
+                    incremental: bool=True) -> str:
+    """
+    Build the extension from all c/c++ files in actual directory
+
+    :param incremental: if True the objects which are up to date are not compiled again
+    :return: file name of builded module (.so/.dll file)
+    """
+    sources = getSrcFiles(".")
+    dist = Distribution()
+
+    dist.parse_config_files()
+
+    extra_Extension_args = deepcopy(extra_Extension_args)
+    extra_Extension_args["sources"] = extra_Extension_args.get("sources", []) + sources
+    extra_Extension_args["include_dirs"] = extra_Extension_args.get("include_dirs", []) + [build_dir, ]
+    for k, v in (("extra_compile_args", extra_compile_args),
+                 ("extra_link_args", extra_link_args)):
+        extra_Extension_args[k] = extra_Extension_args.get(k, []) + v
+
+    sim = Extension(top_unique_name,
+                    **extra_Extension_args,
+                    )
+
+    dist.ext_modules = [sim]
+    _build_ext = ParallelBuildExt(dist)
+    _build_ext.compile_jobs = compile_jobs
+    _build_ext.obj_cache = obj_cache
+    _build_ext.pch_headers = PCH_HEADERS
+    # the module is build repeatedly in the same directory (PGO, incremental build),
+    # the module is always linked
+    _build_ext.force = True
+    _build_ext.incremental = incremental
+    _build_ext.finalize_options()
+    _build_ext.run()
+    return os.path.join(build_dir, _build_ext.build_lib,
+                        sim._file_name)
+
+
+def _buildExtensionPgo(top_unique_name: str, build_dir: str,
+                       extra_Extension_args: Dict[str, object],
+                       compile_jobs: Optional[int],
+                       extra_compile_args: List[str], extra_link_args: List[str],
+                       pgo_training: str) -> str:
+    """
+    Build the instrumented extension, run the training and build the extension
+    with the collected profile (see :mod:`pycocotb.verilator.pgo`)
+
+    :note: the profile from the previous build in the same directory is removed
+        (the instrumented module would add its counts to it) and the objects are always
+        compiled again (the profile is not a dependency of the objects)
+    :return: file name of builded module (.so/.dll file)
+    """
+    pgo_profile_dir = os.path.join(build_dir, PGO_PROFILE_DIR_NAME)
+    shutil.rmtree(pgo_profile_dir, ignore_errors=True)
+    pgo_args = get_pgo_generate_args(pgo_profile_dir)
+    instrumented = _buildExtension(
+        top_unique_name, build_dir, extra_Extension_args, compile_jobs, None,
+        extra_compile_args + pgo_args, extra_link_args + pgo_args, incremental=False)
+    run_training(instrumented, top_unique_name, pgo_training, build_dir)
+
+    pgo_args = get_pgo_use_args(pgo_profile_dir)
+    return _buildExtension(
+        top_unique_name, build_dir, extra_Extension_args, compile_jobs, None,
+        extra_compile_args + pgo_args, extra_link_args + pgo_args, incremental=False)
+
+
 def generatePythonModuleWrapper(
         top_name: str, top_unique_name: str,
         build_dir: str,
         accessible_signals: List[Tuple[str, bool, bool, int]],
-        extra_Extension_args: Dict[str, object]=DEFAULT_EXTENSION_EXTRA_ARGS):
+        extra_Extension_args: Dict[str, object]=DEFAULT_EXTENSION_EXTRA_ARGS,
+        compile_jobs: Optional[int]=None,
+        obj_cache: Optional[ObjectCache]=None,
+        profile: Optional[VerilatorBuildProfile]=None,
+        pgo_training: Optional[str]=None):
     """
     Collect all c/c++ files into setuptools.Extension and build it
+    (the files are compiled in parallel)
 
     :param top_name: name of top in simulation
     :param top_unique_name: unique name used as name for simulator module
-    :param build_dir: tmp directory where simulation should be build
+    :param build_dir: directory where simulation should be build, if the directory
+        is reused only the changed sources are compiled (e.g. only the wrapper
+        if only the accessible_signals changed, see :func:`~.verilatorCompile`)
     :param verilator_include_dir: include directory of Verilator
     :param accessible_signals: List of tuples (signal_name, signal_phy_name, read_only, is_signed, type_width)
     :param extra_Extension_args: additional values for setuptools.Extension constructor
+    :param compile_jobs: number of parallel compilations (default number of CPUs)
+    :param obj_cache: optional cache of the object files which allows to reuse
+        the object files from previous builds (and of the precompiled PCH_HEADERS)
+    :param profile: build profile (default :func:`~.get_build_profile`),
+        it is recorded in BUILD_PROFILE_FILE_NAME in build_dir
+    :param pgo_training: optional training testbench "package.module:function",
+        if specified the module is build with profile guided optimization
+        (see :mod:`pycocotb.verilator.pgo`, the obj_cache is not used in this case
+        because the profile is not part of the key of the objects)
 
     :return: file name of builded module (.so/.dll file)
     """
+    if profile is None:
+        profile = get_build_profile()
     with working_directory(build_dir):
-        with open("V" + top_name + "_sim_wrapper.cpp", "w") as f:
-            f.write(verilator_sim_wrapper_template.render(
-                module_name=top_unique_name,
-                top_name=top_name,
-                accessible_signals=accessible_signals))
-        sources = getSrcFiles(".")
-        dist = Distribution()
-
-        dist.parse_config_files()
-
-        extra_Extension_args = deepcopy(extra_Extension_args)
-        extra_Extension_args["sources"] = extra_Extension_args.get("sources", []) + sources
-        extra_Extension_args["include_dirs"] = extra_Extension_args.get("include_dirs", []) + [build_dir, ]
-
-        sim = Extension(top_unique_name,
-                        **extra_Extension_args,
-                        )
-
-        dist.ext_modules = [sim]
-        _build_ext = build_ext(dist)
-        _build_ext.finalize_options()
-        _build_ext.run()
-        return os.path.join(build_dir, _build_ext.build_lib,
-                            sim._file_name)
+        writeFileIfChanged(
+            "V" + top_name + "_sim_wrapper.cpp",
+            renderPythonModuleWrapper(
+                top_name, top_unique_name, accessible_signals, profile,
+                not getIdleSkipBlockers(".", top_name)))
+        d = profile.to_dict()
+        d["pgo_training"] = pgo_training
+        writeFileIfChanged(BUILD_PROFILE_FILE_NAME, json.dumps(d, indent=2))
+        if profile.threads > 1:
+            extra_Extension_args = getThreadedExtensionArgs(extra_Extension_args)
+
+        if pgo_training is None:
+            return _buildExtension(top_unique_name, build_dir, extra_Extension_args,
+                                   compile_jobs, obj_cache,
+                                   profile.extra_compile_args, profile.extra_link_args)
+
+        return _buildExtensionPgo(top_unique_name, build_dir, extra_Extension_args,
+                                  compile_jobs, profile.extra_compile_args,
+                                  profile.extra_link_args, pgo_training)
 
 
 def loadPythonCExtensionFromFile(library_file_name: str, module_name: str):